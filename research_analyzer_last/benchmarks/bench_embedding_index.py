@@ -0,0 +1,54 @@
+"""Time top-k queries on the IVF embedding index against an exact scan.
+
+Builds an index of random clustered vectors in a temporary directory, so no
+model weights are needed. Run from the project root:
+    python -m benchmarks.bench_embedding_index [vector count]
+"""
+import sys
+import time
+import tempfile
+import numpy as np
+from src.storage.embedding_index import EmbeddingIndex, normalize
+
+DIM = 384  # all-MiniLM-L6-v2
+
+
+def clustered_vectors(rng, centers, n):
+    labels = rng.integers(len(centers), size=n)
+    return normalize(centers[labels] + 0.5 * rng.normal(size=(n, DIM)).astype(np.float32))
+
+
+def main(count=1_000_000, queries=200, k=10):
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(2000, DIM)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = EmbeddingIndex(directory, dimension=DIM)
+        start = time.perf_counter()
+        for offset in range(0, count, 100_000):
+            n = min(100_000, count - offset)
+            index.add([f'p{offset + i}' for i in range(n)], clustered_vectors(rng, centers, n))
+        print(f"built {len(index)} vectors in {time.perf_counter() - start:.1f} s "
+              f"({len(index.centroids) if index.centroids is not None else 0} lists)")
+
+        probes = clustered_vectors(rng, centers, queries)
+        start = time.perf_counter()
+        approximate = [index.search(probe, k) for probe in probes]
+        ivf_ms = (time.perf_counter() - start) / queries * 1000
+
+        # Exact answers for a sample of queries, by scanning the whole matrix
+        sample = min(queries, 20)
+        vectors = np.asarray(index._vectors[:len(index)])
+        start = time.perf_counter()
+        exact = [set(np.argpartition(-(vectors @ probe), k)[:k]) for probe in probes[:sample]]
+        exact_ms = (time.perf_counter() - start) / sample * 1000
+        recall = np.mean([
+            len(truth & {index.rows[key] for key, _ in found}) / k
+            for truth, found in zip(exact, approximate)
+        ])
+        print(f"IVF top-{k}: {ivf_ms:.2f} ms/query, recall@{k} {recall:.2f}; exact scan: {exact_ms:.1f} ms/query")
+        index.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
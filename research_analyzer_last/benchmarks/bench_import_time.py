@@ -0,0 +1,59 @@
+"""Check cold-start import times against a budget.
+
+Imports each module in a fresh interpreter under `python -X importtime`, keeps
+the best of a few runs and exits with status 1 if any module is over its
+budget, so it can gate CI. Run from the project root:
+    python -m benchmarks.bench_import_time [repeats]
+"""
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds, about twice what each took when lazy loading was introduced
+IMPORT_BUDGETS_MS = {
+    'main': 250,
+    'src.core.paper_analyzer': 600,
+    'src.core.daemon': 1500
+}
+
+
+def import_time_ms(module, repeats=3):
+    """Best cumulative import time of module over repeats fresh interpreters, in ms"""
+    best = None
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stderr
+        for line in output.splitlines():
+            fields = line.split('|')
+            # The top-level entry is the only one not indented under another import
+            if len(fields) == 3 and fields[2] == ' ' + module:
+                took = int(fields[1]) / 1000
+                best = took if best is None else min(best, took)
+    return best
+
+
+def over_budget(budgets=None, repeats=3):
+    """{module: (ms, budget)} for every module slower than its budget"""
+    budgets = budgets or IMPORT_BUDGETS_MS
+    slow = {}
+    for module, budget in budgets.items():
+        took = import_time_ms(module, repeats)
+        print(f"{module}: {took:.0f} ms (budget {budget} ms)")
+        if took > budget:
+            slow[module] = (took, budget)
+    return slow
+
+
+def main(repeats=3):
+    slow = over_budget(repeats=repeats)
+    if slow:
+        print(f"Over budget: {', '.join(slow)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,58 @@
+"""Time full-text searches over the paper store's FTS5 index.
+
+Fills a temporary store with synthetic abstracts drawn from a Zipf-like
+vocabulary, so common and rare terms behave as in real text. Run from the
+project root:
+    python -m benchmarks.bench_search_index [paper count]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from src.storage.paper_store import PaperStore
+
+VOCABULARY = [f'term{i}' for i in range(50_000)]
+QUERIES = ['term3', 'term40 term41', 'term900', 'term12000 term7', 'term45000']
+
+
+def synthetic_papers(rng, offset, n, weights):
+    words = rng.choice(len(VOCABULARY), size=(n, 130), p=weights)
+    return [
+        {
+            'pmid': str(offset + i),
+            'title': ' '.join(VOCABULARY[w] for w in row[:10]),
+            'abstract': ' '.join(VOCABULARY[w] for w in row[10:]),
+            'source': 'PubMed'
+        }
+        for i, row in enumerate(words)
+    ]
+
+
+def main(count=1_000_000, repeats=20):
+    rng = np.random.default_rng(0)
+    weights = 1 / np.arange(1, len(VOCABULARY) + 1)
+    weights /= weights.sum()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = PaperStore(os.path.join(directory, 'papers.db'), os.path.join(directory, 'backups'))
+        start = time.perf_counter()
+        for offset in range(0, count, 10_000):
+            store.upsert_papers(synthetic_papers(rng, offset, min(10_000, count - offset), weights))
+        print(f"indexed {count} papers in {time.perf_counter() - start:.1f} s")
+        start = time.perf_counter()
+        store.optimize_search_index()
+        print(f"optimized in {time.perf_counter() - start:.1f} s; "
+              f"database {os.path.getsize(store.path) / 2 ** 20:.0f} MiB")
+
+        for query in QUERIES:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                results = store.search(query, limit=10)
+            ms = (time.perf_counter() - start) / repeats * 1000
+            print(f"{query!r}: {ms:.2f} ms/query ({len(results)} results)")
+        store.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
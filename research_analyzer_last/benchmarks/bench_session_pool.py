@@ -0,0 +1,52 @@
+"""Compare per-call sessions against one pooled SessionManager on a local stand-in server.
+
+Run from the project root:
+    python -m benchmarks.bench_session_pool
+"""
+import asyncio
+import time
+from config.config import SEARCH_TOPICS, RATE_LIMIT_CONFIG
+from src.scrapers.medical_scrapers import (
+    SessionManager, PubMedScraper, ClinicalTrialsScraper, MedRxivScraper
+)
+from tests.standin_server import StandInServer
+
+SCRAPERS = (PubMedScraper, ClinicalTrialsScraper, MedRxivScraper)
+
+# Measure connection handling, not the per-host token bucket
+RATE_LIMIT_CONFIG['hosts']['127.0.0.1'] = {'requests_per_second': 10000, 'burst': 10000}
+
+
+async def run_topics(server, topics, session_manager=None):
+    # Build scrapers up front so loading the user agent data is not part of the timing
+    scrapers = [server.point_scraper(cls(session_manager)) for cls in SCRAPERS]
+    start = time.perf_counter()
+    for topic in topics:
+        await asyncio.gather(*(scraper.search(topic, limit=3) for scraper in scrapers))
+    return time.perf_counter() - start
+
+
+async def main(rounds=5):
+    topics = SEARCH_TOPICS['innovations'] + SEARCH_TOPICS['research']
+
+    for label in ('per-call sessions', 'pooled session'):
+        timings = []
+        connections = 0
+        for _ in range(rounds):
+            server = await StandInServer().start()
+            try:
+                if label == 'pooled session':
+                    async with SessionManager() as session_manager:
+                        timings.append(await run_topics(server, topics, session_manager))
+                else:
+                    timings.append(await run_topics(server, topics))
+                connections = server.connections
+            finally:
+                await server.stop()
+
+        best = min(timings) * 1000
+        print(f"{label:>18}: {len(topics)} topics, {connections:3d} connections, best {best:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -15,7 +15,8 @@ EMAIL_CONFIG = {
 RESEARCH_SOURCES = {
     'pubmed': {
         'base_url': 'https://pubmed.ncbi.nlm.nih.gov',
-        'enabled': True
+        'enabled': True,
+        'efetch_batch_size': 500  # Records per efetch page from the history server
     },
     'who': {
         'base_url': 'https://www.who.int/publications',
@@ -64,24 +65,145 @@ SEARCH_TOPICS = {
 # Analysis Settings
 ANALYSIS_SETTINGS = {
     'max_papers_per_source': 5,
-    'days_to_look_back': 1,  # Only look at papers from the last day
-    'min_relevance_score': 0.7,
+    'max_concurrent_searches': 8,  # (topic, source) searches in flight at once
+    'max_concurrent_summaries': 56,  # (paper, model) summaries in flight at once
+    'max_concurrent_per_model': 8,  # Matches max_request_batch so each model fills a batch
+    'model_concurrency': {  # Per-model overrides of max_concurrent_per_model
+        'huggingface_mistral': 2
+    },
+    'pipeline_queue_size': 32,  # Items buffered between pipeline stages before the upstream stage waits
+    'pipeline_summarize_workers': 4,  # Batches of papers being summarized at once
+    'summarize_batch_size': 8,  # Most papers handed to one summarize_papers() call
+    'days_to_look_back': 1,  # Window for searches with no stored watermark yet
+    'max_days_to_look_back': 30,  # Older watermarks are searched from this far back only
+    # TF-IDF cosine with the query that found the paper, not the old 0-1 share of topic keywords (was 0.7).
+    # On-topic PubMed abstracts score about 0.06-0.4; one passing mention of a query word in a full abstract about 0.05
+    'min_relevance_score': 0.06,
+    'relevance_idf_path': 'cache/relevance_idf.json',  # Fixed document frequencies for relevance scoring
     'required_fields': ['title', 'abstract', 'authors', 'publication_date']
 }
 
+# HTTP Client Settings
+HTTP_CONFIG = {
+    'pool_size': 100,  # Total open connections across all hosts
+    'pool_size_per_host': 10,
+    'keepalive_timeout': 30,  # Seconds an idle connection stays in the pool
+    'dns_cache_ttl': 300,
+    'request_timeout': 60,
+    'user_agent': None,  # Fixed User-Agent for every request; None picks a random browser one per scraper
+    'fallback_user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+# Rate Limits (one token bucket per host)
+RATE_LIMIT_CONFIG = {
+    'hosts': {
+        'eutils.ncbi.nlm.nih.gov': {'requests_per_second': 3, 'burst': 3},  # 10/s with an NCBI API key
+        'clinicaltrials.gov': {'requests_per_second': 5, 'burst': 5},
+        'api.medrxiv.org': {'requests_per_second': 2, 'burst': 2},
+        'api-inference.huggingface.co': {'requests_per_second': 5, 'burst': 5}
+    },
+    'default': {'requests_per_second': 10, 'burst': 10},
+    'max_retries': 4,  # Retries on 429/503 before giving up
+    'backoff_base': 1.0,  # Seconds; doubled on every retry
+    'backoff_max': 60.0
+}
+
+# Long-text Summarization (map-reduce over chunks)
+SUMMARIZATION_CONFIG = {
+    'chunk_size': 1500,  # Characters per chunk
+    'chunk_overlap': 200,  # Characters repeated from the end of the previous chunk
+    'max_chunk_workers': 4,  # Concurrent chunk requests on the blocking path
+    'max_reduce_depth': 3,  # Summary-of-summaries levels before returning as-is
+    'batch_requests': True,  # Coalesce concurrent async calls per model into one request
+    'max_request_batch': 8,  # Inputs per batched Inference API request
+    'batch_window': 0.02  # Seconds to wait for more inputs before sending a partial batch
+}
+
+# Local Summarization Models (torch/transformers, CPU)
+LOCAL_MODEL_CONFIG = {
+    'enabled': False,
+    'models': ['bart_cnn', 'pegasus_pubmed'],
+    'batch_size': 8,  # Abstracts per generate() call
+    'num_threads': None,  # torch.set_num_threads; None keeps torch's default
+    'quantize': False,  # int8 dynamic quantization of Linear layers
+    'max_input_tokens': 1024
+}
+
+# Semantic Embeddings (local sentence encoder + memory-mapped IVF index)
+EMBEDDING_CONFIG = {
+    'enabled': False,  # Needs torch and the encoder weights locally
+    'model': 'sentence-transformers/all-MiniLM-L6-v2',
+    'batch_size': 32,  # Abstracts per forward pass
+    'max_input_tokens': 256,
+    'index_dir': 'embeddings/',
+    'train_threshold': 20000,  # Exact search below this many vectors, IVF above
+    'max_lists': 4096,  # IVF lists; sqrt(vectors) up to this cap
+    'nprobe': 16,  # Lists scanned per query
+    'train_sample': 100000,  # Vectors used to fit the k-means centroids
+    'retrain_growth': 4  # Refit centroids once the index is this many times its size at training
+}
+
+# Cross-source Deduplication (exact IDs, then MinHash-LSH over title + abstract)
+DEDUP_CONFIG = {
+    'enabled': True,
+    'threshold': 0.8,  # Estimated Jaccard similarity of shingle sets to count as a duplicate
+    'num_perm': 128,  # MinHash signature length
+    'bands': 32,  # LSH bands (num_perm / bands rows each)
+    'shingle_size': 3  # Words per shingle
+}
+
+# Summary Cache (in-memory LRU in front of a SQLite file)
+SUMMARY_CACHE_CONFIG = {
+    'enabled': True,
+    'path': 'cache/summaries.db',
+    'memory_entries': 2048,
+    'disk_entries': 200000,
+    'ttl_days': 30
+}
+
+# Paper Export (raw data written as each run's papers are summarized)
+EXPORT_CONFIG = {
+    'format': 'parquet',  # 'parquet' (partitioned dataset across runs) or 'csv' (one file per run)
+    'directory': 'results/papers/',  # Parquet dataset root: date=YYYY-MM-DD/source=<source>/
+    'row_group_size': 512,
+    'compression': 'zstd'
+}
+
+# Run Journal (append-only log used to resume interrupted runs)
+JOURNAL_CONFIG = {
+    'directory': 'journals/',
+    'fsync': False  # fsync after every entry; survives power loss, not just crashes, at some speed cost
+}
+
 # Dashboard Settings
 DASHBOARD_CONFIG = {
     'port': 8080,
     'host': 'localhost',
     'update_interval': 3600,  # Update every hour
-    'max_displayed_papers': 50
+    'max_displayed_papers': 50,
+    'allowed_origins': [
+        'https://medical-research-analysis.vercel.app',
+        'http://localhost:5173',
+        'http://localhost:3000'
+    ],
+    'response_cache_entries': 256,  # API responses kept per run; dropped when a new run completes
+    'export_batch_size': 1000  # Papers read per query while streaming an export
+}
+
+# Daemon Mode (one long-running process; runs every update_interval and at summary_time)
+DAEMON_CONFIG = {
+    'lock_file': 'analysis.lock',  # Held for the length of a run, by the daemon and by one-off runs alike
+    'run_on_start': True,
+    'poll_seconds': 1  # How often due jobs are checked
 }
 
 # Database Settings
 DATABASE_CONFIG = {
     'filename': 'medical_research.db',
     'backup_dir': 'backups/',
-    'backup_interval_hours': 24
+    'backup_interval_hours': 24,
+    'max_backups': 7,  # Oldest snapshots beyond this are deleted
+    'skip_summarized_papers': True  # Leave papers summarized in earlier runs out of new runs
 }
 
 # Notification Settings
@@ -99,6 +221,16 @@ NOTIFICATION_CONFIG = {
     'max_alerts_per_day': 5
 }
 
+# Report Categories: whole-word terms; a trailing * also matches longer words ('therap*' -> therapy, therapeutic)
+CATEGORY_TAXONOMY = {
+    'Treatment & Therapeutics': ['treatment*', 'therap*', 'drug*', 'medication*'],
+    'Diagnostics & Detection': ['diagnos*', 'detection', 'screening', 'imaging'],
+    'Medical Devices': ['device*', 'technolog*', 'equipment', 'instrument*'],
+    'Public Health': ['public health', 'population*', 'epidemiolog*', 'prevention'],
+    'Clinical Trials': ['clinical trial*', 'phase', 'randomized', 'randomised']
+}
+DEFAULT_CATEGORY = 'Other Research'
+
 # Report Generation
 REPORT_CONFIG = {
     'template_dir': 'templates/',
@@ -109,7 +241,11 @@ REPORT_CONFIG = {
         'key_findings',
         'detailed_analysis',
         'recommendations'
-    ]
+    ],
+    'layout_cache_path': 'cache/report_layouts.db',  # Laid-out paper entries, keyed by content hash
+    'layout_cache_entries': 100000,
+    'render_workers': None,  # Processes laying out new entries; None uses every CPU
+    'parallel_min_papers': 200  # Fewer new entries than this are laid out in-process
 }
 
 def get_date_range():
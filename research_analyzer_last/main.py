@@ -1,9 +1,28 @@
 import asyncio
-from src.core.paper_analyzer import ResearchPaperAnalyzer
-from src.utils.report_generator import generate_report
+import argparse
+from datetime import datetime, timedelta
+from src.core.run_lock import RunLock
 import os
 
-async def main():
+# Each command imports what it needs, so --search or --help does not load models, pandas or fpdf
+
+def has_packages(command, *packages):
+    """Whether the optional packages command needs are installed; prints how to install them if not"""
+    import importlib.util
+    missing = [name for name in packages if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"{command} needs packages that are not installed ({', '.join(missing)}). "
+              f"Install them with: pip install -e .[service]")
+    return not missing
+
+async def main(resume=None):
+    from src.core.paper_analyzer import ResearchPaperAnalyzer
+    from src.utils.report_generator import generate_report
+    lock = RunLock()
+    if not lock.acquire():
+        print("Another analysis run is in progress (daemon or CLI); try again once it finishes.")
+        return
+    analyzer = None
     try:
         # Initialize the analyzer
         print("Initializing Research Paper Analyzer...")
@@ -11,7 +30,7 @@ async def main():
         
         # Run analysis
         print("\nStarting analysis...")
-        analyzed_papers = await analyzer.run_analysis()
+        analyzed_papers = await analyzer.run_analysis(resume=resume)
         
         if analyzed_papers:
             # Generate report
@@ -27,6 +46,50 @@ async def main():
             
     except Exception as e:
         print(f"\nError during execution: {str(e)}")
+    finally:
+        if analyzer is not None:
+            analyzer.close()
+        lock.release()
+
+async def run_daemon():
+    from src.core.daemon import AnalysisDaemon
+    print("Initializing Research Paper Analyzer daemon...")
+    await AnalysisDaemon().serve()
+
+def search(query, days=None, limit=20):
+    """Print stored papers matching query, without contacting any source"""
+    from src.storage.paper_store import PaperStore
+    store = PaperStore()
+    try:
+        since = datetime.now() - timedelta(days=days) if days else None
+        results = store.search(query, limit=limit, since=since)
+        if not results:
+            print(f"No stored papers match '{query}'.")
+        for i, result in enumerate(results, 1):
+            print(f"{i}. {result['title']} ({result['source']}, {result['year'] or 'n.d.'})")
+            print(f"   {result['snippet']}")
+            if result['url']:
+                print(f"   {result['url']}")
+    finally:
+        store.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Search, summarize and report on recent medical research")
+    parser.add_argument('--resume', metavar='RUN_ID', help="finish an interrupted run from its journal")
+    parser.add_argument('--search', metavar='QUERY', help="search papers harvested by earlier runs instead of running")
+    parser.add_argument('--days', type=int, help="with --search, only papers fetched in the last DAYS days")
+    parser.add_argument('--serve', action='store_true', help="serve stored results over HTTP (see DASHBOARD_CONFIG)")
+    parser.add_argument('--daemon', action='store_true',
+                        help="stay running: analyze on the configured schedule and serve results and /health")
+    args = parser.parse_args()
+    if args.search:
+        search(args.search, days=args.days)
+    elif args.daemon:
+        if has_packages('--daemon', 'fastapi', 'uvicorn', 'schedule'):
+            asyncio.run(run_daemon())
+    elif args.serve:
+        if has_packages('--serve', 'fastapi', 'uvicorn'):
+            from src.api.service import serve
+            serve()
+    else:
+        asyncio.run(main(resume=args.resume))
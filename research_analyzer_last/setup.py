@@ -6,13 +6,16 @@ setup(
     packages=find_packages(),
     install_requires=[
         'numpy',
+        'scipy',
         'pandas',
+        'pyarrow',
         'requests',
         'python-dotenv',
         'tqdm',
         'beautifulsoup4',
         'lxml',
         'aiohttp',
+        'SQLAlchemy',
         'fake-useragent',
         'fpdf2',
         'matplotlib',
@@ -21,5 +24,9 @@ setup(
         'sentencepiece',
         'pytest',
         'pytest-asyncio'
-    ]
+    ],
+    extras_require={
+        # python main.py --serve and --daemon
+        'service': ['fastapi', 'uvicorn', 'schedule']
+    }
 )
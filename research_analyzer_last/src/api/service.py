@@ -0,0 +1,265 @@
+import os
+import re
+import csv
+import io
+import json
+import glob
+import base64
+import asyncio
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from itertools import islice
+from datetime import datetime, timedelta
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from config.config import DASHBOARD_CONFIG
+from src.storage.paper_store import PaperStore
+from src.utils.categorizer import default_categorizer
+
+RUN_ID = re.compile(r'^[A-Za-z0-9_-]+$')
+EXPORT_COLUMNS = ['paper_key', 'source', 'source_id', 'doi', 'title', 'abstract', 'authors', 'year', 'url', 'fetched_at']
+
+class ResponseCache:
+    """LRU of encoded response bodies keyed by ETag.
+
+    An ETag covers the run a response was built from, so a new run simply
+    stops matching the old entries, which age out.
+    """
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or DASHBOARD_CONFIG['response_cache_entries']
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+def encode_cursor(paper):
+    raw = json.dumps([paper['fetched_at'].isoformat(), paper['id']])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        fetched_at, paper_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(fetched_at), int(paper_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+
+def run_version(run):
+    return f"{run['run_id']}@{run['completed_at'].isoformat()}" if run else 'no-runs'
+
+def request_etag(version, request):
+    """Strong ETag for a request against a store version: the same request gives the same body until the next run"""
+    query = sorted(request.query_params.multi_items())
+    material = json.dumps([version, request.url.path, query])
+    return f'"{hashlib.sha1(material.encode()).hexdigest()}"'
+
+def not_modified(request, etag):
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+def _public(paper):
+    return {key: value for key, value in paper.items() if key != 'id'}
+
+def create_app(store=None, results_dir='results'):
+    """The query service over a PaperStore and the reports in results_dir.
+
+    Everything served reflects the store as of the latest completed run:
+    papers fetched by a run still in progress appear once it completes.
+    JSON responses carry ETags derived from that run, so a conditional GET
+    is answered with 304 before any data is read, and response bodies are
+    cached until the next run. Store calls run in worker threads so the
+    event loop keeps serving while SQLite works.
+    """
+    own_store = store is None
+    store = store or PaperStore()
+    cache = ResponseCache()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        if own_store:
+            store.close()
+
+    app = FastAPI(title='Research Paper Analyzer', lifespan=lifespan)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=DASHBOARD_CONFIG['allowed_origins'],
+        allow_credentials=True,
+        allow_methods=['GET'],
+        allow_headers=['*'],
+        expose_headers=['ETag']
+    )
+    max_limit = DASHBOARD_CONFIG['max_displayed_papers']
+
+    async def cached_json(request, build):
+        """Answer from the ETag, the response cache or build(run), in that order"""
+        run = await asyncio.to_thread(store.latest_run)
+        etag = request_etag(run_version(run), request)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+        body = cache.get(etag)
+        if body is None:
+            result = await asyncio.to_thread(build, run)
+            body = json.dumps(result, default=str).encode('utf-8')
+            cache.set(etag, body)
+        return Response(body, media_type='application/json', headers=headers)
+
+    def window(run, days):
+        # Windows are measured back from the run, not the request, so a response stays valid until the next run
+        until = run['completed_at'] if run else None
+        since = (until or datetime.now()) - timedelta(days=days) if days else None
+        return since, until
+
+    @app.get('/api/test')
+    async def test():
+        return {'message': 'Backend is working!'}
+
+    @app.get('/api/runs/latest')
+    async def latest_run(request: Request):
+        def build(run):
+            if run is None:
+                raise HTTPException(status_code=404, detail='No completed runs')
+            return run
+        return await cached_json(request, build)
+
+    @app.get('/api/papers')
+    async def papers(request: Request, limit: int = Query(max_limit, ge=1), cursor: str = None,
+                     source: str = None, days: int = Query(None, ge=1)):
+        after = decode_cursor(cursor) if cursor else None
+        limit = min(limit, max_limit)
+
+        def build(run):
+            since, until = window(run, days)
+            page = store.latest_papers(limit, after=after, source=source, since=since, until=until)
+            return {
+                'run_id': run['run_id'] if run else None,
+                'papers': [_public(paper) for paper in page],
+                'next_cursor': encode_cursor(page[-1]) if len(page) == limit else None
+            }
+        return await cached_json(request, build)
+
+    @app.get('/api/search')
+    async def search(request: Request, q: str = Query(..., min_length=1), limit: int = Query(20, ge=1),
+                     source: str = None, days: int = Query(None, ge=1)):
+        limit = min(limit, max_limit)
+
+        def build(run):
+            since, until = window(run, days)
+            return {
+                'run_id': run['run_id'] if run else None,
+                'results': store.search(q, limit=limit, source=source, since=since, until=until)
+            }
+        return await cached_json(request, build)
+
+    @app.get('/api/categories')
+    async def categories(request: Request, days: int = Query(None, ge=1)):
+        def build(run):
+            since, until = window(run, days)
+            counts = Counter()
+            total = 0
+            papers = store.iter_papers(since=since, until=until, summaries=False)
+            while True:
+                batch = list(islice(papers, 1000))
+                if not batch:
+                    break
+                total += len(batch)
+                for found in default_categorizer().categorize_papers(batch):
+                    counts.update(found)
+            return {'run_id': run['run_id'] if run else None, 'total': total, 'counts': dict(counts.most_common())}
+        return await cached_json(request, build)
+
+    @app.get('/api/export')
+    async def export(request: Request, format: str = Query('jsonl', pattern='^(jsonl|csv)$'), source: str = None):
+        """Every stored paper as JSON lines or CSV, streamed in batches so memory stays flat"""
+        run = await asyncio.to_thread(store.latest_run)
+        etag = request_etag(run_version(run), request)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+        until = run['completed_at'] if run else None
+        papers = store.iter_papers(DASHBOARD_CONFIG['export_batch_size'], source=source, until=until)
+
+        def jsonl():
+            for paper in papers:
+                yield json.dumps(_public(paper), default=str, ensure_ascii=False) + '\n'
+
+        def rows():
+            # Summary columns are only known once a paper has them, so they go in one JSON column
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS + ['summaries'])
+            for paper in papers:
+                summaries = {k: v for k, v in paper.items() if k.startswith('summary_')}
+                writer.writerow([paper.get(column) for column in EXPORT_COLUMNS] + [json.dumps(summaries)])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        media_type = 'application/x-ndjson' if format == 'jsonl' else 'text/csv'
+        headers['Content-Disposition'] = f'attachment; filename=papers.{format}'
+        body = jsonl() if format == 'jsonl' else rows()
+        return StreamingResponse(iterate_in_threadpool(body), media_type=media_type, headers=headers)
+
+    def report_response(request, path, download):
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if not_modified(request, etag):
+            return Response(status_code=304, headers={'ETag': etag})
+        disposition = 'attachment' if download else 'inline'
+        return FileResponse(path, media_type='application/pdf', headers={
+            'ETag': etag,
+            'Content-Disposition': f'{disposition}; filename={os.path.basename(path)}'
+        })
+
+    def latest_report_path():
+        reports = glob.glob(os.path.join(results_dir, 'medical_research_report*.pdf'))
+        if not reports:
+            raise HTTPException(status_code=404, detail='No report has been generated yet')
+        return max(reports, key=os.path.getmtime)
+
+    @app.get('/api/latest-report')
+    async def latest_report(request: Request, autoDownload: bool = False):
+        return report_response(request, latest_report_path(), autoDownload)
+
+    @app.get('/api/reports/{run_id}')
+    async def run_report(request: Request, run_id: str, autoDownload: bool = False):
+        path = os.path.join(results_dir, f'medical_research_report_{run_id}.pdf')
+        if not RUN_ID.match(run_id) or not os.path.exists(path):
+            raise HTTPException(status_code=404, detail=f'No report for run {run_id}')
+        return report_response(request, path, autoDownload)
+
+    @app.get('/api/report-info')
+    async def report_info():
+        path = latest_report_path()
+        return {
+            'lastUpdate': datetime.fromtimestamp(os.path.getmtime(path)).isoformat(),
+            'filename': os.path.basename(path)
+        }
+
+    return app
+
+def serve(host=None, port=None):
+    import uvicorn
+    uvicorn.run(create_app(), host=host or DASHBOARD_CONFIG['host'], port=port or DASHBOARD_CONFIG['port'])
+
+if __name__ == "__main__":
+    serve()
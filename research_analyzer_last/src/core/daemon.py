@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime
+import schedule
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from config.config import DAEMON_CONFIG, DASHBOARD_CONFIG, NOTIFICATION_CONFIG
+from src.core.paper_analyzer import ResearchPaperAnalyzer
+from src.core.run_lock import RunLock
+from src.api import service
+from src.scrapers.medical_scrapers import SessionManager
+from src.storage.paper_store import PaperStore
+
+class AnalysisDaemon:
+    """Runs the analysis on a schedule in one long-lived process.
+
+    The analyzer, its models and summary cache, the paper store and one
+    pooled HTTP session stay loaded between runs. A run starts every
+    DASHBOARD_CONFIG['update_interval'] seconds and daily at
+    NOTIFICATION_CONFIG['summary_time']. A run never starts while another is
+    going, in this process or any other holding the run lock; a trigger that
+    arrives mid-run is kept and starts one more run when the current one ends.
+    The API service from src.api.service is served alongside, plus /health.
+    """
+    def __init__(self, analyzer=None, store=None, lock=None):
+        if store is None:
+            store = analyzer.store if analyzer is not None and analyzer.store is not None else PaperStore()
+        self.store = store
+        self.analyzer = analyzer or ResearchPaperAnalyzer(store=store)
+        # Kept open across runs instead of being opened and closed by each one
+        self.analyzer.store = store
+        if self.analyzer.session_manager is None:
+            self.analyzer.session_manager = SessionManager()
+        self.lock = lock or RunLock()
+        self.scheduler = schedule.Scheduler()
+        self.scheduler.every(DASHBOARD_CONFIG['update_interval']).seconds.do(self.trigger)
+        self.scheduler.every().day.at(NOTIFICATION_CONFIG['summary_time']).do(self.trigger)
+        self.started_at = datetime.now()
+        self.current = None
+        self.pending = False
+        self.runs = 0
+        self.last_run = {}
+
+    def trigger(self):
+        """Start a run now, or once the current one finishes"""
+        if self.current is not None and not self.current.done():
+            self.pending = True
+            return False
+        self.pending = False
+        self.current = asyncio.ensure_future(self._run_cycles())
+        return True
+
+    async def _run_cycles(self):
+        while True:
+            await self.run_once()
+            if not self.pending:
+                return
+            self.pending = False
+
+    async def run_once(self):
+        """One harvest, summarize and report cycle, unless another process holds the run lock"""
+        if not self.lock.acquire():
+            print("Skipping scheduled run: another analysis run is in progress")
+            self.last_run = {'status': 'skipped', 'finished_at': datetime.now()}
+            return None
+        started = datetime.now()
+        self.last_run = {'status': 'running', 'started_at': started}
+        try:
+            results = await self.analyzer.run_analysis()
+            self.last_run = {'status': 'ok', 'started_at': started, 'finished_at': datetime.now(),
+                             'papers': len(results or [])}
+            return results
+        except Exception as e:
+            print(f"Error during scheduled run: {str(e)}")
+            self.last_run = {'status': 'failed', 'started_at': started, 'finished_at': datetime.now(),
+                             'error': str(e)[:500]}
+            return None
+        finally:
+            self.runs += 1
+            self.lock.release()
+
+    def health(self):
+        """Liveness and the state of the last run; unhealthy only when the last run failed"""
+        upcoming = self.scheduler.next_run
+        return {
+            'status': 'degraded' if self.last_run.get('status') == 'failed' else 'ok',
+            'started_at': self.started_at,
+            'running': self.current is not None and not self.current.done(),
+            'queued': self.pending,
+            'runs': self.runs,
+            'last_run': self.last_run,
+            'latest_completed_run': self.store.latest_run(),
+            'next_run': upcoming,
+            'models': list(self.analyzer.models)
+        }
+
+    def create_app(self, results_dir='results'):
+        app = service.create_app(self.store, results_dir)
+
+        @app.get('/health')
+        async def health():
+            body = await asyncio.to_thread(self.health)
+            return JSONResponse(jsonable_encoder(body), status_code=503 if body['status'] == 'degraded' else 200)
+        return app
+
+    async def serve(self, host=None, port=None):
+        """Serve the API and run the schedule until the server is stopped (Ctrl+C)"""
+        import uvicorn
+        config = uvicorn.Config(self.create_app(), host=host or DASHBOARD_CONFIG['host'],
+                                port=port or DASHBOARD_CONFIG['port'])
+        server = uvicorn.Server(config)
+        server_task = asyncio.ensure_future(server.serve())
+        print(f"Daemon started: a run every {DASHBOARD_CONFIG['update_interval']} s "
+              f"and daily at {NOTIFICATION_CONFIG['summary_time']}")
+        try:
+            if DAEMON_CONFIG['run_on_start']:
+                self.trigger()
+            while not server_task.done():
+                self.scheduler.run_pending()
+                await asyncio.sleep(DAEMON_CONFIG['poll_seconds'])
+        finally:
+            if self.current is not None and not self.current.done():
+                # The run's journal lets `python main.py --resume <run id>` finish it
+                self.current.cancel()
+                await asyncio.gather(self.current, return_exceptions=True)
+            await self.close()
+
+    async def close(self):
+        await self.analyzer.session_manager.close()
+        self.analyzer.close()
+        self.store.close()
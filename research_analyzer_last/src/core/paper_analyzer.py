@@ -1,21 +1,50 @@
 import os
 import asyncio
-from src.scrapers.medical_scrapers import search_medical_sources
-import pandas as pd
-from datetime import datetime
+from contextlib import asynccontextmanager
+from src.scrapers.medical_scrapers import SessionManager, create_scrapers
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from tqdm import tqdm
-import time
 from src.models.llm_modules import get_available_models
-from config.config import SEARCH_TOPICS
-from src.utils.report_generator import generate_report
+from src.models.summary_cache import SummaryCache, CachedLLM
+from config.config import get_date_range, SEARCH_TOPICS, ANALYSIS_SETTINGS, DATABASE_CONFIG, SUMMARY_CACHE_CONFIG, DEDUP_CONFIG, EMBEDDING_CONFIG
+from src.storage.paper_store import PaperStore, paper_key
+from src.storage.run_journal import RunJournal
+from src.storage.embedding_index import EmbeddingIndex
+from src.models.embeddings import SentenceEncoder
+from src.utils.dedup import DedupIndex
+from src.utils.relevance import RelevanceScorer
+from src.core.pipeline import stage, batches
 
 # Load environment variables
 load_dotenv()
 
+def generate_report(papers, output_file):
+    # fpdf and matplotlib are only imported once a run reaches its report
+    from src.utils.report_generator import generate_report
+    return generate_report(papers, output_file)
+
+CSV_COLUMNS = ['source', 'pmid', 'nct_id', 'doi', 'title', 'abstract', 'authors', 'year', 'url', 'relevance_score']
+
 class ResearchPaperAnalyzer:
-    def __init__(self, model_names=None):
-        self.search_topics = SEARCH_TOPICS['innovations'] + SEARCH_TOPICS['research']
+    def __init__(self, model_names=None, store=None, summary_cache=None):
+        self.store = store
+        # Pass summary_cache=False to call the models directly
+        self.summary_cache = summary_cache
+        # A cache passed in belongs to the caller; one created here is closed by close()
+        self._owns_summary_cache = False
+        if self.summary_cache is None and SUMMARY_CACHE_CONFIG['enabled']:
+            self.summary_cache = SummaryCache()
+            self._owns_summary_cache = True
+        self.search_topics = [topic for topics in SEARCH_TOPICS.values() for topic in topics]
+        # {(source_key, topic): until} for searches that completed; saved once the run's papers are stored
+        self.harvest_marks = {}
+        self.failed_searches = set()
+        # Set by run_analysis; records fetched papers and summaries so the run can be resumed
+        self.journal = None
+        self.resumed_keys = set()
+        # A SessionManager shared by every run (daemon mode); None opens a fresh pool per run
+        self.session_manager = None
+        self._scrapers = None
         
         # Initialize LLM models
         available_models = get_available_models()
@@ -27,53 +56,300 @@ class ResearchPaperAnalyzer:
         for model_name in model_names:
             if model_name in available_models:
                 try:
-                    self.models[model_name] = available_models[model_name]()
+                    model = available_models[model_name]()
+                    if self.summary_cache:
+                        model = CachedLLM(model, self.summary_cache)
+                    self.models[model_name] = model
                 except Exception as e:
                     print(f"Error loading {model_name}: {e}")
         
         if not self.models:
             raise ValueError("No models were successfully loaded")
         
-    async def search_recent_papers(self, days_back=1):
-        """Search for recent papers from medical sources."""
-        papers = []
-        total_papers = 0
+    def close(self):
+        """Write back and close the summary cache this analyzer opened"""
+        if self._owns_summary_cache:
+            self.summary_cache.close()
+
+    @asynccontextmanager
+    async def sessions(self):
+        """The shared SessionManager if one is set, otherwise a new one closed on exit"""
+        if self.session_manager is not None:
+            yield self.session_manager
+        else:
+            async with SessionManager() as session_manager:
+                yield session_manager
+
+    def scrapers_for(self, session_manager):
+        """Scrapers bound to session_manager, built once per shared manager"""
+        if session_manager is not self.session_manager:
+            return create_scrapers(session_manager)
+        if self._scrapers is None:
+            self._scrapers = create_scrapers(session_manager)
+        for scraper in self._scrapers:
+            scraper.reset()
+        return self._scrapers
+
+    def harvest_windows(self, scrapers, days_back=None):
+        """Date range to search per (source_key, topic): from its watermark, or days_back, up to now"""
+        if days_back is None:
+            default_since, until = get_date_range()
+        else:
+            until = datetime.now()
+            default_since = until - timedelta(days=days_back)
         
-        print("\n=== Starting Medical Research Search ===")
-        for topic in self.search_topics:
-            print(f"\nSearching for: {topic}")
-            try:
-                results = await search_medical_sources(topic, limit_per_source=3)
-                
-                for paper in results:
-                    if paper.get('title') and paper.get('abstract'):
-                        papers.append(paper)
-                        total_papers += 1
-                        print(f"    Found [{paper['source']}]: {paper['title'][:100]}...")
-                        
-                time.sleep(1)  # Small delay between topics
-                
-            except Exception as e:
-                print(f"    Error searching {topic}: {str(e)[:100]}...")
-                continue
+        # A watermark held back by truncated searches must not widen the window forever
+        earliest = min(default_since, until - timedelta(days=ANALYSIS_SETTINGS['max_days_to_look_back']))
+        windows = {}
+        for scraper in scrapers:
+            marks = self.store.watermarks(scraper.source_key) if self.store is not None else {}
+            for topic in self.search_topics:
+                windows[(scraper.source_key, topic)] = (max(marks.get(topic, default_since), earliest), until)
+        return windows
+
+    async def search_recent_papers(self, days_back=None):
+        """Search for papers added since the last run (or the last days_back days) from medical sources."""
+        papers = [paper async for paper in self.stream_papers(days_back)]
         
         print(f"\n=== Search Complete ===")
-        print(f"Total papers found: {total_papers}")
+        print(f"Total papers found: {len(papers)}")
         return papers
 
-    def summarize_paper(self, paper):
-        """Use multiple LLMs to generate summaries of the paper."""
-        summaries = {}
+    async def stream_papers(self, days_back=None):
+        """Yield new, de-duplicated papers as each search finishes, then record harvest watermarks"""
+        print("\n=== Starting Medical Research Search ===")
+        # One pooled session for every topic so connections are reused across searches
+        exclude_pmids = set()
+        if self.store is not None and DATABASE_CONFIG['skip_summarized_papers']:
+            # Papers summarized in earlier runs are not fetched again
+            exclude_pmids = self.store.summarized_source_ids('PubMed', self.models)
+        
+        # The same article turns up under several topics and sources; keep the first copy
+        dedup_index = DedupIndex() if DEDUP_CONFIG['enabled'] else None
+        duplicates = 0
+        async with self.sessions() as session_manager:
+            scrapers = self.scrapers_for(session_manager)
+            windows = self.harvest_windows(scrapers, days_back)
+            async for topic, _, source_results in self._stream_searches(
+                    scrapers, exclude_pmids=exclude_pmids, windows=windows):
+                for paper in source_results:
+                    # Relevance is scored against the query that found the paper
+                    paper['search_query'] = topic
+                    if paper.get('title') and paper.get('abstract'):
+                        if dedup_index is not None and not dedup_index.add(paper)[1]:
+                            duplicates += 1
+                            continue
+                        print(f"    Found [{paper['source']}] for '{topic}': {paper['title'][:100]}...")
+                        yield paper
         
-        text = f"""
+        # Searches that failed or hit their limit left records behind in their window; search it again next run
+        incomplete = self.failed_searches | {
+            (scraper.source_key, topic)
+            for scraper in scrapers
+            for topic in scraper.failed_queries | scraper.truncated_queries
+        }
+        self.harvest_marks = {key: until for key, (_, until) in windows.items() if key not in incomplete}
+        if duplicates:
+            print(f"Duplicates removed: {duplicates}")
+
+    async def _stream_searches(self, scrapers, limit_per_source=3, exclude_pmids=(), windows=None):
+        """Run every (topic, source) search at once, yielding (topic, scraper, papers) as each finishes.
+
+        Searches are bounded by ANALYSIS_SETTINGS['max_concurrent_searches'] and
+        per-source request rates by each scraper's rate limiter. Scrapers with a
+        search_batch method (PubMed) get all topics in one job so IDs shared
+        between topics are fetched only once. windows maps (source_key, topic)
+        to the (since, until) range to search. Searches that raised are recorded
+        in self.failed_searches.
+        """
+        semaphore = asyncio.Semaphore(ANALYSIS_SETTINGS['max_concurrent_searches'])
+        self.failed_searches = set()
+
+        async def search_one(topic, scraper):
+            window = windows.get((scraper.source_key, topic)) if windows else None
+            kwargs = {'since': window[0], 'until': window[1]} if window else {}
+            async with semaphore:
+                try:
+                    return [(topic, scraper, await scraper.search(topic, limit_per_source, **kwargs))]
+                except Exception as e:
+                    print(f"    Error searching {topic} on {scraper.source_key}: {str(e)[:100]}...")
+                    self.failed_searches.add((scraper.source_key, topic))
+                    return []
+
+        async def search_batch(scraper):
+            kwargs = {}
+            if windows:
+                kwargs['windows'] = {topic: windows[(scraper.source_key, topic)] for topic in self.search_topics}
+            async with semaphore:
+                try:
+                    batch = await scraper.search_batch(self.search_topics, limit_per_source, exclude_pmids, **kwargs)
+                except Exception as e:
+                    print(f"    Error searching {scraper.source_key}: {str(e)[:100]}...")
+                    self.failed_searches.update((scraper.source_key, topic) for topic in self.search_topics)
+                    return []
+            return [(topic, scraper, papers) for topic, papers in batch.items()]
+
+        print(f"Searching {len(self.search_topics)} topics across {len(scrapers)} sources...")
+        jobs = []
+        for scraper in scrapers:
+            if hasattr(scraper, 'search_batch'):
+                jobs.append(search_batch(scraper))
+            else:
+                jobs.extend(search_one(topic, scraper) for topic in self.search_topics)
+
+        for job in asyncio.as_completed(jobs):
+            for result in await job:
+                yield result
+
+    @staticmethod
+    def paper_text(paper):
+        """Text sent to every model for a paper"""
+        return f"""
         Title: {paper['title']}
         Abstract: {paper['abstract']}
         Source: {paper.get('source', 'Unknown')}
         Authors: {paper.get('authors', 'Unknown')}
         """
+
+    def summary_limits(self):
+        """Global and per-model semaphores bounding (paper, model) summaries in flight"""
+        global_limit = asyncio.Semaphore(ANALYSIS_SETTINGS['max_concurrent_summaries'])
+        model_limits = {
+            name: asyncio.Semaphore(ANALYSIS_SETTINGS['model_concurrency'].get(
+                name, ANALYSIS_SETTINGS['max_concurrent_per_model']))
+            for name in self.models
+        }
+        return global_limit, model_limits
+
+    async def summarize_papers(self, papers, session=None, limits=None):
+        """Summarize papers with every model concurrently, writing results back in order.
+
+        Each (paper, model) pair is one job. A job holds a slot from its model's
+        semaphore (ANALYSIS_SETTINGS['max_concurrent_per_model'], overridable per
+        model) and one from the global in-flight limit. Models that support
+        batching (local transformers) instead get one summarize_batch() job with
+        every paper they still need. Only models without a summary yet are
+        called, and each paper is stored as soon as it completes.
+
+        Concurrent callers can share one session and one set of summary_limits()
+        so the limits hold across all of them.
+        """
+        global_limit, model_limits = limits or self.summary_limits()
+        texts = [self.paper_text(paper) for paper in papers]
+        completed = 0
+
+        async def summarize_one(session, name, text):
+            async with model_limits[name]:
+                async with global_limit:
+                    try:
+                        return await self.models[name].asummarize(text, session=session)
+                    except Exception as e:
+                        print(f"    Error with {name}: {str(e)[:100]}")
+                        return f"Error: {str(e)}"
+
+        async def summarize_batch(name, indices):
+            async with global_limit:
+                try:
+                    summaries = await asyncio.to_thread(
+                        self.models[name].summarize_batch, [texts[i] for i in indices]
+                    )
+                except Exception as e:
+                    print(f"    Error with {name}: {str(e)[:100]}")
+                    summaries = [f"Error: {str(e)}"] * len(indices)
+            return dict(zip(indices, summaries))
+
+        batch_jobs = {}
+        for name, model in self.models.items():
+            if model.supports_batching:
+                indices = [i for i, paper in enumerate(papers) if f'summary_{name}' not in paper]
+                if indices:
+                    batch_jobs[name] = asyncio.ensure_future(summarize_batch(name, indices))
+
+        async def summarize_with(session, i, paper, name):
+            if name in batch_jobs:
+                summary = (await batch_jobs[name])[i]
+            else:
+                summary = await summarize_one(session, name, texts[i])
+            paper[f'summary_{name}'] = summary
+            if self.journal is not None:
+                self.journal.record_summary(paper, name, summary)
+
+        async def summarize_paper_async(session, i, paper):
+            nonlocal completed
+            missing = [name for name in self.models if f'summary_{name}' not in paper]
+            if missing:
+                await asyncio.gather(*(summarize_with(session, i, paper, name) for name in missing))
+                if self.store is not None:
+                    self.store.upsert_summaries([paper])
+            completed += 1
+            print(f"  [{completed}/{len(papers)}] Summarized: {paper['title'][:80]}...")
+            return paper
+
+        if session is not None:
+            return await asyncio.gather(*(
+                summarize_paper_async(session, i, paper) for i, paper in enumerate(papers)
+            ))
+        async with self.sessions() as session_manager:
+            session = await session_manager.get_session()
+            return await asyncio.gather(*(
+                summarize_paper_async(session, i, paper) for i, paper in enumerate(papers)
+            ))
+
+    async def stream_summaries(self, papers):
+        """Summarize papers from an async iterable as they arrive, yielding each once it is done.
+
+        Papers missing ANALYSIS_SETTINGS['required_fields'] or scoring below
+        min_relevance_score against their search query are dropped first. The
+        rest are stored (and matched against stored summaries) in batches of
+        whatever has arrived, up to ANALYSIS_SETTINGS['summarize_batch_size'];
+        pipeline_summarize_workers batches are summarized at once over one
+        session and one set of summary_limits(). Every queue between stages holds
+        at most pipeline_queue_size items, so searching pauses when
+        summarization falls behind.
+        """
+        queue_size = ANALYSIS_SETTINGS['pipeline_queue_size']
+        batch_size = ANALYSIS_SETTINGS['summarize_batch_size']
+        limits = self.summary_limits()
+        scorer = RelevanceScorer(self.search_topics)
+
+        async def pending_batches():
+            async for batch in batches(papers, batch_size, queue_size):
+                if self.journal is not None:
+                    for paper in batch:
+                        if paper_key(paper) not in self.resumed_keys:
+                            self.journal.record_paper(paper)
+                # LLM calls are the expensive step; only relevant, complete records get that far
+                relevant = scorer.filter(batch)
+                if len(relevant) < len(batch):
+                    print(f"  Dropped {len(batch) - len(relevant)} papers below relevance "
+                          f"{scorer.min_score} or missing {', '.join(scorer.required_fields)}")
+                batch = relevant
+                if self.store is not None:
+                    self.store.upsert_papers(batch)
+                    batch = self._apply_stored_summaries(batch)
+                if batch:
+                    yield batch
+
+        async with self.sessions() as session_manager:
+            session = await session_manager.get_session()
+
+            async def summarize(batch):
+                return await self.summarize_papers(batch, session, limits)
+
+            async for done in stage(pending_batches(), summarize,
+                                    ANALYSIS_SETTINGS['pipeline_summarize_workers'], queue_size):
+                for paper in done:
+                    yield paper
+
+    def summarize_paper(self, paper, model_names=None):
+        """Use multiple LLMs to generate summaries of the paper."""
+        summaries = {}
+        models = {name: self.models[name] for name in (model_names or self.models)}
+        
+        text = self.paper_text(paper)
         
         print(f"\nGenerating summaries for: {paper['title'][:100]}...")
-        for model_name, model in self.models.items():
+        for model_name, model in models.items():
             try:
                 print(f"  Using {model_name} model...")
                 summary = model.summarize(text)
@@ -85,46 +361,130 @@ class ResearchPaperAnalyzer:
         
         return summaries
 
-    async def run_analysis(self):
-        """Run the complete analysis pipeline."""
+    async def run_analysis(self, resume=None):
+        """Run the complete analysis pipeline, or finish the interrupted run with ID resume."""
         print("\n=== Starting Research Paper Analysis ===")
         
-        # Search for papers
-        print("\nStep 1: Searching for recent papers...")
-        papers = await self.search_recent_papers()
+        self.journal = RunJournal.resume(resume) if resume else RunJournal()
+        print(f"Run ID: {self.journal.run_id} (resume with: python main.py --resume {self.journal.run_id})")
+        owns_store = self.store is None
+        if owns_store:
+            self.store = PaperStore()
+        try:
+            return await self._run_analysis()
+        finally:
+            self.store.backup()
+            self.journal.close()
+            self.journal = None
+            if owns_store:
+                self.store.close()
+                self.store = None
+
+    async def _run_papers(self):
+        """Papers for this run: the journal's papers first when resuming, then any searches still to do"""
+        papers, marks = self.journal.replay()
+        self.resumed_keys = {paper_key(paper) for paper in papers}
+        if papers:
+            done = sum(f'summary_{name}' in paper for paper in papers for name in self.models)
+            print(f"Resuming run {self.journal.run_id}: {len(papers)} papers, {done} summaries already done")
+        for paper in papers:
+            yield paper
         
-        if not papers:
-            print("No papers found. Analysis complete.")
-            return []
+        if marks is not None:
+            self.harvest_marks = marks
+            return
+        async for paper in self.stream_papers():
+            if paper_key(paper) not in self.resumed_keys:
+                yield paper
+        self.journal.record_search_complete(self.harvest_marks)
+
+    def _apply_stored_summaries(self, papers):
+        """Attach summaries saved by earlier runs, dropping fully summarized papers if configured"""
+        stored = self.store.stored_summaries(paper_key(paper) for paper in papers)
+        pending = []
+        for paper in papers:
+            summaries = stored.get(paper_key(paper), {})
+            complete = all(f'summary_{name}' in summaries for name in self.models)
+            # Papers from a resumed run's journal belong in its report even if already stored
+            if complete and DATABASE_CONFIG['skip_summarized_papers'] and paper_key(paper) not in self.resumed_keys:
+                continue
+            paper.update(summaries)
+            pending.append(paper)
+        
+        skipped = len(papers) - len(pending)
+        if skipped:
+            print(f"Skipping {skipped} papers already summarized in earlier runs")
+        return pending
+
+    def index_embeddings(self, papers):
+        """Add papers not yet in the embedding index, for similarity search across runs"""
+        try:
+            encoder = SentenceEncoder()
+            index = EmbeddingIndex(dimension=encoder.dimension)
+        except Exception as e:
+            print(f"Error loading embedding model: {str(e)[:100]}")
+            return 0
+        try:
+            new = [paper for paper in papers if paper_key(paper) not in index]
+            if not new:
+                return 0
+            vectors = encoder.encode([f"{paper['title']}. {paper['abstract']}" for paper in new])
+            added = index.add([paper_key(paper) for paper in new], vectors)
+            print(f"Embedded {added} papers ({len(index)} in the similarity index)")
+            return added
+        finally:
+            index.close()
+
+    def csv_columns(self):
+        """Columns of the raw data export, fixed up front so rows can be appended as they arrive"""
+        return CSV_COLUMNS + [f'summary_{name}' for name in self.models]
+
+    async def _run_analysis(self):
+        from src.storage.paper_export import create_exporter
+        # Search and summarization overlap: papers are summarized while later topics are still searched
+        print("\nStep 1: Searching for recent papers and generating summaries...")
         
         # Create results directory if it doesn't exist
         if not os.path.exists('results'):
             os.makedirs('results')
         
-        # Process and summarize papers
-        print("\nStep 2: Generating summaries...")
+        timestamp = self.journal.run_id
+        # Replaces any output of the interrupted run being resumed; every journaled paper is written again
+        exporter = create_exporter(timestamp, self.csv_columns())
         results = []
-        for i, paper in enumerate(papers, 1):
-            print(f"\nProcessing paper {i}/{len(papers)}")
-            summaries = self.summarize_paper(paper)
-            paper.update(summaries)
-            results.append(paper)
+        
+        # Save raw data as summaries complete; the PDF needs every paper so it is written last
+        try:
+            async for paper in self.stream_summaries(self._run_papers()):
+                exporter.write(paper)
+                results.append(paper)
+        finally:
+            exporter.close()
+        # Only now is everything fetched so far stored, so the next run may start from here
+        self.store.set_watermarks(self.harvest_marks)
+        self.store.record_run(timestamp, len(results))
+        self.journal.record_run_complete()
+        if results and EMBEDDING_CONFIG['enabled']:
+            await asyncio.to_thread(self.index_embeddings, results)
+        
+        if not results:
+            print("No papers found. Analysis complete.")
+            return []
         
         # Generate PDF report
-        print("\nStep 3: Generating PDF report...")
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        print("\nStep 2: Generating PDF report...")
         report_file = f'results/medical_research_report_{timestamp}.pdf'
-        generate_report(results, report_file)
-        
-        # Save raw data
-        df = pd.DataFrame(results)
-        csv_file = f'results/medical_research_data_{timestamp}.csv'
-        df.to_csv(csv_file, index=False)
+        # Off the event loop, so a server sharing it (daemon mode) keeps answering
+        await asyncio.to_thread(generate_report, results, report_file)
         
         print(f"\n=== Analysis Complete ===")
         print(f"PDF Report saved to: {report_file}")
-        print(f"Raw data saved to: {csv_file}")
+        print(f"Raw data saved to: {exporter.path}")
         print(f"Total papers analyzed: {len(results)}")
+        if self.summary_cache:
+            stats = self.summary_cache.stats
+            print(f"Summary cache: {stats['memory_hits'] + stats['disk_hits']} hits, "
+                  f"{stats['misses']} misses ({self.summary_cache.hit_rate():.0%} hit rate)")
         
         return results
 
@@ -0,0 +1,96 @@
+import asyncio
+
+# Marks the end of a stage's input in its queue
+_DONE = object()
+
+async def _feed(source, queue, consumers):
+    cancelled = False
+    try:
+        async for item in source:
+            await queue.put(item)
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    finally:
+        # A cancelled stage has no readers left, so putting to a full queue would never return
+        if not cancelled:
+            for _ in range(consumers):
+                await queue.put(_DONE)
+
+async def _cancel(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+def _raise_failures(tasks):
+    for task in tasks:
+        if task.done() and not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+
+async def stage(source, worker, concurrency=1, maxsize=1):
+    """Apply an async worker to every item of an async iterable, yielding results as they finish.
+
+    Up to concurrency items are processed at once. Input and output queues hold
+    at most maxsize items, so a slow consumer stalls the workers and slow workers
+    stall the source: nothing upstream runs more than a queue ahead. Results
+    come out in completion order.
+    """
+    inbox = asyncio.Queue(maxsize)
+    outbox = asyncio.Queue(maxsize)
+
+    async def work():
+        cancelled = False
+        try:
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    break
+                await outbox.put(await worker(item))
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                await outbox.put(_DONE)
+
+    tasks = [asyncio.ensure_future(_feed(source, inbox, concurrency))]
+    tasks.extend(asyncio.ensure_future(work()) for _ in range(concurrency))
+    try:
+        finished = 0
+        while finished < concurrency:
+            result = await outbox.get()
+            if result is _DONE:
+                finished += 1
+                _raise_failures(tasks)
+                continue
+            yield result
+        _raise_failures(tasks)
+    finally:
+        await _cancel(tasks)
+
+async def batches(source, size, maxsize=1):
+    """Group an async iterable into lists of up to size items.
+
+    A batch is whatever has arrived by the time the previous one was taken,
+    so downstream work starts on the first item instead of waiting for a full
+    batch. At most maxsize items wait in the buffer.
+    """
+    queue = asyncio.Queue(maxsize)
+    feeder = asyncio.ensure_future(_feed(source, queue, 1))
+    try:
+        done = False
+        while not done:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            batch = [item]
+            while len(batch) < size and not queue.empty():
+                item = queue.get_nowait()
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+            yield batch
+        _raise_failures([feeder])
+    finally:
+        await _cancel([feeder])
@@ -0,0 +1,62 @@
+import threading
+import numpy as np
+from config.config import EMBEDDING_CONFIG, LOCAL_MODEL_CONFIG
+
+class SentenceEncoder:
+    """Encodes texts into unit-length float32 vectors with a local transformer on CPU.
+
+    Uses a sentence-transformers checkpoint through plain transformers: token
+    embeddings are mean-pooled over the attention mask and L2-normalized, so
+    a dot product between two vectors is their cosine similarity. Inputs are
+    length-sorted and padded per batch as in LocalTransformersLLM, and weights
+    load once per process on first use.
+    """
+    _loaded = {}
+    _load_lock = threading.Lock()
+
+    def __init__(self, model_name=None, batch_size=None, max_input_tokens=None):
+        self.model = model_name or EMBEDDING_CONFIG['model']
+        self.batch_size = batch_size or EMBEDDING_CONFIG['batch_size']
+        self.max_input_tokens = max_input_tokens or EMBEDDING_CONFIG['max_input_tokens']
+
+    def _load(self):
+        with self._load_lock:
+            if self.model not in self._loaded:
+                import torch
+                from transformers import AutoTokenizer, AutoModel
+
+                if LOCAL_MODEL_CONFIG['num_threads']:
+                    torch.set_num_threads(LOCAL_MODEL_CONFIG['num_threads'])
+                tokenizer = AutoTokenizer.from_pretrained(self.model)
+                model = AutoModel.from_pretrained(self.model)
+                model.eval()
+                self._loaded[self.model] = (tokenizer, model)
+            return self._loaded[self.model]
+
+    @property
+    def dimension(self):
+        return self._load()[1].config.hidden_size
+
+    def encode(self, texts):
+        """Return an (len(texts), dimension) float32 array of normalized embeddings"""
+        import torch
+        tokenizer, model = self._load()
+
+        vectors = np.zeros((len(texts), model.config.hidden_size), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            inputs = tokenizer(
+                [texts[i] for i in indices],
+                padding='longest',
+                truncation=True,
+                max_length=self.max_input_tokens,
+                return_tensors='pt'
+            )
+            with torch.inference_mode():
+                hidden = model(**inputs).last_hidden_state
+            mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            pooled = torch.nn.functional.normalize(pooled, dim=1)
+            vectors[indices] = pooled.numpy()
+        return vectors
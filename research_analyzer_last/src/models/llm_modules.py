@@ -1,17 +1,90 @@
 from abc import ABC, abstractmethod
-import requests
+import asyncio
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import time
+from config.config import RATE_LIMIT_CONFIG, SUMMARIZATION_CONFIG, LOCAL_MODEL_CONFIG
+from src.utils.rate_limiter import get_rate_limiter, RETRY_STATUSES
 
 load_dotenv()
 
+# Every failed summary is returned as this prefix followed by the reason
+ERROR_PREFIX = 'Error: '
+
+def is_error_summary(summary):
+    """True for a missing summary or one of the "Error: ..." failures the models return"""
+    return not summary or str(summary).startswith(ERROR_PREFIX)
+
 class BaseLLM(ABC):
+    # True when summarize_batch() is cheaper than one summarize() per text
+    supports_batching = False
+
     @abstractmethod
     def summarize(self, text):
         pass
 
+    def summarize_batch(self, texts):
+        """Summarize several texts, returning summaries in the same order"""
+        return [self.summarize(text) for text in texts]
+
+    async def asummarize(self, text, session=None):
+        """Async summarize; models without a native client run summarize() in a worker thread"""
+        return await asyncio.to_thread(self.summarize, text)
+
+    def cache_identity(self):
+        """Model ID and generation parameters that together determine the output"""
+        return getattr(self, 'model', type(self).__name__), getattr(self, 'parameters', {})
+
+class RequestBatcher:
+    """Coalesces concurrent async calls to one Inference API model into batched requests.
+
+    Calls wait up to max_wait seconds (or until max_batch_size are pending)
+    and are then sent as a single payload with a list of inputs. Each caller's
+    future gets its own result. If the batched request fails as a whole, its
+    inputs are retried one by one, so a single bad input only fails itself.
+    """
+    def __init__(self, llm, max_batch_size, max_wait):
+        self.llm = llm
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, session, text):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush(session)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush, session)
+        return await future
+
+    def _flush(self, session):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._send(session, batch))
+
+    async def _send(self, session, batch):
+        texts = [text for text, _ in batch]
+        try:
+            if len(texts) == 1:
+                results = [await self.llm._asummarize_single(session, texts[0])]
+            else:
+                results = await self.llm._asummarize_many(session, texts)
+        except Exception as e:
+            print(f"Batched request to {self.llm.model} failed ({str(e)[:100]}), retrying inputs singly")
+            results = await asyncio.gather(*(self.llm._asummarize_single(session, text) for text in texts))
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
 class HuggingFaceInferenceLLM(BaseLLM):
     AVAILABLE_MODELS = {
         # General purpose models
@@ -33,6 +106,27 @@ class HuggingFaceInferenceLLM(BaseLLM):
         "ara_t5": "araT5/araT5-base-title-generation"  # Arabic generation
     }
 
+    # Models that accept long inputs get the whole text (up to this many chars) in one request
+    LONG_INPUT_MODELS = {
+        "led_base": 60000,  # 16384 tokens
+        "bigbird_pegasus": 15000  # 4096 tokens
+    }
+    DEFAULT_MAX_INPUT_CHARS = 2048
+
+    GENERATION_PARAMETERS = {
+        "max_length": 250,
+        "min_length": 100,
+        "do_sample": False,
+        "early_stopping": True,
+        "num_beams": 4,
+        "temperature": 0.7,
+        "top_k": 50,
+        "top_p": 0.95,
+        "repetition_penalty": 1.2,
+        "length_penalty": 2.0,
+        "no_repeat_ngram_size": 3
+    }
+
     def __init__(self, model_key="flan_t5"):
         self.api_key = os.getenv('HF_API_KEY', '')
         self.model = self.AVAILABLE_MODELS.get(model_key, self.AVAILABLE_MODELS["flan_t5"])
@@ -40,6 +134,19 @@ class HuggingFaceInferenceLLM(BaseLLM):
         self.headers = {
             "Authorization": f"Bearer {self.api_key}"
         }
+        self.rate_limiter = get_rate_limiter(self.api_url)
+        self.parameters = dict(self.GENERATION_PARAMETERS)
+        self.max_input_chars = self.LONG_INPUT_MODELS.get(model_key, self.DEFAULT_MAX_INPUT_CHARS)
+        self.request_batcher = None
+        if SUMMARIZATION_CONFIG['batch_requests']:
+            self.request_batcher = RequestBatcher(
+                self, SUMMARIZATION_CONFIG['max_request_batch'], SUMMARIZATION_CONFIG['batch_window']
+            )
+
+    def cache_identity(self):
+        # Chunking settings change the output of long texts, so they are part of the identity
+        long_text = {key: SUMMARIZATION_CONFIG[key] for key in ('chunk_size', 'chunk_overlap', 'max_reduce_depth')}
+        return self.model, dict(self.parameters, max_input_chars=self.max_input_chars, **long_text)
 
     def preprocess_text(self, text):
         """Preprocess text before summarization"""
@@ -47,8 +154,13 @@ class HuggingFaceInferenceLLM(BaseLLM):
         # Basic cleaning while preserving important academic content
         return text
 
-    def chunk_text(self, text, chunk_size=1500):
-        """Split text into smaller chunks for processing"""
+    def chunk_text(self, text, chunk_size=1500, overlap=0):
+        """Split text into smaller chunks for processing.
+
+        With overlap > 0, each chunk starts with up to that many characters of
+        trailing words from the previous chunk, so sentences cut at a boundary
+        are seen whole by at least one chunk.
+        """
         words = text.split()
         chunks = []
         current_chunk = []
@@ -56,10 +168,17 @@ class HuggingFaceInferenceLLM(BaseLLM):
 
         for word in words:
             current_size += len(word) + 1
-            if current_size > chunk_size:
+            if current_size > chunk_size and current_chunk:
                 chunks.append(' '.join(current_chunk))
-                current_chunk = [word]
-                current_size = len(word) + 1
+                carried = []
+                carried_size = 0
+                for previous in reversed(current_chunk):
+                    if carried_size + len(previous) + 1 > overlap:
+                        break
+                    carried.insert(0, previous)
+                    carried_size += len(previous) + 1
+                current_chunk = carried + [word]
+                current_size = carried_size + len(word) + 1
             else:
                 current_chunk.append(word)
 
@@ -67,62 +186,93 @@ class HuggingFaceInferenceLLM(BaseLLM):
             chunks.append(' '.join(current_chunk))
         return chunks
 
+    def _split_for_map(self, text):
+        return self.chunk_text(text, SUMMARIZATION_CONFIG['chunk_size'], SUMMARIZATION_CONFIG['chunk_overlap'])
+
+    @staticmethod
+    def _reduce(text, partials, depth):
+        """Combine partial summaries; returns (combined, needs_another_level) or an error"""
+        errors = [partial for partial in partials if str(partial).startswith(ERROR_PREFIX)]
+        if errors:
+            return errors[0], False
+        combined = " ".join(partials)
+        # Stop when the tree is deep enough or the partials no longer shrink the text
+        shrinking = len(combined) < len(text)
+        return combined, shrinking and depth + 1 < SUMMARIZATION_CONFIG['max_reduce_depth']
+
     def summarize(self, text):
+        """Summarize text, map-reducing inputs longer than the model accepts.
+
+        Chunks of one level are summarized concurrently; if the joined partial
+        summaries are still too long they become the next level's input.
+        """
         if not self.api_key:
             return "Error: HF_API_KEY not set in environment variables"
 
         # Preprocess text
         processed_text = self.preprocess_text(text)
 
-        # Handle long texts through chunking
-        if len(processed_text) > 2048:
-            chunks = self.chunk_text(processed_text)
-            summaries = []
-            for chunk in chunks:
-                summary = self._summarize_chunk(chunk)
-                summaries.append(summary)
-            return " ".join(summaries)
-        else:
-            return self._summarize_chunk(processed_text)
+        depth = 0
+        with ThreadPoolExecutor(max_workers=SUMMARIZATION_CONFIG['max_chunk_workers']) as pool:
+            while len(processed_text) > self.max_input_chars:
+                partials = list(pool.map(self._summarize_chunk, self._split_for_map(processed_text)))
+                combined, again = self._reduce(processed_text, partials, depth)
+                if not again or len(combined) <= self.max_input_chars:
+                    return combined
+                processed_text = combined
+                depth += 1
+        return self._summarize_chunk(processed_text)
 
-    def _summarize_chunk(self, text):
-        """Internal method to summarize a single chunk of text"""
-        max_chars = 2048
+    async def asummarize(self, text, session=None):
+        """Async counterpart of summarize() over a shared aiohttp session"""
+        if not self.api_key:
+            return "Error: HF_API_KEY not set in environment variables"
+
+        if session is None:
+            import aiohttp
+            async with aiohttp.ClientSession() as own_session:
+                return await self.asummarize(text, own_session)
+
+        processed_text = self.preprocess_text(text)
+
+        depth = 0
+        while len(processed_text) > self.max_input_chars:
+            partials = await asyncio.gather(*(
+                self._asummarize_chunk(session, chunk) for chunk in self._split_for_map(processed_text)
+            ))
+            combined, again = self._reduce(processed_text, partials, depth)
+            if not again or len(combined) <= self.max_input_chars:
+                return combined
+            processed_text = combined
+            depth += 1
+        return await self._asummarize_chunk(session, processed_text)
+
+    def _build_payload(self, text):
+        max_chars = self.max_input_chars
         truncated_text = text[:max_chars] + ("..." if len(text) > max_chars else "")
 
-        payload = {
+        return {
             "inputs": truncated_text,
-            "parameters": {
-                "max_length": 250,
-                "min_length": 100,
-                "do_sample": False,
-                "early_stopping": True,
-                "num_beams": 4,
-                "temperature": 0.7,
-                "top_k": 50,
-                "top_p": 0.95,
-                "repetition_penalty": 1.2,
-                "length_penalty": 2.0,
-                "no_repeat_ngram_size": 3
-            }
+            "parameters": self.parameters
         }
 
-        try:
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
+    @staticmethod
+    def _parse_result(result):
+        if isinstance(result, list):
+            return result[0].get('summary_text', result[0].get('generated_text', ''))
+        elif isinstance(result, dict):
+            return result.get('summary_text', result.get('generated_text', ''))
+        else:
+            return str(result)
 
-            if response.status_code == 503:
-                time.sleep(20)
-                response = requests.post(self.api_url, headers=self.headers, json=payload)
+    def _summarize_chunk(self, text):
+        """Internal method to summarize a single chunk of text"""
+        payload = self._build_payload(text)
 
+        try:
+            response = self._post(payload)
             response.raise_for_status()
-            result = response.json()
-
-            if isinstance(result, list):
-                return result[0].get('summary_text', result[0].get('generated_text', ''))
-            elif isinstance(result, dict):
-                return result.get('summary_text', result.get('generated_text', ''))
-            else:
-                return str(result)
+            return self._parse_result(response.json())
 
         except Exception as e:
             error_msg = f"Error: {str(e)}"
@@ -130,9 +280,173 @@ class HuggingFaceInferenceLLM(BaseLLM):
                 error_msg += f" | Response: {e.response.text[:200]}"
             return error_msg
 
+    async def _asummarize_chunk(self, session, text):
+        """Async version of _summarize_chunk, coalesced with concurrent calls when batching is on"""
+        if self.request_batcher is not None:
+            return await self.request_batcher.submit(session, text)
+        return await self._asummarize_single(session, text)
+
+    async def _asummarize_single(self, session, text):
+        payload = self._build_payload(text)
+
+        try:
+            status, body = await self._apost(session, payload)
+            if status >= 400:
+                return f"Error: HTTP {status} | Response: {body[:200]}"
+            return self._parse_result(json.loads(body))
+
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    async def _asummarize_many(self, session, texts):
+        """Summarize several texts in one request using the API's list form of "inputs".
+
+        Returns one summary (or "Error: ..." string) per text. Raises if the
+        request as a whole fails, so the caller can retry the inputs one by one.
+        """
+        payload = {
+            "inputs": [self._build_payload(text)["inputs"] for text in texts],
+            "parameters": self.parameters
+        }
+        status, body = await self._apost(session, payload)
+        if status >= 400:
+            raise ValueError(f"HTTP {status} | Response: {body[:200]}")
+        results = json.loads(body)
+        if not isinstance(results, list) or len(results) != len(texts):
+            raise ValueError(f"Expected {len(texts)} results, got {str(results)[:200]}")
+
+        summaries = []
+        for result in results:
+            if isinstance(result, dict) and 'error' in result:
+                summaries.append(f"Error: {result['error']}")
+            else:
+                summaries.append(self._parse_result(result))
+        return summaries
+
+    def _post(self, payload):
+        """POST through the inference host's token bucket, retrying 429/503 with backoff"""
+        import requests
+        max_retries = RATE_LIMIT_CONFIG['max_retries']
+        for attempt in range(max_retries + 1):
+            self.rate_limiter.acquire_sync()
+            response = requests.post(self.api_url, headers=self.headers, json=payload)
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+            self.rate_limiter.backoff(attempt, self._retry_after(response.headers, response.text))
+        return response
+
+    async def _apost(self, session, payload):
+        """Async _post; returns the final status code and response body"""
+        max_retries = RATE_LIMIT_CONFIG['max_retries']
+        for attempt in range(max_retries + 1):
+            await self.rate_limiter.acquire()
+            async with session.post(self.api_url, headers=self.headers, json=payload) as response:
+                body = await response.text()
+                if response.status not in RETRY_STATUSES or attempt == max_retries:
+                    return response.status, body
+                retry_after = self._retry_after(response.headers, body)
+            self.rate_limiter.backoff(attempt, retry_after)
+
+    @staticmethod
+    def _retry_after(headers, body):
+        """Use Retry-After, or the model-loading estimate HF returns with a 503"""
+        if headers.get('Retry-After'):
+            return headers['Retry-After']
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return None
+        return data.get('estimated_time') if isinstance(data, dict) else None
+
+class LocalTransformersLLM(BaseLLM):
+    """Runs a seq2seq summarization model in-process on CPU with transformers.
+
+    Weights are loaded once per process and shared by every instance of the
+    same model. summarize_batch() sorts inputs by length and pads each batch
+    only to its longest member, so many abstracts go through one generate()
+    call with little wasted compute. torch and transformers are imported on
+    first use, so this module stays importable without them.
+    """
+    supports_batching = True
+
+    # Sampling settings are dropped: generation here is deterministic beam search
+    GENERATION_KEYS = ("max_length", "min_length", "num_beams", "early_stopping",
+                       "repetition_penalty", "length_penalty", "no_repeat_ngram_size")
+
+    _loaded = {}
+    _load_lock = threading.Lock()
+
+    def __init__(self, model_key="bart_cnn", batch_size=None, num_threads=None, quantize=None,
+                 max_input_tokens=None):
+        self.model = HuggingFaceInferenceLLM.AVAILABLE_MODELS.get(model_key, model_key)
+        self.batch_size = batch_size or LOCAL_MODEL_CONFIG['batch_size']
+        self.num_threads = num_threads or LOCAL_MODEL_CONFIG['num_threads']
+        self.quantize = LOCAL_MODEL_CONFIG['quantize'] if quantize is None else quantize
+        self.max_input_tokens = max_input_tokens or LOCAL_MODEL_CONFIG['max_input_tokens']
+        self.parameters = {
+            key: value for key, value in HuggingFaceInferenceLLM.GENERATION_PARAMETERS.items()
+            if key in self.GENERATION_KEYS
+        }
+
+    def cache_identity(self):
+        # int8 weights can change the output, so quantized summaries are cached separately
+        return f"local:{self.model}", dict(self.parameters, quantize=self.quantize,
+                                           max_input_tokens=self.max_input_tokens)
+
+    def _load(self):
+        """Return (tokenizer, model), loading and optionally quantizing them on first use"""
+        key = (self.model, self.quantize)
+        with self._load_lock:
+            if key not in self._loaded:
+                import torch
+                from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+                if self.num_threads:
+                    torch.set_num_threads(self.num_threads)
+                tokenizer = AutoTokenizer.from_pretrained(self.model)
+                model = AutoModelForSeq2SeqLM.from_pretrained(self.model)
+                model.eval()
+                if self.quantize:
+                    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                self._loaded[key] = (tokenizer, model)
+            return self._loaded[key]
+
+    def summarize(self, text):
+        return self.summarize_batch([text])[0]
+
+    def summarize_batch(self, texts):
+        try:
+            import torch
+            tokenizer, model = self._load()
+        except Exception as e:
+            return [f"Error: could not load {self.model}: {str(e)}"] * len(texts)
+
+        summaries = [None] * len(texts)
+        # Similar lengths share a batch so padding to the longest member stays cheap
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            try:
+                inputs = tokenizer(
+                    [texts[i] for i in indices],
+                    padding='longest',
+                    truncation=True,
+                    max_length=self.max_input_tokens,
+                    return_tensors='pt'
+                )
+                with torch.inference_mode():
+                    output_ids = model.generate(**inputs, **self.parameters)
+                decoded = tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+                for i, summary in zip(indices, decoded):
+                    summaries[i] = summary.strip()
+            except Exception as e:
+                for i in indices:
+                    summaries[i] = f"Error: {str(e)}"
+        return summaries
+
 def get_available_models():
     """Get all available free models"""
-    return {  
+    models = {  
         # General purpose models - Working  
         'huggingface_flan_t5': lambda: HuggingFaceInferenceLLM("flan_t5"),  
         'huggingface_pegasus_xsum': lambda: HuggingFaceInferenceLLM("pegasus_xsum"),  
@@ -150,4 +464,10 @@ def get_available_models():
         # 'huggingface_arabert': lambda: HuggingFaceInferenceLLM("arabert"),  
         # 'huggingface_camelbert': lambda: HuggingFaceInferenceLLM("camelbert"),  
         # 'huggingface_ara_t5': lambda: HuggingFaceInferenceLLM("ara_t5")  
-    }
\ No newline at end of file
+    }
+
+    # In-process models; off by default because they need torch and the model weights locally
+    if LOCAL_MODEL_CONFIG['enabled']:
+        for model_key in LOCAL_MODEL_CONFIG['models']:
+            models[f'local_{model_key}'] = lambda model_key=model_key: LocalTransformersLLM(model_key)
+    return models
\ No newline at end of file
@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config.config import SUMMARY_CACHE_CONFIG
+from src.models.llm_modules import BaseLLM, is_error_summary
+
+def normalize_text(text):
+    """Collapse whitespace so re-indented copies of the same abstract share a cache entry"""
+    return ' '.join(str(text).split())
+
+def cache_key(model_id, text, parameters):
+    """Content address for one summary: model, normalized input and generation parameters"""
+    material = json.dumps(
+        {'model': model_id, 'text': normalize_text(text), 'parameters': parameters},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class SummaryCache:
+    """Two-tier summary cache: an in-memory LRU in front of a SQLite file.
+
+    Entries expire after ttl_seconds. The memory tier holds at most
+    memory_entries; the disk tier is trimmed to disk_entries by dropping the
+    least recently used rows. Access times of disk hits are written in
+    batches rather than committed on every hit. Hit and miss counts are kept
+    in self.stats.
+    """
+    def __init__(self, path=None, memory_entries=None, disk_entries=None, ttl_seconds=None):
+        self.path = path or SUMMARY_CACHE_CONFIG['path']
+        self.memory_entries = memory_entries or SUMMARY_CACHE_CONFIG['memory_entries']
+        self.disk_entries = disk_entries or SUMMARY_CACHE_CONFIG['disk_entries']
+        self.ttl_seconds = ttl_seconds or SUMMARY_CACHE_CONFIG['ttl_days'] * 86400
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        self._memory = OrderedDict()
+        # {key: accessed_at} of disk hits not yet written back
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        # Opened on first use so constructing a cache never touches the disk
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS summaries ('
+                'key TEXT PRIMARY KEY, summary TEXT NOT NULL, '
+                'created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS ix_summaries_accessed ON summaries (accessed_at)')
+        return self._db
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return entry[0]
+
+            db = self._connection()
+            row = db.execute('SELECT summary, created_at FROM summaries WHERE key = ?', (key,)).fetchone()
+            if row is None or now - row[1] >= self.ttl_seconds:
+                if row is not None:
+                    db.execute('DELETE FROM summaries WHERE key = ?', (key,))
+                    db.commit()
+                self._memory.pop(key, None)
+                self.stats['misses'] += 1
+                return None
+
+            self._touched[key] = now
+            if len(self._touched) >= 100:
+                self._write_touched(db)
+                db.commit()
+            self._remember(key, row[0], row[1])
+            self.stats['disk_hits'] += 1
+            return row[0]
+
+    def set(self, key, summary):
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            db.execute(
+                'INSERT OR REPLACE INTO summaries (key, summary, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, summary, now, now)
+            )
+            self.stats['writes'] += 1
+            self._write_touched(db)
+            # Trim the disk tier every 100 writes rather than on every write
+            if self.stats['writes'] % 100 == 0:
+                self._evict_disk(db)
+            db.commit()
+            self._remember(key, summary, now)
+
+    def _remember(self, key, summary, created_at):
+        self._memory[key] = (summary, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _write_touched(self, db):
+        if self._touched:
+            db.executemany(
+                'UPDATE summaries SET accessed_at = ? WHERE key = ?',
+                [(accessed_at, key) for key, accessed_at in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict_disk(self, db):
+        # Evict by up-to-date access times
+        self._write_touched(db)
+        db.execute('DELETE FROM summaries WHERE created_at < ?', (time.time() - self.ttl_seconds,))
+        count = db.execute('SELECT COUNT(*) FROM summaries').fetchone()[0]
+        excess = count - self.disk_entries
+        if excess > 0:
+            db.execute(
+                'DELETE FROM summaries WHERE key IN '
+                '(SELECT key FROM summaries ORDER BY accessed_at LIMIT ?)', (excess,)
+            )
+            self.stats['evictions'] += excess
+
+    def hit_rate(self):
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._evict_disk(self._db)
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+class CachedLLM(BaseLLM):
+    """Wraps any BaseLLM so identical inputs are summarized once per model and parameter set"""
+    def __init__(self, llm, cache):
+        self.llm = llm
+        self.cache = cache
+
+    @property
+    def supports_batching(self):
+        return self.llm.supports_batching
+
+    def cache_identity(self):
+        return self.llm.cache_identity()
+
+    def _key(self, text):
+        model_id, parameters = self.llm.cache_identity()
+        return cache_key(model_id, text, parameters)
+
+    def _store(self, key, summary):
+        # Errors are transient (quota, cold start); never serve them from the cache
+        if not is_error_summary(summary):
+            self.cache.set(key, summary)
+
+    def summarize(self, text):
+        key = self._key(text)
+        summary = self.cache.get(key)
+        if summary is None:
+            summary = self.llm.summarize(text)
+            self._store(key, summary)
+        return summary
+
+    def summarize_batch(self, texts):
+        """Serve cached texts and pass only the misses to the model, as one batch"""
+        keys = [self._key(text) for text in texts]
+        summaries = [self.cache.get(key) for key in keys]
+        misses = [i for i, summary in enumerate(summaries) if summary is None]
+        if misses:
+            fresh = self.llm.summarize_batch([texts[i] for i in misses])
+            for i, summary in zip(misses, fresh):
+                summaries[i] = summary
+                self._store(keys[i], summary)
+        return summaries
+
+    async def asummarize(self, text, session=None):
+        # The cache's SQLite tier blocks, so it is read and written off the event loop
+        key = self._key(text)
+        summary = await asyncio.to_thread(self.cache.get, key)
+        if summary is None:
+            summary = await self.llm.asummarize(text, session=session)
+            await asyncio.to_thread(self._store, key, summary)
+        return summary
+
+    def __getattr__(self, name):
+        # Only reached for attributes the wrapper lacks; delegate them to the wrapped model
+        if name == 'llm':
+            raise AttributeError(name)
+        return getattr(self.llm, name)
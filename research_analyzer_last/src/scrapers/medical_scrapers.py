@@ -1,132 +1,309 @@
-import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-import requests
-from fake_useragent import UserAgent
 from datetime import datetime
 import time
 import re
 from abc import ABC, abstractmethod
 import xml.etree.ElementTree as ET
+from contextlib import asynccontextmanager
+from config.config import HTTP_CONFIG, RESEARCH_SOURCES, RATE_LIMIT_CONFIG, get_date_range
+from src.utils.rate_limiter import get_rate_limiter, RETRY_STATUSES
+from src.utils.user_agent import random_user_agent
+from src.scrapers.pubmed_parser import PubMedStreamParser
+from src.utils.dedup import deduplicate
+
+class SessionManager:
+    """Owns one long-lived, connection-pooled aiohttp session for a whole run"""
+    def __init__(self, limit=None, limit_per_host=None, keepalive_timeout=None, timeout=None):
+        self.limit = limit or HTTP_CONFIG['pool_size']
+        self.limit_per_host = limit_per_host or HTTP_CONFIG['pool_size_per_host']
+        self.keepalive_timeout = keepalive_timeout or HTTP_CONFIG['keepalive_timeout']
+        self.timeout = timeout or HTTP_CONFIG['request_timeout']
+        self._session = None
+        self._lock = asyncio.Lock()
+
+    async def get_session(self):
+        """Return the shared session, creating it on first use"""
+        import aiohttp
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=HTTP_CONFIG['dns_cache_ttl']
+                )
+                self._session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout)
+                )
+            return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        await self.get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
 
 class MedicalSource(ABC):
-    def __init__(self):
-        self.ua = UserAgent()
+    source_key = None  # Key into RESEARCH_SOURCES
+
+    def __init__(self, session_manager=None):
         self.headers = {
-            'User-Agent': self.ua.random,
+            'User-Agent': random_user_agent(),
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
         }
+        self.session_manager = session_manager
+        # Queries whose last search errored; callers must not advance their watermarks
+        self.failed_queries = set()
+        # Queries whose window held more records than the limit; likewise not advanced
+        self.truncated_queries = set()
+
+    def reset(self):
+        """Forget per-run state before the scraper is reused for another run"""
+        self.failed_queries.clear()
+        self.truncated_queries.clear()
+
+    @staticmethod
+    def date_window(since=None, until=None):
+        """(since, until) for a date-filtered search, or None to search without a window"""
+        if since is None:
+            return None
+        return since, until or datetime.now()
+
+    @asynccontextmanager
+    async def session(self):
+        """Yield the shared pooled session, or a one-off session when none was injected"""
+        if self.session_manager is not None:
+            yield await self.session_manager.get_session()
+        else:
+            import aiohttp
+            async with aiohttp.ClientSession() as session:
+                yield session
+
+    @asynccontextmanager
+    async def get(self, session, url, params=None):
+        """GET through the host's token bucket, backing off and retrying on 429/503"""
+        async with self._request(session, 'GET', url, params=params) as response:
+            yield response
+
+    @asynccontextmanager
+    async def post(self, session, url, data=None):
+        """POST form data with the same rate limiting and retries as get()"""
+        async with self._request(session, 'POST', url, data=data) as response:
+            yield response
+
+    @asynccontextmanager
+    async def _request(self, session, method, url, **kwargs):
+        limiter = get_rate_limiter(url)
+        max_retries = RATE_LIMIT_CONFIG['max_retries']
+        for attempt in range(max_retries + 1):
+            await limiter.acquire()
+            response = await session.request(method, url, headers=self.headers, **kwargs)
+            if response.status in RETRY_STATUSES and attempt < max_retries:
+                limiter.backoff(attempt, response.headers.get('Retry-After'))
+                response.release()
+                continue
+            try:
+                yield response
+            finally:
+                response.release()
+            return
     
     @abstractmethod
-    async def search(self, query, limit=5):
+    async def search(self, query, limit=5, since=None, until=None):
+        """Search for query, restricted to records added or updated between since and until"""
         pass
 
 class PubMedScraper(MedicalSource):
-    def __init__(self):
-        super().__init__()
+    """E-utilities client that keeps result sets on the NCBI history server.
+
+    esearch runs with usehistory=y and efetch pages through the stored set by
+    WebEnv/query_key in batches of efetch_batch_size, so large result sets
+    cost a few round-trips instead of one request per ID list.
+    """
+    source_key = 'pubmed'
+
+    def __init__(self, session_manager=None):
+        super().__init__(session_manager)
         self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+        self.batch_size = RESEARCH_SOURCES['pubmed']['efetch_batch_size']
+        self.chunk_size = 64 * 1024
         
-    async def search(self, query, limit=5):
-        # First get IDs
-        search_url = f"{self.base_url}/esearch.fcgi"
+    async def search(self, query, limit=5, since=None, until=None):
+        async with self.session() as session:
+            try:
+                history = await self._esearch(session, query, limit, self.date_window(since, until))
+                if history is None:
+                    self.failed_queries.add(query)
+                    return []
+                if not history['ids']:
+                    return []
+                if history['count'] > limit:
+                    self.truncated_queries.add(query)
+                total = min(limit, history['count'])
+                return await self._efetch_history(session, history['webenv'], history['query_key'], total)
+            except Exception as e:
+                print(f"Error in PubMed search: {str(e)}")
+                self.failed_queries.add(query)
+                return []
+
+    async def search_batch(self, queries, limit=5, exclude_pmids=(), windows=None):
+        """Search many queries, fetching the de-duplicated union of their PMIDs once.
+
+        Returns a dict of query -> articles. A PMID found by several queries is
+        attributed to the first one only, and PMIDs in exclude_pmids are skipped.
+        windows maps a query to its (since, until) date range.
+        """
+        windows = windows or {}
+        results = {query: [] for query in queries}
+        async with self.session() as session:
+            try:
+                histories = await asyncio.gather(*(
+                    self._esearch(session, query, limit, self.date_window(*windows.get(query, ())))
+                    for query in queries
+                ))
+                self.failed_queries.update(q for q, history in zip(queries, histories) if history is None)
+                self.truncated_queries.update(
+                    q for q, history in zip(queries, histories)
+                    if history is not None and history['count'] > len(history['ids'])
+                )
+
+                seen = set(exclude_pmids)
+                owner = {}
+                for query, history in zip(queries, histories):
+                    for pmid in (history or {}).get('ids', []):
+                        if pmid not in seen:
+                            seen.add(pmid)
+                            owner[pmid] = query
+                if not owner:
+                    return results
+
+                webenv, query_key = await self._epost(session, list(owner))
+                for article in await self._efetch_history(session, webenv, query_key, len(owner)):
+                    query = owner.get(article['pmid'])
+                    if query is not None:
+                        results[query].append(article)
+            except Exception as e:
+                print(f"Error in PubMed batch search: {str(e)}")
+                self.failed_queries.update(queries)
+        return results
+
+    async def _esearch(self, session, query, limit, window=None):
+        """Run esearch with usehistory=y and return the stored set's WebEnv, query_key and IDs"""
         params = {
             'db': 'pubmed',
             'term': query,
             'retmax': limit,
-            'sort': 'date'
+            'sort': 'date',
+            'usehistory': 'y'
         }
-        
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            try:
-                async with session.get(search_url, params=params) as response:
-                    if response.status == 200:
-                        text = await response.text()
-                        root = ET.fromstring(text)
-                        ids = [id_elem.text for id_elem in root.findall('.//Id')]
-                        
-                        if not ids:
-                            return []
-                        
-                        # Now fetch details for these IDs
-                        fetch_url = f"{self.base_url}/efetch.fcgi"
-                        id_string = ','.join(ids)
-                        params = {
-                            'db': 'pubmed',
-                            'id': id_string,
-                            'retmode': 'xml'
-                        }
-                        
-                        async with session.get(fetch_url, params=params) as fetch_response:
-                            if fetch_response.status == 200:
-                                articles = []
-                                xml_text = await fetch_response.text()
-                                root = ET.fromstring(xml_text)
-                                
-                                for article in root.findall('.//PubmedArticle'):
-                                    try:
-                                        title = article.find('.//ArticleTitle').text
-                                        abstract = article.find('.//Abstract/AbstractText')
-                                        abstract = abstract.text if abstract is not None else ""
-                                        
-                                        authors = []
-                                        author_list = article.findall('.//Author')
-                                        for author in author_list:
-                                            last_name = author.find('LastName')
-                                            fore_name = author.find('ForeName')
-                                            if last_name is not None and fore_name is not None:
-                                                authors.append(f"{fore_name.text} {last_name.text}")
-                                        
-                                        date_elem = article.find('.//PubDate')
-                                        year = date_elem.find('Year')
-                                        year = year.text if year is not None else ""
-                                        
-                                        articles.append({
-                                            'title': title,
-                                            'abstract': abstract,
-                                            'authors': ', '.join(authors),
-                                            'year': year,
-                                            'url': f"https://pubmed.ncbi.nlm.nih.gov/{ids[0]}/",
-                                            'source': 'PubMed'
-                                        })
-                                    except Exception as e:
-                                        print(f"Error parsing PubMed article: {str(e)}")
-                                        continue
-                                
-                                return articles
-            except Exception as e:
-                print(f"Error in PubMed search: {str(e)}")
+        if window is not None:
+            # Entrez date: when the record was added to PubMed, so late-indexed papers are not missed
+            params.update({
+                'datetype': 'edat',
+                'mindate': window[0].strftime('%Y/%m/%d'),
+                'maxdate': window[1].strftime('%Y/%m/%d')
+            })
+        async with self.get(session, f"{self.base_url}/esearch.fcgi", params) as response:
+            if response.status != 200:
+                return None
+            root = ET.fromstring(await response.text())
+            return {
+                'count': int(root.findtext('Count', '0')),
+                'webenv': root.findtext('WebEnv'),
+                'query_key': root.findtext('QueryKey'),
+                'ids': [id_elem.text for id_elem in root.findall('IdList/Id')]
+            }
+
+    async def _epost(self, session, pmids):
+        """Upload a PMID list to the history server and return its WebEnv and query_key"""
+        data = {'db': 'pubmed', 'id': ','.join(pmids)}
+        async with self.post(session, f"{self.base_url}/epost.fcgi", data) as response:
+            response.raise_for_status()
+            root = ET.fromstring(await response.text())
+            return root.findtext('WebEnv'), root.findtext('QueryKey')
+
+    async def _efetch_history(self, session, webenv, query_key, total):
+        """Fetch a stored result set in retstart/retmax pages, issued concurrently"""
+        pages = await asyncio.gather(*(
+            self._efetch_page(session, webenv, query_key, retstart, min(self.batch_size, total - retstart))
+            for retstart in range(0, total, self.batch_size)
+        ))
+        return [article for page in pages for article in page]
+
+    async def _efetch_page(self, session, webenv, query_key, retstart, retmax):
+        params = {
+            'db': 'pubmed',
+            'WebEnv': webenv,
+            'query_key': query_key,
+            'retstart': retstart,
+            'retmax': retmax,
+            'retmode': 'xml'
+        }
+        articles = []
+        async with self.get(session, f"{self.base_url}/efetch.fcgi", params) as response:
+            if response.status != 200:
+                print(f"PubMed efetch page at {retstart} failed with status {response.status}")
                 return []
-        return []
+            async for article in self._stream_articles(response):
+                articles.append(article)
+        return articles
+
+    async def _stream_articles(self, response):
+        """Yield article records while the efetch body is still downloading"""
+        parser = PubMedStreamParser()
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            for article in parser.feed(chunk):
+                yield article
+        for article in parser.close():
+            yield article
 
 class ClinicalTrialsScraper(MedicalSource):
-    def __init__(self):
-        super().__init__()
+    source_key = 'clinicaltrials'
+
+    def __init__(self, session_manager=None):
+        super().__init__(session_manager)
         self.base_url = "https://clinicaltrials.gov/api/query/study_fields"
         
-    async def search(self, query, limit=5):
+    async def search(self, query, limit=5, since=None, until=None):
+        expr = query
+        window = self.date_window(since, until)
+        if window is not None:
+            expr = (f"{query} AND AREA[LastUpdatePostDate]RANGE["
+                    f"{window[0].strftime('%m/%d/%Y')}, {window[1].strftime('%m/%d/%Y')}]")
         params = {
-            'expr': query,
+            'expr': expr,
             'fields': 'NCTId,BriefTitle,BriefSummary,LocationFacility,StartDate,CompletionDate',
             'min_rnk': 1,
             'max_rnk': limit,
             'fmt': 'json'
         }
         
-        async with aiohttp.ClientSession(headers=self.headers) as session:
+        async with self.session() as session:
             try:
-                async with session.get(self.base_url, params=params) as response:
+                async with self.get(session, self.base_url, params) as response:
                     if response.status == 200:
                         data = await response.json()
                         studies = []
+                        if data.get('StudyFieldsResponse', {}).get('NStudiesFound', 0) > limit:
+                            self.truncated_queries.add(query)
                         
                         for study in data.get('StudyFieldsResponse', {}).get('StudyFields', []):
                             try:
+                                nct_id = study.get('NCTId', [''])[0]
                                 studies.append({
+                                    'nct_id': nct_id,
                                     'title': study.get('BriefTitle', [''])[0],
                                     'abstract': study.get('BriefSummary', [''])[0],
                                     'authors': study.get('LocationFacility', [''])[0],
                                     'year': study.get('StartDate', [''])[0][:4],
-                                    'url': f"https://clinicaltrials.gov/ct2/show/{study.get('NCTId', [''])[0]}",
+                                    'url': f"https://clinicaltrials.gov/ct2/show/{nct_id}",
                                     'source': 'ClinicalTrials.gov'
                                 })
                             except Exception as e:
@@ -136,61 +313,123 @@ class ClinicalTrialsScraper(MedicalSource):
                         return studies
             except Exception as e:
                 print(f"Error in ClinicalTrials.gov search: {str(e)}")
+                self.failed_queries.add(query)
                 return []
+        self.failed_queries.add(query)
         return []
 
 class MedRxivScraper(MedicalSource):
-    def __init__(self):
-        super().__init__()
+    """medRxiv details API client.
+
+    The API has no search: details/medrxiv/<from>/<to>/<cursor> lists every
+    preprint posted in the interval, page_size records per cursor step. Each
+    interval is listed once and shared by all topics searched over it; a
+    topic matches preprints whose title or abstract contains every query word.
+    """
+    source_key = 'medrxiv'
+    page_size = 100  # Fixed by the API
+
+    def __init__(self, session_manager=None):
+        super().__init__(session_manager)
         self.base_url = "https://api.medrxiv.org/details/medrxiv"
-        
-    async def search(self, query, limit=5):
-        params = {
-            'q': query,
-            'page': 1,
-            'size': limit
-        }
-        
-        async with aiohttp.ClientSession(headers=self.headers) as session:
+        self._intervals = {}
+
+    def reset(self):
+        super().reset()
+        self._intervals.clear()
+
+    @staticmethod
+    def matches(query, paper):
+        text = f"{paper.get('title', '')} {paper.get('abstract', '')}".lower()
+        return all(word in text for word in re.findall(r'\w+', query.lower()))
+
+    async def search(self, query, limit=5, since=None, until=None):
+        # Without a watermark, list the default look-back window
+        window = self.date_window(since, until) or get_date_range()
+        try:
+            preprints = await self._interval(window[0].strftime('%Y-%m-%d'), window[1].strftime('%Y-%m-%d'))
+        except Exception as e:
+            print(f"Error in medRxiv search: {str(e)}")
+            self.failed_queries.add(query)
+            return []
+
+        papers = []
+        for paper in sorted(preprints, key=lambda paper: paper.get('date', ''), reverse=True):
+            if not self.matches(query, paper):
+                continue
+            if len(papers) == limit:
+                self.truncated_queries.add(query)
+                break
             try:
-                async with session.get(self.base_url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        papers = []
-                        
-                        for paper in data.get('results', []):
-                            try:
-                                papers.append({
-                                    'title': paper.get('title', ''),
-                                    'abstract': paper.get('abstract', ''),
-                                    'authors': ', '.join(paper.get('authors', [])),
-                                    'year': paper.get('date', '')[:4],
-                                    'url': paper.get('doi', ''),
-                                    'source': 'medRxiv'
-                                })
-                            except Exception as e:
-                                print(f"Error parsing medRxiv paper: {str(e)}")
-                                continue
-                        
-                        return papers
+                authors = paper.get('authors', '')
+                papers.append({
+                    'doi': paper.get('doi', ''),
+                    'title': paper.get('title', ''),
+                    'abstract': paper.get('abstract', ''),
+                    'authors': authors if isinstance(authors, str) else ', '.join(authors),
+                    'year': paper.get('date', '')[:4],
+                    'url': paper.get('doi', ''),
+                    'source': 'medRxiv'
+                })
             except Exception as e:
-                print(f"Error in medRxiv search: {str(e)}")
-                return []
-        return []
+                print(f"Error parsing medRxiv paper: {str(e)}")
+                continue
+        return papers
+
+    async def _interval(self, start, end):
+        """Every preprint posted from start to end, fetched once per reset()"""
+        key = (start, end)
+        if key not in self._intervals:
+            self._intervals[key] = asyncio.ensure_future(self._list_interval(start, end))
+        # Shielded so one cancelled search does not cancel the listing other topics wait on
+        return await asyncio.shield(self._intervals[key])
+
+    async def _list_interval(self, start, end):
+        async with self.session() as session:
+            collection, total = await self._list_page(session, start, end, 0)
+            pages = await asyncio.gather(*(
+                self._list_page(session, start, end, cursor)
+                for cursor in range(len(collection), total, self.page_size)
+            )) if collection else []
+        for page, _ in pages:
+            collection.extend(page)
+        return collection
 
-async def search_medical_sources(query, limit_per_source=5):
-    scrapers = [
-        PubMedScraper(),
-        ClinicalTrialsScraper(),
-        MedRxivScraper()
+    async def _list_page(self, session, start, end, cursor):
+        async with self.get(session, f"{self.base_url}/{start}/{end}/{cursor}") as response:
+            response.raise_for_status()
+            data = await response.json()
+        messages = data.get('messages') or [{}]
+        return data.get('collection', []), int(messages[0].get('total', 0))
+
+SCRAPER_CLASSES = [PubMedScraper, ClinicalTrialsScraper, MedRxivScraper]
+
+def create_scrapers(session_manager=None):
+    """Instantiate one scraper per enabled source, all sharing the given session manager"""
+    return [
+        scraper_cls(session_manager)
+        for scraper_cls in SCRAPER_CLASSES
+        if RESEARCH_SOURCES[scraper_cls.source_key]['enabled']
     ]
+
+async def search_medical_sources(query, limit_per_source=5, session_manager=None):
+    # Without an injected manager, the three scrapers still share one pool for this query
+    owns_manager = session_manager is None
+    if owns_manager:
+        session_manager = SessionManager()
+
+    scrapers = create_scrapers(session_manager)
     
-    tasks = [scraper.search(query, limit_per_source) for scraper in scrapers]
-    results = await asyncio.gather(*tasks)
+    try:
+        tasks = [scraper.search(query, limit_per_source) for scraper in scrapers]
+        results = await asyncio.gather(*tasks)
+    finally:
+        if owns_manager:
+            await session_manager.close()
     
-    # Flatten results from all sources
+    # Flatten results from all sources, dropping articles listed by more than one
     all_results = []
     for source_results in results:
         all_results.extend(source_results)
     
-    return all_results
+    return deduplicate(all_results)
@@ -0,0 +1,86 @@
+import xml.etree.ElementTree as ET
+
+ARTICLE_PATH = 'MedlineCitation/Article'
+
+class PubMedStreamParser:
+    """Incremental parser for efetch PubmedArticleSet XML.
+
+    Feed response chunks as they arrive; every PubmedArticle is turned into a
+    record as soon as its closing tag is seen, then dropped from the tree, so
+    memory stays flat however many articles the response holds.
+    """
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._root = None
+
+    def feed(self, chunk):
+        """Parse a chunk of bytes or text and return the records it completed"""
+        self._parser.feed(chunk)
+        return list(self._drain())
+
+    def close(self):
+        """Flush the parser and return any records completed by the final chunk"""
+        self._parser.close()
+        return list(self._drain())
+
+    def _drain(self):
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = elem
+                continue
+            if elem.tag != 'PubmedArticle':
+                continue
+            try:
+                yield parse_article(elem)
+            except Exception as e:
+                print(f"Error parsing PubMed article: {str(e)}")
+            finally:
+                # Articles are direct children of the root; clearing it frees them
+                self._root.clear()
+
+def _text(elem):
+    """Full text of an element, including inline markup such as <i> or <sup>"""
+    return ''.join(elem.itertext()).strip() if elem is not None else ''
+
+def parse_article(article):
+    """Build a paper record from one PubmedArticle element"""
+    pmid = article.findtext('MedlineCitation/PMID')
+    title = _text(article.find(f'{ARTICLE_PATH}/ArticleTitle'))
+
+    # Structured abstracts have one AbstractText per section (BACKGROUND, METHODS, ...)
+    sections = []
+    for section in article.iterfind(f'{ARTICLE_PATH}/Abstract/AbstractText'):
+        text = _text(section)
+        label = section.get('Label')
+        if text:
+            sections.append(f"{label}: {text}" if label else text)
+
+    authors = []
+    for author in article.iterfind(f'{ARTICLE_PATH}/AuthorList/Author'):
+        last_name = author.findtext('LastName')
+        fore_name = author.findtext('ForeName')
+        if last_name and fore_name:
+            authors.append(f"{fore_name} {last_name}")
+
+    pub_date = article.find(f'{ARTICLE_PATH}/Journal/JournalIssue/PubDate')
+    year = ''
+    if pub_date is not None:
+        year = pub_date.findtext('Year') or (pub_date.findtext('MedlineDate') or '')[:4]
+
+    doi = ''
+    for article_id in article.iterfind('PubmedData/ArticleIdList/ArticleId'):
+        if article_id.get('IdType') == 'doi':
+            doi = (article_id.text or '').strip()
+            break
+
+    return {
+        'pmid': pmid,
+        'doi': doi,
+        'title': title,
+        'abstract': ' '.join(sections),
+        'authors': ', '.join(authors),
+        'year': year,
+        'url': f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+        'source': 'PubMed'
+    }
@@ -0,0 +1,222 @@
+import os
+import json
+import numpy as np
+from config.config import EMBEDDING_CONFIG
+
+META_FILE = 'meta.json'
+VECTORS_FILE = 'vectors.f32'
+LISTS_FILE = 'lists.i32'
+KEYS_FILE = 'keys.txt'
+CENTROIDS_FILE = 'centroids.npy'
+
+# Rows per matrix product when scanning or assigning, to bound temporary memory
+SCAN_ROWS = 65536
+
+def normalize(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+class EmbeddingIndex:
+    """Persistent nearest-neighbour index of unit vectors keyed by paper_key.
+
+    Vectors live in a memory-mapped float32 file that grows by doubling, so
+    the index can exceed RAM and reopens instantly. Up to train_threshold
+    vectors, queries scan everything exactly. Past that, k-means centroids
+    split the vectors into inverted lists (IVF) and a query scans only the
+    nprobe lists nearest to it. New vectors join their nearest list as they
+    are added; the centroids are refit once the index has grown
+    retrain_growth times since they were fit.
+    """
+    def __init__(self, directory=None, dimension=None):
+        self.directory = directory or EMBEDDING_CONFIG['index_dir']
+        os.makedirs(self.directory, exist_ok=True)
+        meta_path = self._path(META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if dimension is not None and dimension != meta['dimension']:
+                raise ValueError(f"Index at {self.directory} holds {meta['dimension']}-d vectors, not {dimension}-d")
+        elif dimension is None:
+            raise ValueError("dimension is required to create a new index")
+        else:
+            meta = {'dimension': dimension, 'count': 0, 'capacity': 0, 'trained_count': 0}
+
+        self.dimension = meta['dimension']
+        self.count = meta['count']
+        self.capacity = meta['capacity']
+        self.trained_count = meta['trained_count']
+
+        self.keys = []
+        # Bytes of the keys file holding committed keys; lines past count belong to an add() that never committed
+        self._keys_size = 0
+        if os.path.exists(self._path(KEYS_FILE)):
+            with open(self._path(KEYS_FILE), 'rb') as f:
+                for _, line in zip(range(self.count), f):
+                    self.keys.append(line.decode('utf-8').rstrip('\n'))
+                    self._keys_size += len(line)
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+
+        self._vectors = self._lists = None
+        if self.capacity:
+            self._map_files()
+        self.centroids = None
+        if self.trained_count and os.path.exists(self._path(CENTROIDS_FILE)):
+            self.centroids = np.load(self._path(CENTROIDS_FILE))
+            self._build_lists()
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _map_files(self):
+        self._vectors = np.memmap(self._path(VECTORS_FILE), dtype=np.float32, mode='r+',
+                                  shape=(self.capacity, self.dimension))
+        self._lists = np.memmap(self._path(LISTS_FILE), dtype=np.int32, mode='r+', shape=(self.capacity,))
+
+    def _ensure_capacity(self, needed):
+        if needed <= self.capacity:
+            return
+        self.capacity = max(needed, 2 * self.capacity, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._lists.flush()
+        self._vectors = self._lists = None
+        for name, row_bytes in ((VECTORS_FILE, 4 * self.dimension), (LISTS_FILE, 4)):
+            with open(self._path(name), 'ab') as f:
+                f.truncate(self.capacity * row_bytes)
+        self._map_files()
+
+    def _save_meta(self):
+        meta = {'dimension': self.dimension, 'count': self.count,
+                'capacity': self.capacity, 'trained_count': self.trained_count}
+        tmp_path = self._path(META_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path(META_FILE))
+
+    def add(self, keys, vectors):
+        """Append vectors for keys not yet indexed; returns how many were added"""
+        vectors = normalize(vectors)
+        fresh = {}
+        for key, vector in zip(keys, vectors):
+            if key not in self.rows and key not in fresh:
+                fresh[key] = vector
+        if not fresh:
+            return 0
+
+        start = self.count
+        end = start + len(fresh)
+        self._ensure_capacity(end)
+        block = np.stack(list(fresh.values()))
+        self._vectors[start:end] = block
+        self._lists[start:end] = self._assign(block) if self.centroids is not None else -1
+        self._vectors.flush()
+        self._lists.flush()
+        lines = ''.join(f"{key}\n" for key in fresh).encode('utf-8')
+        with open(self._path(KEYS_FILE), 'ab') as f:
+            # Drop leftovers of an interrupted add() so these keys line up with their rows
+            f.truncate(self._keys_size)
+            f.write(lines)
+        self._keys_size += len(lines)
+
+        for row, key in enumerate(fresh, start):
+            self.keys.append(key)
+            self.rows[key] = row
+        if self.centroids is not None:
+            for row, list_id in zip(range(start, end), self._lists[start:end]):
+                self._tails[list_id].append(row)
+        # Committing the count last means a crash mid-add leaves the previous state intact
+        self.count = end
+        self._save_meta()
+
+        if self.centroids is None and self.count >= EMBEDDING_CONFIG['train_threshold']:
+            self.train()
+        elif self.centroids is not None and self.count >= EMBEDDING_CONFIG['retrain_growth'] * self.trained_count:
+            self.train()
+        return len(fresh)
+
+    def _assign(self, vectors):
+        """Index of the nearest centroid for each vector"""
+        lists = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), SCAN_ROWS):
+            lists[start:start + SCAN_ROWS] = np.argmax(vectors[start:start + SCAN_ROWS] @ self.centroids.T, axis=1)
+        return lists
+
+    def train(self, iterations=10, seed=0):
+        """Fit spherical k-means centroids on a sample and regroup every vector into its list"""
+        rng = np.random.default_rng(seed)
+        n_lists = min(EMBEDDING_CONFIG['max_lists'], max(1, int(np.sqrt(self.count))))
+        sample_rows = np.sort(rng.choice(self.count, min(self.count, EMBEDDING_CONFIG['train_sample']), replace=False))
+        sample = np.asarray(self._vectors[sample_rows])
+
+        self.centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = self._assign(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignment, sample)
+            empty = ~sums.any(axis=1)
+            # Reseed lists that lost every member so no centroid goes to waste
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            self.centroids = normalize(sums)
+
+        for start in range(0, self.count, SCAN_ROWS):
+            end = min(start + SCAN_ROWS, self.count)
+            self._lists[start:end] = self._assign(np.asarray(self._vectors[start:end]))
+        self._lists.flush()
+        np.save(self._path(CENTROIDS_FILE), self.centroids)
+        self.trained_count = self.count
+        self._save_meta()
+        self._build_lists()
+
+    def _build_lists(self):
+        lists = np.asarray(self._lists[:self.count])
+        order = np.argsort(lists, kind='stable').astype(np.int64)
+        bounds = np.searchsorted(lists[order], np.arange(len(self.centroids) + 1))
+        self._members = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+        self._tails = [[] for _ in range(len(self.centroids))]
+
+    def _candidates(self, query, nprobe):
+        probe = np.argsort(self.centroids @ query)[::-1][:nprobe]
+        rows = [self._members[i] for i in probe] + [np.array(self._tails[i], dtype=np.int64) for i in probe]
+        return np.sort(np.concatenate(rows))
+
+    def search(self, vector, k=10, nprobe=None, exclude=()):
+        """Top-k (key, cosine similarity) pairs, best first"""
+        if not self.count:
+            return []
+        query = normalize(vector)[0]
+        wanted = k + len(exclude)
+        if self.centroids is None:
+            scores = np.concatenate([
+                np.asarray(self._vectors[start:min(start + SCAN_ROWS, self.count)]) @ query
+                for start in range(0, self.count, SCAN_ROWS)
+            ])
+            rows = np.arange(self.count)
+        else:
+            rows = self._candidates(query, nprobe or EMBEDDING_CONFIG['nprobe'])
+            scores = np.asarray(self._vectors[rows]) @ query
+
+        if len(scores) > wanted:
+            top = np.argpartition(-scores, wanted)[:wanted]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        results = [(self.keys[rows[i]], float(scores[i])) for i in top if self.keys[rows[i]] not in exclude]
+        return results[:k]
+
+    def similar(self, key, k=10, nprobe=None):
+        """Papers most like an indexed paper, excluding the paper itself"""
+        return self.search(self._vectors[self.rows[key]], k, nprobe, exclude={key})
+
+    def close(self):
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._lists.flush()
+        self._vectors = self._lists = None
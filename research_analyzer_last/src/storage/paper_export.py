@@ -0,0 +1,164 @@
+import os
+import glob
+from datetime import date
+from urllib.parse import quote
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from config.config import EXPORT_CONFIG
+from src.utils.categorizer import default_categorizer
+
+# Partition columns, in directory order: <directory>/date=YYYY-MM-DD/source=<source>/
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.date32()), ('source', pa.string())]), flavor='hive')
+
+TEXT = pa.string()
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+NUMERIC_COLUMNS = {'relevance_score': pa.float64()}
+
+def export_schema(columns):
+    """Arrow schema for exported papers: the run's columns plus its ID and categories.
+
+    source is left out since it is a partition key, stored once in the path.
+    """
+    fields = [pa.field('run_id', CATEGORY)]
+    for column in columns:
+        if column != 'source':
+            fields.append(pa.field(column, NUMERIC_COLUMNS.get(column, TEXT)))
+    fields.append(pa.field('category', CATEGORY))
+    fields.append(pa.field('categories', pa.list_(TEXT)))
+    return pa.schema(fields)
+
+class CsvExporter:
+    """Appends each paper to results/medical_research_data_<run_id>.csv as it arrives"""
+    def __init__(self, run_id, columns, directory='results'):
+        self.columns = columns
+        self.path = os.path.join(directory, f'medical_research_data_{run_id}.csv')
+        self.count = 0
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            # Left by the interrupted run being resumed; every journaled paper is written again
+            os.remove(self.path)
+
+    def write(self, paper):
+        import pandas as pd
+        pd.DataFrame([paper]).reindex(columns=self.columns).to_csv(
+            self.path, mode='a', header=not self.count, index=False
+        )
+        self.count += 1
+
+    def close(self):
+        pass
+
+class ParquetExporter:
+    """Writes a run's papers into a Parquet dataset partitioned by run date and source.
+
+    Each (date, source) partition gets one file per run, part-<run_id>.parquet,
+    written a row group at a time as papers arrive so memory stays bounded.
+    run_id and category are dictionary-encoded; text columns are compressed
+    with EXPORT_CONFIG['compression']. A file is only readable once close()
+    writes its footer, so until then it is written under a hidden name that
+    readers skip, .part-<run_id>.parquet.tmp, and close() renames it. A
+    resumed run deletes and rewrites its own parts, finished or not.
+    """
+    def __init__(self, run_id, columns, directory=None, run_date=None):
+        self.run_id = run_id
+        self.columns = columns
+        self.path = directory or EXPORT_CONFIG['directory']
+        self.run_date = run_date or date.today()
+        self.schema = export_schema(columns)
+        self.row_group_size = EXPORT_CONFIG['row_group_size']
+        self.count = 0
+        self._writers = {}
+        self._buffers = {}
+        for name in (self._final_name(), self._temp_name()):
+            for part in glob.glob(os.path.join(self.path, '*', '*', name)):
+                os.remove(part)
+
+    def _final_name(self):
+        return f'part-{self.run_id}.parquet'
+
+    def _temp_name(self):
+        # pyarrow datasets ignore files starting with '.', so readers never see a part without its footer
+        return f'.part-{self.run_id}.parquet.tmp'
+
+    def _partition_dir(self, source):
+        return os.path.join(
+            self.path, f"date={self.run_date.isoformat()}", f"source={quote(str(source), safe='')}"
+        )
+
+    def write(self, paper):
+        source = paper.get('source') or 'unknown'
+        buffer = self._buffers.setdefault(source, [])
+        buffer.append(paper)
+        self.count += 1
+        if len(buffer) >= self.row_group_size:
+            self._flush(source)
+
+    def _flush(self, source):
+        rows = self._buffers.pop(source, [])
+        if not rows:
+            return
+        writer = self._writers.get(source)
+        if writer is None:
+            directory = self._partition_dir(source)
+            os.makedirs(directory, exist_ok=True)
+            writer = pq.ParquetWriter(
+                os.path.join(directory, self._temp_name()),
+                self.schema,
+                compression=EXPORT_CONFIG['compression'],
+                # Short repeated values only; dictionary pages would bloat the free text
+                use_dictionary=['run_id', 'category', 'year', 'categories.list.element']
+            )
+            self._writers[source] = writer
+        writer.write_table(self._table(rows), row_group_size=self.row_group_size)
+
+    def _table(self, rows):
+        categories = default_categorizer().categorize_papers(rows)
+        columns = {'run_id': [self.run_id] * len(rows)}
+        for field in self.schema:
+            if field.name in ('run_id', 'category', 'categories'):
+                continue
+            values = [row.get(field.name) for row in rows]
+            if field.type == TEXT:
+                values = [None if value is None or value != value else str(value) for value in values]
+            columns[field.name] = values
+        columns['category'] = [found[0] for found in categories]
+        columns['categories'] = categories
+        return pa.Table.from_pydict(columns, schema=self.schema)
+
+    def close(self):
+        for source in list(self._buffers):
+            self._flush(source)
+        for source, writer in self._writers.items():
+            writer.close()
+            directory = self._partition_dir(source)
+            os.replace(os.path.join(directory, self._temp_name()), os.path.join(directory, self._final_name()))
+        self._writers = {}
+
+def create_exporter(run_id, columns):
+    """The exporter for EXPORT_CONFIG['format']: 'parquet' or 'csv'"""
+    if EXPORT_CONFIG['format'] == 'csv':
+        return CsvExporter(run_id, columns)
+    return ParquetExporter(run_id, columns)
+
+def load_history(filters=None, columns=None, directory=None, as_pandas=True):
+    """Read exported papers across every run.
+
+    filters is a pyarrow expression or a list of (column, op, value) tuples,
+    e.g. [('source', '=', 'PubMed'), ('date', '>=', date(2024, 1, 1))].
+    Filters on date and source skip whole partitions; others are checked
+    against row-group statistics before any data is read. Files are memory
+    mapped, and only the named columns are loaded.
+    """
+    directory = directory or EXPORT_CONFIG['directory']
+    if not os.path.isdir(directory):
+        import pandas as pd
+        return pd.DataFrame(columns=columns) if as_pandas else None
+    table = pq.read_table(
+        directory,
+        columns=columns,
+        filters=filters,
+        partitioning=PARTITIONING,
+        memory_map=True
+    )
+    return table.to_pandas() if as_pandas else table
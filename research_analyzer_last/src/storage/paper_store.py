@@ -0,0 +1,429 @@
+import os
+import hashlib
+import sqlite3
+from datetime import datetime, timedelta
+from sqlalchemy import (
+    create_engine, event, MetaData, Table, Column, Index,
+    Integer, String, Text, DateTime, ForeignKey, select, func, text, bindparam
+)
+from sqlalchemy.dialects.sqlite import insert
+from config.config import DATABASE_CONFIG
+from src.models.llm_modules import is_error_summary
+
+SUMMARY_PREFIX = 'summary_'
+
+metadata = MetaData()
+
+papers_table = Table(
+    'papers', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('paper_key', String, nullable=False, unique=True),
+    Column('source', String, nullable=False),
+    Column('source_id', String),
+    Column('doi', String),
+    Column('title', Text),
+    Column('abstract', Text),
+    Column('authors', Text),
+    Column('year', String),
+    Column('url', Text),
+    Column('fetched_at', DateTime, nullable=False),
+    Index('ix_papers_source_id', 'source', 'source_id'),
+    Index('ix_papers_doi', 'doi'),
+    Index('ix_papers_year', 'year'),
+    Index('ix_papers_fetched_at', 'fetched_at')
+)
+
+summaries_table = Table(
+    'summaries', metadata,
+    Column('paper_key', String, ForeignKey('papers.paper_key'), primary_key=True),
+    Column('model', String, primary_key=True),
+    Column('summary', Text),
+    Column('created_at', DateTime, nullable=False)
+)
+
+# How far each (source, query) search has been harvested, so the next run asks only for newer records
+watermarks_table = Table(
+    'watermarks', metadata,
+    Column('source', String, primary_key=True),
+    Column('query', String, primary_key=True),
+    Column('harvested_until', DateTime, nullable=False)
+)
+
+# Completed analysis runs; the latest one versions everything served from the store
+runs_table = Table(
+    'runs', metadata,
+    Column('run_id', String, primary_key=True),
+    Column('completed_at', DateTime, nullable=False),
+    Column('paper_count', Integer, nullable=False)
+)
+
+PAPER_COLUMNS = ['source', 'source_id', 'doi', 'title', 'abstract', 'authors', 'year', 'url']
+LISTED_COLUMNS = [papers_table.c.id, papers_table.c.paper_key, papers_table.c.fetched_at] + [
+    papers_table.c[column] for column in PAPER_COLUMNS
+]
+
+# Full-text index over each paper's title, abstract and summaries, one row per paper (rowid = papers.id).
+# The index reads its text from the paper_search_content view instead of keeping a second copy, and
+# FTS5 stores postings delta- and varint-compressed. Rank is BM25 with the title weighted highest.
+SEARCH_CONTENT_DDL = (
+    "CREATE VIEW IF NOT EXISTS paper_search_content AS "
+    "SELECT p.id, p.paper_key, p.title, p.abstract, "
+    "(SELECT group_concat(summary, ' ') FROM "
+    "(SELECT summary FROM summaries s WHERE s.paper_key = p.paper_key ORDER BY s.model)) AS summaries "
+    "FROM papers p"
+)
+SEARCH_INDEX_DDL = (
+    "CREATE VIRTUAL TABLE paper_search USING fts5("
+    "title, abstract, summaries, content = 'paper_search_content', content_rowid = 'id', "
+    "tokenize = 'porter unicode61 remove_diacritics 2')"
+)
+SEARCH_RANK = 'bm25(4.0, 1.0, 0.5)'
+
+# An external-content index forgets a row only when given the text it indexed, so a paper's
+# entry is removed before its row or summaries change and added back afterwards
+_UNINDEX = text(
+    "INSERT INTO paper_search (paper_search, rowid, title, abstract, summaries) "
+    "SELECT 'delete', id, title, abstract, summaries FROM paper_search_content WHERE paper_key IN :keys"
+).bindparams(bindparam('keys', expanding=True))
+_INDEX = text(
+    "INSERT INTO paper_search (rowid, title, abstract, summaries) "
+    "SELECT id, title, abstract, summaries FROM paper_search_content WHERE paper_key IN :keys"
+).bindparams(bindparam('keys', expanding=True))
+
+def paper_key(paper):
+    """Stable identity for a paper: the source's own ID where there is one"""
+    for field, prefix in (('pmid', 'pmid'), ('nct_id', 'nct'), ('doi', 'doi')):
+        value = str(paper.get(field) or '').strip().lower()
+        if value:
+            return f"{prefix}:{value}"
+    if paper.get('url'):
+        return f"url:{paper['url']}"
+    title = ' '.join(str(paper.get('title', '')).lower().split())
+    return f"title:{hashlib.sha1(title.encode('utf-8')).hexdigest()}"
+
+def _source_id(paper):
+    return paper.get('pmid') or paper.get('nct_id') or paper.get('doi') or None
+
+def _is_error(summary):
+    return is_error_summary(summary)
+
+def match_query(query):
+    """FTS5 MATCH expression requiring every word of a plain-text query.
+
+    Each word is quoted, so punctuation such as 'covid-19' or 'p<0.05' is
+    searched for rather than parsed as query syntax.
+    """
+    words = [word.replace('"', '""') for word in query.split()]
+    return ' '.join(f'"{word}"' for word in words)
+
+class PaperStore:
+    """SQLite store of fetched papers and their per-model summaries.
+
+    Writes are batched upserts keyed on paper_key, the database runs in WAL
+    mode so readers (reports, dashboards) never block a running harvest, and
+    backup() keeps a rotating set of snapshots in DATABASE_CONFIG['backup_dir'].
+    """
+    def __init__(self, path=None, backup_dir=None):
+        self.path = path or DATABASE_CONFIG['filename']
+        self.backup_dir = backup_dir or DATABASE_CONFIG['backup_dir']
+        self.engine = create_engine(f"sqlite:///{self.path}")
+        event.listen(self.engine, 'connect', self._configure_connection)
+        metadata.create_all(self.engine)
+        self._create_search_index()
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+    def _create_search_index(self):
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(SEARCH_CONTENT_DDL)
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'paper_search'"
+            )).first()
+            if exists:
+                return
+            conn.exec_driver_sql(SEARCH_INDEX_DDL)
+            conn.exec_driver_sql(f"INSERT INTO paper_search (paper_search, rank) VALUES ('rank', '{SEARCH_RANK}')")
+            # A database from before the index existed gets every stored paper indexed once
+            conn.exec_driver_sql("INSERT INTO paper_search (paper_search) VALUES ('rebuild')")
+
+    @staticmethod
+    def _chunks(keys):
+        # Chunked to stay under SQLite's bound-parameter limit
+        keys = list(keys)
+        return [keys[i:i + 500] for i in range(0, len(keys), 500)]
+
+    def upsert_papers(self, papers):
+        """Insert new papers and refresh the metadata of known ones in one statement"""
+        now = datetime.now()
+        rows = {}
+        for paper in papers:
+            row = {column: paper.get(column) for column in PAPER_COLUMNS}
+            row['source'] = row['source'] or 'Unknown'
+            row['source_id'] = _source_id(paper)
+            row['paper_key'] = paper_key(paper)
+            row['fetched_at'] = now
+            rows[row['paper_key']] = row
+        if not rows:
+            return 0
+
+        stmt = insert(papers_table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['paper_key'],
+            set_={column: stmt.excluded[column] for column in PAPER_COLUMNS}
+        )
+        with self.engine.begin() as conn:
+            chunks = self._chunks(rows)
+            for chunk in chunks:
+                conn.execute(_UNINDEX, {'keys': chunk})
+            conn.execute(stmt, list(rows.values()))
+            for chunk in chunks:
+                conn.execute(_INDEX, {'keys': chunk})
+        return len(rows)
+
+    def upsert_summaries(self, papers):
+        """Store every summary_<model> field of the given papers, skipping error results"""
+        now = datetime.now()
+        rows = []
+        for paper in papers:
+            key = paper_key(paper)
+            for field, summary in paper.items():
+                if field.startswith(SUMMARY_PREFIX) and not _is_error(summary):
+                    rows.append({
+                        'paper_key': key,
+                        'model': field[len(SUMMARY_PREFIX):],
+                        'summary': summary,
+                        'created_at': now
+                    })
+        if not rows:
+            return 0
+
+        stmt = insert(summaries_table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['paper_key', 'model'],
+            set_={'summary': stmt.excluded.summary, 'created_at': stmt.excluded.created_at}
+        )
+        with self.engine.begin() as conn:
+            chunks = self._chunks({row['paper_key'] for row in rows})
+            for chunk in chunks:
+                conn.execute(_UNINDEX, {'keys': chunk})
+            conn.execute(stmt, rows)
+            for chunk in chunks:
+                conn.execute(_INDEX, {'keys': chunk})
+        return len(rows)
+
+    def summarized_source_ids(self, source, models):
+        """Source IDs (e.g. PMIDs) of stored papers that already have a summary from every model"""
+        models = list(models)
+        query = (
+            select(papers_table.c.source_id)
+            .join(summaries_table, summaries_table.c.paper_key == papers_table.c.paper_key)
+            .where(papers_table.c.source == source, summaries_table.c.model.in_(models))
+            .group_by(papers_table.c.source_id)
+            .having(func.count(summaries_table.c.model) == len(models))
+        )
+        with self.engine.connect() as conn:
+            return {row.source_id for row in conn.execute(query) if row.source_id}
+
+    def stored_summaries(self, keys):
+        """Return {paper_key: {'summary_<model>': text}} for the given keys"""
+        keys = list(keys)
+        found = {}
+        with self.engine.connect() as conn:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                query = select(summaries_table).where(summaries_table.c.paper_key.in_(keys[i:i + 500]))
+                for row in conn.execute(query):
+                    found.setdefault(row.paper_key, {})[f"{SUMMARY_PREFIX}{row.model}"] = row.summary
+        return found
+
+    def record_run(self, run_id, paper_count):
+        """Mark a run complete; a resumed run replaces its earlier record"""
+        stmt = insert(runs_table).values(run_id=run_id, completed_at=datetime.now(), paper_count=paper_count)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['run_id'],
+            set_={'completed_at': stmt.excluded.completed_at, 'paper_count': stmt.excluded.paper_count}
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def latest_run(self):
+        """{'run_id', 'completed_at', 'paper_count'} of the last completed run, or None"""
+        query = select(runs_table).order_by(runs_table.c.completed_at.desc()).limit(1)
+        with self.engine.connect() as conn:
+            row = conn.execute(query).first()
+        return dict(row._mapping) if row else None
+
+    def _listing(self, source=None, since=None, until=None):
+        query = select(*LISTED_COLUMNS)
+        if source is not None:
+            query = query.where(papers_table.c.source == source)
+        if since is not None:
+            query = query.where(papers_table.c.fetched_at >= since)
+        if until is not None:
+            query = query.where(papers_table.c.fetched_at <= until)
+        return query
+
+    def _with_summaries(self, rows):
+        papers = [dict(row._mapping) for row in rows]
+        stored = self.stored_summaries(paper['paper_key'] for paper in papers)
+        for paper in papers:
+            paper.update(stored.get(paper['paper_key'], {}))
+        return papers
+
+    def latest_papers(self, limit=50, after=None, source=None, since=None, until=None):
+        """Newest papers first, one page at a time, with their summaries.
+
+        after is the (fetched_at, id) of the last paper of the previous page;
+        seeking past it on the fetched_at index costs the same on every page,
+        unlike an OFFSET. since and until bound fetched_at.
+        """
+        query = self._listing(source, since, until)
+        if after is not None:
+            fetched_at, paper_id = after
+            query = query.where(
+                (papers_table.c.fetched_at < fetched_at)
+                | ((papers_table.c.fetched_at == fetched_at) & (papers_table.c.id < paper_id))
+            )
+        query = query.order_by(papers_table.c.fetched_at.desc(), papers_table.c.id.desc()).limit(limit)
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        return self._with_summaries(rows)
+
+    def iter_papers(self, batch_size=1000, source=None, since=None, until=None, summaries=True):
+        """Yield every stored paper, with its summaries unless summaries=False, in insertion order"""
+        last_id = 0
+        while True:
+            query = self._listing(source, since, until).where(papers_table.c.id > last_id)
+            query = query.order_by(papers_table.c.id).limit(batch_size)
+            with self.engine.connect() as conn:
+                rows = conn.execute(query).all()
+            if not rows:
+                return
+            yield from self._with_summaries(rows) if summaries else (dict(row._mapping) for row in rows)
+            last_id = rows[-1].id
+
+    def search(self, query, limit=20, source=None, since=None, raw=False, until=None):
+        """Stored papers matching a full-text query, best BM25 match first.
+
+        Every word of query must appear in the title, abstract or a summary;
+        English word endings are folded ('trials' finds 'trial'). Pass
+        raw=True to use FTS5 query syntax (OR, NEAR, "phrases", prefix*).
+        source, since and until (datetimes compared with fetched_at)
+        narrow the results. Each result has paper_key, source, title, year, url,
+        fetched_at, score (higher is better) and an abstract snippet.
+        """
+        expression = query if raw else match_query(query)
+        if not expression.strip():
+            return []
+        conditions, params = [], {'expression': expression, 'limit': limit}
+        if source is not None:
+            conditions.append('p.source = :source')
+            params['source'] = source
+        if since is not None:
+            conditions.append('p.fetched_at >= :since')
+            params['since'] = since
+        if until is not None and self._fetched_since(until):
+            conditions.append('p.fetched_at <= :until')
+            params['until'] = until
+        if conditions:
+            # Filters on papers must see every match before the limit is applied
+            sql = (
+                'SELECT p.paper_key, p.source, p.title, p.year, p.url, p.fetched_at, paper_search.rank AS rank, '
+                "snippet(paper_search, 1, '[', ']', '...', 16) AS snippet "
+                'FROM paper_search JOIN papers p ON p.id = paper_search.rowid '
+                f"WHERE paper_search MATCH :expression AND {' AND '.join(conditions)} "
+                'ORDER BY paper_search.rank LIMIT :limit'
+            )
+        else:
+            # Ranking inside the index alone lets FTS5 keep only the top rows instead of sorting every match
+            sql = (
+                'SELECT p.paper_key, p.source, p.title, p.year, p.url, p.fetched_at, m.rank AS rank, m.snippet '
+                'FROM (SELECT rowid, rank, '
+                "snippet(paper_search, 1, '[', ']', '...', 16) AS snippet "
+                'FROM paper_search WHERE paper_search MATCH :expression ORDER BY rank LIMIT :limit) m '
+                'JOIN papers p ON p.id = m.rowid ORDER BY m.rank'
+            )
+        stmt = text(sql).columns(fetched_at=DateTime)
+        for name in ('since', 'until'):
+            if name in params:
+                stmt = stmt.bindparams(bindparam(name, type_=DateTime))
+        with self.engine.connect() as conn:
+            rows = conn.execute(stmt, params).mappings().all()
+        return [
+            {**{k: v for k, v in row.items() if k != 'rank'}, 'score': -row['rank']}
+            for row in rows
+        ]
+
+    def _fetched_since(self, moment):
+        """Whether any paper was fetched after moment; usually not, which keeps searches on the fast path"""
+        query = select(papers_table.c.id).where(papers_table.c.fetched_at > moment).limit(1)
+        with self.engine.connect() as conn:
+            return conn.execute(query).first() is not None
+
+    def optimize_search_index(self):
+        """Merge the index's incremental segments into one, for the fastest queries"""
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO paper_search (paper_search) VALUES ('optimize')")
+
+    def watermarks(self, source):
+        """Return {query: harvested_until} for one source"""
+        query = select(watermarks_table).where(watermarks_table.c.source == source)
+        with self.engine.connect() as conn:
+            return {row.query: row.harvested_until for row in conn.execute(query)}
+
+    def set_watermarks(self, marks):
+        """Record {(source, query): harvested_until}; a watermark never moves backwards"""
+        rows = [
+            {'source': source, 'query': query, 'harvested_until': until}
+            for (source, query), until in marks.items()
+        ]
+        if not rows:
+            return 0
+
+        stmt = insert(watermarks_table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['source', 'query'],
+            set_={'harvested_until': func.max(watermarks_table.c.harvested_until, stmt.excluded.harvested_until)}
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt, rows)
+        return len(rows)
+
+    def backup(self, force=False):
+        """Snapshot the database if the newest backup is older than backup_interval_hours.
+
+        Uses SQLite's online backup API so a consistent copy is taken even while
+        the database is in use, then deletes the oldest snapshots beyond max_backups.
+        """
+        os.makedirs(self.backup_dir, exist_ok=True)
+        name = os.path.splitext(os.path.basename(self.path))[0]
+        existing = sorted(f for f in os.listdir(self.backup_dir) if f.startswith(name + '_') and f.endswith('.db'))
+
+        if existing and not force:
+            newest = os.path.getmtime(os.path.join(self.backup_dir, existing[-1]))
+            interval = timedelta(hours=DATABASE_CONFIG['backup_interval_hours'])
+            if datetime.now() - datetime.fromtimestamp(newest) < interval:
+                return None
+
+        backup_file = os.path.join(self.backup_dir, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+        source = sqlite3.connect(self.path)
+        target = sqlite3.connect(backup_file)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+        existing.append(os.path.basename(backup_file))
+        for old in sorted(set(existing))[:-DATABASE_CONFIG['max_backups']]:
+            os.remove(os.path.join(self.backup_dir, old))
+        return backup_file
+
+    def close(self):
+        self.engine.dispose()
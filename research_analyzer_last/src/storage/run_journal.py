@@ -0,0 +1,89 @@
+import os
+import json
+from datetime import datetime
+from config.config import JOURNAL_CONFIG
+from src.storage.paper_store import SUMMARY_PREFIX, paper_key, _is_error
+
+class RunJournal:
+    """Append-only JSON-lines log of one analysis run.
+
+    Every fetched paper and every successful (paper, model) summary is written
+    and flushed as soon as it exists, so a crashed or stalled run can be
+    replayed with replay() and continued without repeating finished work.
+    """
+    def __init__(self, run_id=None, directory=None):
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.directory = directory or JOURNAL_CONFIG['directory']
+        self.path = os.path.join(self.directory, f"{self.run_id}.jsonl")
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = None
+
+    @classmethod
+    def resume(cls, run_id, directory=None):
+        """Open the journal of an earlier run; raises FileNotFoundError if there is none"""
+        journal = cls(run_id, directory)
+        if not os.path.exists(journal.path):
+            raise FileNotFoundError(f"No journal for run {run_id} at {journal.path}")
+        return journal
+
+    def _append(self, entry):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+            # Terminate a line left half-written by a crash so the next entry starts clean
+            if self._file.tell() and not self._ends_with_newline():
+                self._file.write('\n')
+        self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+        self._file.flush()
+        if JOURNAL_CONFIG['fsync']:
+            os.fsync(self._file.fileno())
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def record_paper(self, paper):
+        fields = {k: v for k, v in paper.items() if not k.startswith(SUMMARY_PREFIX)}
+        self._append({'type': 'paper', 'key': paper_key(paper), 'paper': fields})
+
+    def record_summary(self, paper, model, summary):
+        # Errors are left out so a resumed run retries them
+        if not _is_error(summary):
+            self._append({'type': 'summary', 'key': paper_key(paper), 'model': model, 'summary': summary})
+
+    def record_search_complete(self, marks):
+        """Note that every search finished, with the watermarks to save once the run completes"""
+        self._append({
+            'type': 'search_complete',
+            'marks': [[source, query, until.isoformat()] for (source, query), until in marks.items()]
+        })
+
+    def record_run_complete(self):
+        self._append({'type': 'run_complete'})
+
+    def replay(self):
+        """Return (papers with their journaled summaries, harvest marks or None if search was cut short)"""
+        papers = {}
+        marks = None
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; the entries around it are intact
+                    continue
+                if entry['type'] == 'paper':
+                    papers.setdefault(entry['key'], entry['paper'])
+                elif entry['type'] == 'summary' and entry['key'] in papers:
+                    papers[entry['key']][f"{SUMMARY_PREFIX}{entry['model']}"] = entry['summary']
+                elif entry['type'] == 'search_complete':
+                    marks = {
+                        (source, query): datetime.fromisoformat(until)
+                        for source, query, until in entry['marks']
+                    }
+        return list(papers.values()), marks
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
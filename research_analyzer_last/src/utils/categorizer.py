@@ -0,0 +1,67 @@
+import re
+from bisect import bisect_right
+from config.config import CATEGORY_TAXONOMY, DEFAULT_CATEGORY
+
+# Between documents in a batch; contains no word characters, so no term can match across it
+SEPARATOR = '\n\x00\n'
+
+def term_pattern(term):
+    """Regex for one taxonomy term: whole words, any whitespace between words, '*' for a word prefix"""
+    prefix = term.endswith('*')
+    words = term.rstrip('*').lower().split()
+    pattern = r'\s+'.join(re.escape(word) for word in words)
+    if prefix:
+        pattern += r'\w*'
+    return rf"\b{pattern}\b"
+
+class Categorizer:
+    """Assigns taxonomy categories with one compiled regex over all terms.
+
+    Each category is one named group of the combined pattern, so a single scan
+    of the text finds every category at once. categorize_papers() scans a
+    whole batch as one string and caches the result on each record.
+    """
+    def __init__(self, taxonomy=None, default=None):
+        self.taxonomy = taxonomy or CATEGORY_TAXONOMY
+        self.default = default or DEFAULT_CATEGORY
+        self.groups = {}
+        alternatives = []
+        for i, (category, terms) in enumerate(self.taxonomy.items()):
+            self.groups[f"c{i}"] = category
+            alternatives.append(f"(?P<c{i}>{'|'.join(term_pattern(term) for term in terms)})")
+        self.pattern = re.compile('|'.join(alternatives), re.IGNORECASE)
+        self.order = {category: i for i, category in enumerate(self.taxonomy)}
+
+    def _ordered(self, found):
+        return sorted(found, key=self.order.get) or [self.default]
+
+    def categorize(self, title, abstract=''):
+        found = {self.groups[m.lastgroup] for m in self.pattern.finditer(f"{title} {abstract}")}
+        return self._ordered(found)
+
+    def categorize_papers(self, papers):
+        """Categories for every paper, computed in one scan and cached as paper['categories']"""
+        pending = [paper for paper in papers if 'categories' not in paper]
+        if pending:
+            texts = [f"{paper.get('title', '')} {paper.get('abstract', '')}" for paper in pending]
+            starts = []
+            offset = 0
+            for text in texts:
+                starts.append(offset)
+                offset += len(text) + len(SEPARATOR)
+
+            found = [set() for _ in pending]
+            for match in self.pattern.finditer(SEPARATOR.join(texts)):
+                found[bisect_right(starts, match.start()) - 1].add(self.groups[match.lastgroup])
+            for paper, categories in zip(pending, found):
+                paper['categories'] = self._ordered(categories)
+        return [paper['categories'] for paper in papers]
+
+_default = None
+
+def default_categorizer():
+    """Shared Categorizer for the configured taxonomy, compiled on first use"""
+    global _default
+    if _default is None:
+        _default = Categorizer()
+    return _default
@@ -0,0 +1,129 @@
+import re
+import hashlib
+import numpy as np
+from config.config import DEDUP_CONFIG
+
+# Large Mersenne prime for the universal hash family used by MinHash
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+DOI_PREFIX = re.compile(r'^(https?://(dx\.)?doi\.org/|doi:)')
+TOKEN = re.compile(r'[a-z0-9]+')
+
+def exact_ids(paper):
+    """Normalized source identifiers of a paper, e.g. {'pmid:123', 'doi:10.1101/x'}"""
+    ids = set()
+    pmid = str(paper.get('pmid') or '').strip()
+    if pmid:
+        ids.add(f"pmid:{pmid}")
+    doi = DOI_PREFIX.sub('', str(paper.get('doi') or '').strip().lower())
+    if doi:
+        ids.add(f"doi:{doi}")
+    nct_id = str(paper.get('nct_id') or '').strip().upper()
+    if nct_id:
+        ids.add(f"nct:{nct_id}")
+    return ids
+
+def shingles(text, size=3):
+    """Overlapping word n-grams of the lowercased, punctuation-free text"""
+    tokens = TOKEN.findall(str(text).lower())
+    if len(tokens) <= size:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+class DedupIndex:
+    """Finds papers already seen under the same ID or with near-identical text.
+
+    Exact matches go through a dict of normalized PMIDs, DOIs and NCT IDs.
+    Near duplicates (a preprint and its journal version, the same trial listed
+    twice) are found with MinHash signatures over title + abstract shingles,
+    bucketed by LSH bands so each lookup only compares against the few papers
+    sharing a band rather than every paper indexed.
+    """
+    def __init__(self, threshold=None, num_perm=None, bands=None, shingle_size=None):
+        self.threshold = threshold or DEDUP_CONFIG['threshold']
+        self.num_perm = num_perm or DEDUP_CONFIG['num_perm']
+        self.bands = bands or DEDUP_CONFIG['bands']
+        self.rows = self.num_perm // self.bands
+        self.shingle_size = shingle_size or DEDUP_CONFIG['shingle_size']
+
+        # Fixed seed so signatures are comparable across runs and processes
+        generator = np.random.RandomState(1)
+        self._a = generator.randint(1, 1 << 61, self.num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 61, self.num_perm, dtype=np.uint64)
+
+        self.papers = []
+        self._ids = {}
+        self._signatures = []
+        self._buckets = [{} for _ in range(self.bands)]
+
+    def __len__(self):
+        return len(self.papers)
+
+    def signature(self, paper):
+        """MinHash signature of the paper's title and abstract, or None if it has no text"""
+        text = f"{paper.get('title', '')} {paper.get('abstract', '')}"
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return None
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=4).digest(), 'little') for g in grams],
+            dtype=np.uint64
+        )
+        # One row per permutation: (a * h + b) mod p, then the minimum over shingles
+        with np.errstate(over='ignore'):
+            permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME
+        return (permuted & MAX_HASH).min(axis=1)
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _match(self, paper, signature):
+        for paper_id in exact_ids(paper):
+            if paper_id in self._ids:
+                return self._ids[paper_id]
+        if signature is None:
+            return None
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        for position in sorted(candidates):
+            if np.mean(self._signatures[position] == signature) >= self.threshold:
+                return position
+        return None
+
+    def find(self, paper):
+        """Return the indexed paper this one duplicates, or None"""
+        position = self._match(paper, self.signature(paper))
+        return self.papers[position] if position is not None else None
+
+    def add(self, paper):
+        """Index a paper unless it duplicates one already indexed.
+
+        Returns (kept_paper, is_new). A duplicate's IDs are registered against
+        the kept paper, so later copies under any of those IDs also match.
+        """
+        signature = self.signature(paper)
+        position = self._match(paper, signature)
+        if position is not None:
+            for paper_id in exact_ids(paper):
+                self._ids.setdefault(paper_id, position)
+            return self.papers[position], False
+
+        position = len(self.papers)
+        self.papers.append(paper)
+        self._signatures.append(signature)
+        for paper_id in exact_ids(paper):
+            self._ids[paper_id] = position
+        if signature is not None:
+            for band, key in self._band_keys(signature):
+                self._buckets[band].setdefault(key, []).append(position)
+        return paper, True
+
+def deduplicate(papers, index=None):
+    """Drop papers that repeat an earlier one, keeping the first occurrence and order"""
+    if not DEDUP_CONFIG['enabled']:
+        return list(papers)
+    index = index if index is not None else DedupIndex()
+    return [paper for paper in papers if index.add(paper)[1]]
@@ -0,0 +1,99 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from config.config import RATE_LIMIT_CONFIG
+
+# Status codes that mean "slow down and try again" rather than a hard failure
+RETRY_STATUSES = {429, 503}
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (seconds or HTTP date) into seconds to wait"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class RateLimiter:
+    """Token bucket for a single host, shared by async and blocking callers.
+
+    Tokens refill at requests_per_second up to burst. A caller that finds the
+    bucket empty reserves the next token and sleeps until it is due, so waiters
+    are served in arrival order. backoff() pauses the whole bucket after a 429/503
+    and restarts refilling when the pause ends, so callers queued behind it are
+    released one at a time at the normal rate instead of all at once.
+    """
+    def __init__(self, requests_per_second, burst=1, backoff_base=None, backoff_max=None):
+        self.rate = requests_per_second
+        self.capacity = burst
+        self.backoff_base = backoff_base or RATE_LIMIT_CONFIG['backoff_base']
+        self.backoff_max = backoff_max or RATE_LIMIT_CONFIG['backoff_max']
+        self._tokens = float(burst)
+        # Refill origin; lies in the future while the bucket is paused by backoff()
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            return max(0.0, self._updated - now) + max(0.0, -self._tokens) / self.rate
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    async def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def backoff(self, attempt, retry_after=None):
+        """Pause the bucket after a throttled response and return the delay applied.
+
+        An explicit Retry-After wins; otherwise the delay grows exponentially
+        with full jitter so that concurrent callers do not retry in lockstep.
+        """
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now + delay > self._updated:
+                # Only one request may go out when the pause ends; the rest follow at the normal rate
+                self._tokens = min(self._tokens, 1.0)
+                self._updated = now + delay
+        return delay
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(url):
+    """Return the process-wide token bucket for the host of the given URL"""
+    host = urlparse(url).hostname or url
+    with _limiters_lock:
+        if host not in _limiters:
+            settings = RATE_LIMIT_CONFIG['hosts'].get(host, RATE_LIMIT_CONFIG['default'])
+            _limiters[host] = RateLimiter(settings['requests_per_second'], settings['burst'])
+        return _limiters[host]
@@ -0,0 +1,173 @@
+import os
+import re
+import json
+import zlib
+from collections import Counter
+import numpy as np
+from config.config import SEARCH_TOPICS, ANALYSIS_SETTINGS
+
+TOKEN = re.compile(r'[a-z0-9]+')
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it', 'new',
+    'of', 'on', 'or', 'that', 'the', 'to', 'was', 'were', 'with', 'we', 'this', 'these', 'than',
+    # Structured-abstract headings say nothing about the topic
+    'background', 'objective', 'objectives', 'methods', 'results', 'conclusion', 'conclusions'
+}
+# Written both ways in abstracts; split so either form matches the other
+COMPOUNDS = {
+    'healthcare': ('health', 'care')
+}
+# Checked in order; the first suffix that leaves a stem of at least three letters is removed
+SUFFIXES = ('ment', 'ing', 'ed', 'e')
+
+# min_relevance_score values above this were written for the old keyword-share score
+LEGACY_SCORE_THRESHOLD = 0.5
+
+# Config field names that records carry under another name
+FIELD_ALIASES = {
+    'publication_date': ('publication_date', 'year', 'date')
+}
+
+def stem(token):
+    """Fold plurals ('studies' -> 'study') and common endings ('treatment', 'treated' -> 'treat')"""
+    if len(token) > 4 and token.endswith('ies'):
+        token = token[:-3] + 'y'
+    elif token.endswith('sses'):
+        token = token[:-2]
+    elif len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        token = token[:-1]
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+def terms(text):
+    """Lowercased, stemmed tokens without stop words"""
+    return [
+        stem(part)
+        for token in TOKEN.findall(str(text).lower()) if token not in STOP_WORDS
+        for part in COMPOUNDS.get(token, (token,))
+    ]
+
+def has_required_fields(paper, fields):
+    return all(any(paper.get(name) for name in FIELD_ALIASES.get(field, (field,))) for field in fields)
+
+def build_idf_table(texts):
+    """Document frequencies of every term over texts, in the form load_idf_table() reads"""
+    frequencies = Counter()
+    documents = 0
+    for text in texts:
+        frequencies.update(set(terms(text)))
+        documents += 1
+    return {'documents': documents, 'frequencies': dict(frequencies)}
+
+def load_idf_table(path=None):
+    """The saved document-frequency table, or None when none has been built"""
+    path = path or ANALYSIS_SETTINGS['relevance_idf_path']
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_idf_table(table, path=None):
+    path = path or ANALYSIS_SETTINGS['relevance_idf_path']
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(table, f)
+
+class RelevanceScorer:
+    """Scores each paper against the query that retrieved it by TF-IDF cosine similarity.
+
+    Papers carry that query in 'search_query'; a paper without one is scored
+    against its best-matching search topic. Terms are hashed into sparse
+    vectors with sublinear term frequencies. IDF weights come from a fixed
+    document-frequency table (see build_idf_table), so a paper gets the same
+    score whatever else is scored with it, in any run; without a table every
+    term weighs the same.
+    """
+    def __init__(self, topics=None, n_features=2 ** 18, min_score=None, required_fields=None, idf_table=None):
+        if topics is None:
+            topics = [topic for group in SEARCH_TOPICS.values() for topic in group]
+        self.topics = list(topics)
+        self.n_features = n_features
+        self.min_score = ANALYSIS_SETTINGS['min_relevance_score'] if min_score is None else min_score
+        if self.min_score > LEGACY_SCORE_THRESHOLD:
+            print(f"Warning: min_relevance_score {self.min_score} is on the old keyword-share scale and will drop "
+                  f"nearly every paper; scores are now TF-IDF cosine, where on-topic abstracts score about 0.06-0.4")
+        if required_fields is None:
+            required_fields = ANALYSIS_SETTINGS['required_fields']
+        self.required_fields = list(required_fields)
+        self.idf = self._idf_weights(load_idf_table() if idf_table is None else idf_table)
+
+    def _feature(self, term):
+        return zlib.crc32(term.encode('utf-8')) % self.n_features
+
+    def _idf_weights(self, table):
+        """Smoothed IDF per hashed feature, as in scikit-learn; terms the table lacks weigh as the rarest"""
+        if not table:
+            return np.ones(self.n_features)
+        documents = table['documents']
+        idf = np.full(self.n_features, np.log(1 + documents) + 1)
+        for term, frequency in table['frequencies'].items():
+            idf[self._feature(term)] = np.log((1 + documents) / (1 + frequency)) + 1
+        return idf
+
+    def _vectors(self, texts):
+        """L2-normalized TF-IDF rows, one per text"""
+        from scipy import sparse
+        rows, cols, counts = [], [], []
+        for row, text in enumerate(texts):
+            for feature, count in Counter(self._feature(term) for term in terms(text)).items():
+                rows.append(row)
+                cols.append(feature)
+                counts.append(count)
+        tf = np.log(np.asarray(counts, dtype=np.float64)) + 1 if counts else np.zeros(0)
+        weights = tf * self.idf[np.asarray(cols, dtype=np.int64)]
+        matrix = sparse.csr_matrix((weights, (rows, cols)), shape=(len(texts), self.n_features))
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ matrix
+
+    def score(self, papers):
+        """Relevance of each paper in [0, 1], computed for the whole batch in one pass"""
+        if not papers:
+            return np.zeros(0)
+        queries = list(dict.fromkeys(self.topics + [p['search_query'] for p in papers if p.get('search_query')]))
+        columns = {query: i for i, query in enumerate(queries)}
+        docs = self._vectors([f"{paper.get('title', '')} {paper.get('abstract', '')}" for paper in papers])
+        similarity = (docs @ self._vectors(queries).T).toarray()
+        best_topic = similarity[:, :len(self.topics)].max(axis=1) if self.topics else np.zeros(len(papers))
+        return np.array([
+            similarity[i, columns[paper['search_query']]] if paper.get('search_query') else best_topic[i]
+            for i, paper in enumerate(papers)
+        ])
+
+    def filter(self, papers):
+        """Papers with every required field and a score of at least min_score, each tagged with its score"""
+        papers = [paper for paper in papers if has_required_fields(paper, self.required_fields)]
+        kept = []
+        for paper, score in zip(papers, self.score(papers)):
+            paper['relevance_score'] = round(float(score), 3)
+            if score >= self.min_score:
+                kept.append(paper)
+        return kept
+
+def build_from_store(path=None):
+    """Freeze document frequencies over every paper in the store as the IDF table"""
+    from src.storage.paper_store import PaperStore
+    store = PaperStore()
+    try:
+        table = build_idf_table(
+            f"{paper['title']} {paper['abstract'] or ''}" for paper in store.iter_papers(summaries=False)
+        )
+    finally:
+        store.close()
+    save_idf_table(table, path)
+    print(f"Saved document frequencies of {len(table['frequencies'])} terms "
+          f"over {table['documents']} papers to {path or ANALYSIS_SETTINGS['relevance_idf_path']}")
+    return table
+
+if __name__ == "__main__":
+    build_from_store()
@@ -1,38 +1,36 @@
 from fpdf import FPDF
-import os
+import io
 from datetime import datetime
-import matplotlib.pyplot as plt
+from functools import lru_cache
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from collections import Counter
 import textwrap
 import re
-
-def clean_text(text):
-    """Clean text to remove unsupported characters"""
-    if not isinstance(text, str):
-        return str(text)
-    # Replace special characters with closest ASCII equivalent
-    text = text.encode('ascii', 'replace').decode()
-    # Remove any remaining non-printable characters
-    text = ''.join(char if ord(char) < 128 else '?' for char in text)
-    return text
+from src.utils.categorizer import default_categorizer
+from src.utils.report_layout import clean_text, layout_papers, render_section, LayoutCache
 
 def categorize_paper(title, abstract):
     """Categorize paper based on title and abstract"""
-    text = (title + " " + abstract).lower()
-    categories = []
-    
-    if any(term in text for term in ['treatment', 'therapy', 'therapeutic', 'drug', 'medication']):
-        categories.append('Treatment & Therapeutics')
-    if any(term in text for term in ['diagnostic', 'diagnosis', 'detection', 'screening', 'imaging']):
-        categories.append('Diagnostics & Detection')
-    if any(term in text for term in ['device', 'technology', 'equipment', 'instrument']):
-        categories.append('Medical Devices')
-    if any(term in text for term in ['public health', 'population', 'epidemiology', 'prevention']):
-        categories.append('Public Health')
-    if any(term in text for term in ['clinical trial', 'phase', 'randomized']):
-        categories.append('Clinical Trials')
-    
-    return categories or ['Other Research']
+    return default_categorizer().categorize(title, abstract)
+
+@lru_cache(maxsize=32)
+def statistics_chart(source_counts, category_counts):
+    """PNG bytes of the source and category pie charts, for tuples of (label, count) pairs.
+
+    Drawn on a standalone Agg figure rather than through pyplot, so no GUI
+    backend is loaded and reports rendering at the same time share no state.
+    Cached on the counts, since reruns over the same papers repeat them.
+    """
+    fig = Figure(figsize=(8, 6))
+    FigureCanvasAgg(fig)
+    for position, title, counts in ((1, 'Papers by Source', source_counts), (2, 'Papers by Category', category_counts)):
+        ax = fig.add_subplot(1, 2, position)
+        ax.pie([count for _, count in counts], labels=[label for label, _ in counts], autopct='%1.1f%%')
+        ax.set_title(title)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    return buffer.getvalue()
 
 class ResearchReport(FPDF):
     def __init__(self):
@@ -75,38 +73,21 @@ class ResearchReport(FPDF):
         
         # Count papers by category
         category_counts = Counter()
-        for paper in papers:
-            categories = categorize_paper(paper['title'], paper.get('abstract', ''))
+        for categories in default_categorizer().categorize_papers(papers):
             for category in categories:
                 category_counts[category] += 1
         
-        # Create source distribution pie chart
-        plt.figure(figsize=(8, 6))
-        plt.subplot(1, 2, 1)
-        plt.pie(source_counts.values(), labels=source_counts.keys(), autopct='%1.1f%%')
-        plt.title('Papers by Source')
-        
-        # Create category distribution pie chart
-        plt.subplot(1, 2, 2)
-        plt.pie(category_counts.values(), labels=category_counts.keys(), autopct='%1.1f%%')
-        plt.title('Papers by Category')
-        
-        # Save the plot to a temporary file
-        temp_plot = 'temp_plot.png'
-        plt.savefig(temp_plot, bbox_inches='tight')
-        plt.close()
-        
-        # Add the plot to the PDF
-        self.image(temp_plot, x=10, w=190)
+        # Source and category distribution pie charts, drawn in memory
+        chart = statistics_chart(tuple(source_counts.items()), tuple(category_counts.items()))
+        self.image(io.BytesIO(chart), x=10, w=190)
         self.ln(10)
-        
-        # Clean up
-        os.remove(temp_plot)
 
-def generate_report(papers, output_file='medical_research_report.pdf'):
+def generate_report(papers, output_file='medical_research_report.pdf', layout_cache=None):
     """Generate a PDF report from the analyzed papers."""
     
     pdf = ResearchReport()
+    # One scan over every abstract; the statistics and sections below read the cached result
+    default_categorizer().categorize_papers(papers)
     
     # Title Page
     pdf.set_font('Helvetica', 'B', 24)
@@ -126,8 +107,7 @@ def generate_report(papers, output_file='medical_research_report.pdf'):
     # Categorize papers
     papers_by_category = {}
     for paper in papers:
-        categories = categorize_paper(paper['title'], paper.get('abstract', ''))
-        for category in categories:
+        for category in paper['categories']:
             if category not in papers_by_category:
                 papers_by_category[category] = []
             papers_by_category[category].append(paper)
@@ -148,42 +128,16 @@ def generate_report(papers, output_file='medical_research_report.pdf'):
     pdf.add_page()
     pdf.chapter_title("Detailed Findings")
     
+    # Entries are laid out up front (cached by content, new ones in parallel) and drawn in order
+    cache = layout_cache or LayoutCache()
+    try:
+        entries = iter(layout_papers([paper for group in papers_by_category.values() for paper in group], cache))
+    finally:
+        if layout_cache is None:
+            cache.close()
     for category, category_papers in papers_by_category.items():
         if category_papers:
-            pdf.set_font('Helvetica', 'B', 14)
-            pdf.ln(5)
-            pdf.cell(0, 10, clean_text(category), 0, 1, 'L')
-            pdf.ln(5)
-            
-            for i, paper in enumerate(category_papers, 1):
-                # Paper title
-                pdf.set_font('Helvetica', 'B', 12)
-                pdf.cell(0, 10, clean_text(f"{i}. {paper['title']}"), 0, 1, 'L')
-                
-                # Paper details
-                pdf.set_font('Helvetica', '', 10)
-                pdf.cell(0, 5, clean_text(f"Source: {paper['source']}"), 0, 1, 'L')
-                pdf.cell(0, 5, clean_text(f"Authors: {paper.get('authors', 'N/A')}"), 0, 1, 'L')
-                pdf.cell(0, 5, clean_text(f"Year: {paper.get('year', 'N/A')}"), 0, 1, 'L')
-                
-                # Abstract
-                if paper.get('abstract'):
-                    pdf.ln(5)
-                    pdf.set_font('Helvetica', 'I', 10)
-                    abstract_text = paper['abstract'][:500] + '...' if len(paper['abstract']) > 500 else paper['abstract']
-                    pdf.multi_cell(0, 5, clean_text(abstract_text))
-                
-                # Add summaries if available
-                for model_name, summary in paper.items():
-                    if model_name.startswith('summary_'):
-                        pdf.ln(5)
-                        pdf.set_font('Helvetica', 'B', 10)
-                        pdf.cell(0, 5, f"{model_name.replace('summary_', '').title()} Summary:", 0, 1, 'L')
-                        pdf.set_font('Helvetica', '', 10)
-                        summary_text = summary[:300] + '...' if len(summary) > 300 else summary
-                        pdf.multi_cell(0, 5, clean_text(summary_text))
-                
-                pdf.ln(10)
+            render_section(pdf, category, [next(entries) for _ in category_papers])
     
     # Recommendations
     pdf.add_page()
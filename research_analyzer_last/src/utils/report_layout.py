@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from fpdf import FPDF
+from config.config import REPORT_CONFIG
+
+def clean_text(text):
+    """Clean text to remove unsupported characters"""
+    if not isinstance(text, str):
+        return str(text)
+    # Replace special characters with closest ASCII equivalent
+    text = text.encode('ascii', 'replace').decode()
+    # Remove any remaining non-printable characters
+    text = ''.join(char if ord(char) < 128 else '?' for char in text)
+    return text
+
+def _paper_content(paper):
+    """The fields a paper's entry in the Detailed Findings is drawn from"""
+    content = {field: paper.get(field) for field in ('title', 'source', 'authors', 'year', 'abstract')}
+    content['summaries'] = [[name, summary] for name, summary in paper.items() if name.startswith('summary_')]
+    return content
+
+def layout_key(paper):
+    """Content hash of a paper's entry; an unchanged paper reuses its cached layout"""
+    material = json.dumps(_paper_content(paper), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+def layout_paper(paper, scratch=None):
+    """Lay out one paper's entry as a list of drawing operations.
+
+    Text cleaning, truncation and line breaking all happen here, against a
+    scratch document with the report's page width, so drawing the entry with
+    render_section() only places ready-made lines. Operations are
+    ['font', style, size], ['ln', height], ['lines', height, [text, ...]] and
+    ['title', text], which is numbered when drawn since the number depends
+    on the entry's place in its category.
+    """
+    if scratch is None:
+        scratch = FPDF()
+        scratch.add_page()
+
+    def wrapped(style, text):
+        scratch.set_font('Helvetica', style, 10)
+        return scratch.multi_cell(0, 5, clean_text(text), dry_run=True, output='LINES')
+
+    # Paper title and details
+    ops = [
+        ['font', 'B', 12],
+        ['title', clean_text(paper['title'])],
+        ['font', '', 10],
+        ['lines', 5, [
+            clean_text(f"Source: {paper['source']}"),
+            clean_text(f"Authors: {paper.get('authors', 'N/A')}"),
+            clean_text(f"Year: {paper.get('year', 'N/A')}")
+        ]]
+    ]
+
+    # Abstract
+    if paper.get('abstract'):
+        abstract_text = paper['abstract'][:500] + '...' if len(paper['abstract']) > 500 else paper['abstract']
+        ops.extend([['ln', 5], ['font', 'I', 10], ['lines', 5, wrapped('I', abstract_text)]])
+
+    # Add summaries if available
+    for model_name, summary in paper.items():
+        if model_name.startswith('summary_'):
+            summary = str(summary)
+            summary_text = summary[:300] + '...' if len(summary) > 300 else summary
+            ops.extend([
+                ['ln', 5],
+                ['font', 'B', 10],
+                ['lines', 5, [f"{model_name.replace('summary_', '').title()} Summary:"]],
+                ['font', '', 10],
+                ['lines', 5, wrapped('', summary_text)]
+            ])
+
+    ops.append(['ln', 10])
+    return ops
+
+def _layout_chunk(papers):
+    # Worker entry point: one scratch document serves the whole chunk
+    scratch = FPDF()
+    scratch.add_page()
+    return [layout_paper(paper, scratch) for paper in papers]
+
+class LayoutCache:
+    """SQLite store of laid-out paper entries keyed by layout_key().
+
+    Entries are kept until the file holds more than max_entries, then the
+    least recently used are dropped. WAL mode lets several report runs share
+    the file.
+    """
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or REPORT_CONFIG['layout_cache_path']
+        self.max_entries = max_entries or REPORT_CONFIG['layout_cache_entries']
+        self.stats = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS layouts ('
+                'key TEXT PRIMARY KEY, ops TEXT NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS ix_layouts_accessed ON layouts (accessed_at)')
+        return self._db
+
+    def get_many(self, keys):
+        """Cached operations for whichever keys have them"""
+        keys = list(set(keys))
+        found = {}
+        with self._lock:
+            db = self._connection()
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = db.execute(f'SELECT key, ops FROM layouts WHERE key IN ({placeholders})', chunk)
+                found.update((key, json.loads(ops)) for key, ops in rows)
+            db.executemany('UPDATE layouts SET accessed_at = ? WHERE key = ?', [(time.time(), key) for key in found])
+            db.commit()
+        self.stats['hits'] += len(found)
+        self.stats['misses'] += len(keys) - len(found)
+        return found
+
+    def set_many(self, layouts):
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            db.executemany(
+                'INSERT OR REPLACE INTO layouts (key, ops, accessed_at) VALUES (?, ?, ?)',
+                [(key, json.dumps(ops), now) for key, ops in layouts.items()]
+            )
+            excess = db.execute('SELECT COUNT(*) FROM layouts').fetchone()[0] - self.max_entries
+            if excess > 0:
+                db.execute(
+                    'DELETE FROM layouts WHERE key IN '
+                    '(SELECT key FROM layouts ORDER BY accessed_at LIMIT ?)', (excess,)
+                )
+            db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+def _pool_context():
+    # The daemon lays out reports from a worker thread; forking a threaded process can deadlock the child
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+def layout_papers(papers, cache=None, workers=None):
+    """Operations for each paper, in order: from the cache, or laid out in a process pool.
+
+    Only papers absent from the cache are laid out, so a report over mostly
+    familiar papers costs little more than drawing it. Fewer than
+    parallel_min_papers new papers are laid out in-process, where starting a
+    pool would cost more than it saves.
+    """
+    keys = [layout_key(paper) for paper in papers]
+    layouts = cache.get_many(keys) if cache is not None else {}
+    missing = {}
+    for key, paper in zip(keys, papers):
+        if key not in layouts:
+            missing.setdefault(key, paper)
+
+    if missing:
+        todo = list(missing.values())
+        if len(todo) >= REPORT_CONFIG['parallel_min_papers']:
+            workers = workers or REPORT_CONFIG['render_workers'] or os.cpu_count() or 1
+            # A few chunks per worker keeps them all busy until the end
+            size = -(-len(todo) // (4 * workers))
+            chunks = [todo[start:start + size] for start in range(0, len(todo), size)]
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+                fresh = [ops for chunk in pool.map(_layout_chunk, chunks) for ops in chunk]
+        else:
+            fresh = _layout_chunk(todo)
+        fresh = dict(zip(missing, fresh))
+        if cache is not None:
+            cache.set_many(fresh)
+        layouts.update(fresh)
+    return [layouts[key] for key in keys]
+
+def _draw_line(pdf, height, text):
+    # What cell(0, height, text, 0, 1, 'L') draws, without its per-call text measuring
+    if pdf.y + height > pdf.page_break_trigger and pdf.accept_page_break:
+        pdf.add_page()
+    pdf.text(pdf.l_margin + pdf.c_margin, pdf.y + 0.5 * height + 0.3 * pdf.font_size, text)
+    pdf.x = pdf.l_margin
+    pdf.y += height
+
+def render_section(pdf, category, entries):
+    """Draw a category heading and its laid-out paper entries, numbered in order"""
+    pdf.set_font('Helvetica', 'B', 14)
+    pdf.ln(5)
+    pdf.cell(0, 10, clean_text(category), 0, 1, 'L')
+    pdf.ln(5)
+    for i, ops in enumerate(entries, 1):
+        for op in ops:
+            if op[0] == 'font':
+                pdf.set_font('Helvetica', op[1], op[2])
+            elif op[0] == 'ln':
+                pdf.ln(op[1])
+            elif op[0] == 'title':
+                _draw_line(pdf, 10, f"{i}. {op[1]}")
+            else:
+                for line in op[2]:
+                    _draw_line(pdf, op[1], line)
@@ -0,0 +1,29 @@
+import threading
+from config.config import HTTP_CONFIG
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def _load_provider():
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            try:
+                from fake_useragent import UserAgent
+                _provider = UserAgent()
+            except Exception as e:
+                print(f"Could not load user agent data, using the fallback: {str(e)}")
+                _provider = False
+        return _provider
+
+def random_user_agent():
+    """A browser User-Agent string from the process-wide provider, loaded on first use"""
+    if HTTP_CONFIG['user_agent']:
+        return HTTP_CONFIG['user_agent']
+    provider = _provider if _provider is not None else _load_provider()
+    if provider:
+        try:
+            return provider.random
+        except Exception:
+            pass
+    return HTTP_CONFIG['fallback_user_agent']
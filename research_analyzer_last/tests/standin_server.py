@@ -0,0 +1,160 @@
+"""Local aiohttp stand-in for the PubMed, ClinicalTrials.gov and medRxiv APIs"""
+from aiohttp import web
+from config.config import SEARCH_TOPICS
+
+ESEARCH_XML = """<?xml version="1.0"?>
+<eSearchResult><Count>{count}</Count><QueryKey>{query_key}</QueryKey><WebEnv>{webenv}</WebEnv>
+<IdList>{ids}</IdList></eSearchResult>"""
+
+EPOST_XML = """<?xml version="1.0"?>
+<ePostResult><QueryKey>{query_key}</QueryKey><WebEnv>{webenv}</WebEnv></ePostResult>"""
+
+WEBENV = 'STANDIN_WEBENV'
+
+
+ARTICLE_XML = """<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>
+<ArticleTitle>Stand-in article {pmid}</ArticleTitle>
+<Abstract><AbstractText>Abstract for article {pmid}.</AbstractText></Abstract>
+<AuthorList><Author><LastName>Doe</LastName><ForeName>Jane</ForeName></Author></AuthorList>
+<Journal><JournalIssue><PubDate><Year>2024</Year></PubDate></JournalIssue></Journal>
+</Article></MedlineCitation></PubmedArticle>"""
+
+
+def topic_preprints(copies=3):
+    """medRxiv details records mentioning each configured search topic"""
+    topics = [topic for group in SEARCH_TOPICS.values() for topic in group]
+    return [{
+        'doi': f'10.1101/2024.01.{i:03d}',
+        'title': f'Stand-in preprint {i}',
+        'abstract': f'A quantitative study of {topic}.',
+        'authors': 'Doe, J.; Roe, R.',
+        'date': f'2024-01-{1 + i % 28:02d}',
+        'category': 'health informatics'
+    } for i, topic in enumerate(topics * copies)]
+
+
+class StandInServer:
+    """Serves canned API responses and records which client connections were used"""
+    def __init__(self, pubmed_results=None, medrxiv_preprints=None):
+        self.peers = set()
+        self.requests = []
+        # term -> PMIDs; unknown terms get 1000, 1001, ...
+        self.pubmed_results = pubmed_results or {}
+        self.history = {}
+        self.medrxiv_preprints = topic_preprints() if medrxiv_preprints is None else medrxiv_preprints
+        self.app = web.Application()
+        self.app.router.add_get('/entrez/eutils/esearch.fcgi', self.esearch)
+        self.app.router.add_post('/entrez/eutils/epost.fcgi', self.epost)
+        self.app.router.add_get('/entrez/eutils/efetch.fcgi', self.efetch)
+        self.app.router.add_get('/api/query/study_fields', self.clinical_trials)
+        self.app.router.add_get('/details/medrxiv/{start}/{end}/{cursor}', self.medrxiv)
+        self.runner = None
+        self.base_url = None
+
+    @property
+    def connections(self):
+        """Number of distinct TCP connections the server has seen"""
+        return len(self.peers)
+
+    def _record(self, request, params=None):
+        self.peers.add(request.transport.get_extra_info('peername'))
+        self.requests.append((request.path, params or dict(request.query)))
+
+    def _store(self, pmids):
+        query_key = str(len(self.history) + 1)
+        self.history[query_key] = pmids
+        return query_key
+
+    async def esearch(self, request):
+        self._record(request)
+        limit = int(request.query.get('retmax', 5))
+        term = request.query.get('term', '')
+        pmids = self.pubmed_results.get(term, [str(1000 + i) for i in range(limit)])
+        query_key = self._store(pmids)
+        ids = ''.join(f'<Id>{pmid}</Id>' for pmid in pmids[:limit])
+        return web.Response(
+            text=ESEARCH_XML.format(count=len(pmids), query_key=query_key, webenv=WEBENV, ids=ids),
+            content_type='text/xml'
+        )
+
+    async def epost(self, request):
+        data = await request.post()
+        self._record(request, dict(data))
+        query_key = self._store(data['id'].split(','))
+        return web.Response(text=EPOST_XML.format(query_key=query_key, webenv=WEBENV), content_type='text/xml')
+
+    async def efetch(self, request):
+        self._record(request)
+        if 'query_key' in request.query:
+            retstart = int(request.query.get('retstart', 0))
+            retmax = int(request.query.get('retmax', 20))
+            pmids = self.history[request.query['query_key']][retstart:retstart + retmax]
+        else:
+            pmids = request.query.get('id', '').split(',')
+        articles = ''.join(ARTICLE_XML.format(pmid=pmid) for pmid in pmids if pmid)
+        return web.Response(text=f'<PubmedArticleSet>{articles}</PubmedArticleSet>', content_type='text/xml')
+
+    async def clinical_trials(self, request):
+        self._record(request)
+        limit = int(request.query.get('max_rnk', 5))
+        studies = [{
+            'NCTId': [f'NCT{i:08d}'],
+            'BriefTitle': [f'Stand-in trial {i}'],
+            'BriefSummary': [f'Summary for trial {i}.'],
+            'LocationFacility': ['Stand-in Hospital'],
+            'StartDate': ['2024-01-01']
+        } for i in range(limit)]
+        return web.json_response({'StudyFieldsResponse': {'StudyFields': studies}})
+
+    async def medrxiv(self, request):
+        """The interval's preprints from the cursor on, 100 per page like the real API"""
+        self._record(request)
+        cursor = int(request.match_info['cursor'])
+        page = self.medrxiv_preprints[cursor:cursor + 100]
+        return web.json_response({
+            'messages': [{'status': 'ok', 'cursor': cursor, 'count': len(page),
+                          'total': len(self.medrxiv_preprints)}],
+            'collection': page
+        })
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f'http://127.0.0.1:{port}'
+        return self
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    def point_scraper(self, scraper):
+        """Redirect a scraper's base URL to this server"""
+        paths = {
+            'PubMedScraper': '/entrez/eutils',
+            'ClinicalTrialsScraper': '/api/query/study_fields',
+            'MedRxivScraper': '/details/medrxiv'
+        }
+        scraper.base_url = self.base_url + paths[type(scraper).__name__]
+        return scraper
+
+
+class FlakyEndpoint:
+    """Handler that answers with a throttling status a set number of times before succeeding"""
+    def __init__(self, failures, status=429, retry_after=None):
+        self.failures = failures
+        self.status = status
+        self.retry_after = retry_after
+        self.calls = 0
+
+    async def handle(self, request):
+        self.calls += 1
+        if self.calls <= self.failures:
+            headers = {'Retry-After': self.retry_after} if self.retry_after is not None else {}
+            return web.Response(status=self.status, headers=headers)
+        return web.json_response({
+            'messages': [{'status': 'ok', 'total': 1}],
+            'collection': [{'title': 'Recovered', 'abstract': 'ok', 'date': '2024-01-01'}]
+        })
@@ -0,0 +1,102 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from src.api.service import create_app
+from src.storage.paper_store import PaperStore
+
+
+def make_papers(n, source='PubMed'):
+    return [
+        {'pmid': f'{source}{i}', 'title': f'Statin therapy study {i}', 'abstract': f'Randomized screening cohort {i}.',
+         'source': source, 'year': '2024', 'url': f'https://example.org/{i}'}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def service(tmp_path):
+    store = PaperStore(str(tmp_path / 'papers.db'), str(tmp_path / 'backups'))
+    store.upsert_papers(make_papers(5))
+    store.upsert_papers(make_papers(2, source='medRxiv'))
+    store.upsert_summaries([dict(make_papers(1)[0], summary_bart='Statins helped.')])
+    store.record_run('run1', 7)
+    results = tmp_path / 'results'
+    results.mkdir()
+    with TestClient(create_app(store, str(results))) as client:
+        yield client, store, results
+    store.close()
+
+
+def test_keyset_pages_cover_every_paper_once(service):
+    client, store, _ = service
+    seen = []
+    cursor = None
+    while True:
+        params = {'limit': 3}
+        if cursor:
+            params['cursor'] = cursor
+        page = client.get('/api/papers', params=params).json()
+        assert page['run_id'] == 'run1'
+        seen.extend(paper['paper_key'] for paper in page['papers'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 7
+    summarized = [p for p in client.get('/api/papers', params={'source': 'PubMed'}).json()['papers']
+                  if p.get('summary_bart')]
+    assert [p['paper_key'] for p in summarized] == ['pmid:pubmed0']
+    assert client.get('/api/papers', params={'cursor': 'not-a-cursor'}).status_code == 400
+
+
+def test_etag_and_cache_follow_the_run(service):
+    client, store, _ = service
+    first = client.get('/api/search', params={'q': 'statin'})
+    assert first.status_code == 200
+    assert len(first.json()['results']) == 7
+    etag = first.headers['etag']
+    assert client.get('/api/search', params={'q': 'statin'}, headers={'If-None-Match': etag}).status_code == 304
+
+    # Papers from a run in progress are not served until it completes
+    store.upsert_papers(make_papers(1, source='ClinicalTrials.gov'))
+    assert client.get('/api/search', params={'q': 'statin'}).content == first.content
+    store.record_run('run2', 1)
+    fresh = client.get('/api/search', params={'q': 'statin'}, headers={'If-None-Match': etag})
+    assert fresh.status_code == 200
+    assert fresh.headers['etag'] != etag
+    assert len(fresh.json()['results']) == 8
+
+
+def test_category_counts(service):
+    client, _, _ = service
+    body = client.get('/api/categories').json()
+    assert body['total'] == 7
+    assert body['counts']['Treatment & Therapeutics'] == 7
+    assert body['counts']['Diagnostics & Detection'] == 7
+
+
+def test_streaming_exports(service):
+    client, _, _ = service
+    lines = client.get('/api/export').text.splitlines()
+    assert len(lines) == 7
+    assert json.loads(lines[0])['summary_bart'] == 'Statins helped.'
+
+    response = client.get('/api/export', params={'format': 'csv', 'source': 'medRxiv'})
+    assert response.headers['content-type'].startswith('text/csv')
+    rows = response.text.splitlines()
+    assert rows[0].startswith('paper_key,source')
+    assert len(rows) == 3
+    assert client.get('/api/export', params={'format': 'xml'}).status_code == 422
+
+
+def test_report_download(service):
+    client, _, results = service
+    assert client.get('/api/latest-report').status_code == 404
+    (results / 'medical_research_report_run1.pdf').write_bytes(b'%PDF-1.4 report')
+
+    response = client.get('/api/latest-report', params={'autoDownload': 'true'})
+    assert response.content == b'%PDF-1.4 report'
+    assert response.headers['content-disposition'].startswith('attachment')
+    etag = response.headers['etag']
+    assert client.get('/api/reports/run1', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/reports/..%2Fsecrets').status_code == 404
+    assert client.get('/api/report-info').json()['filename'] == 'medical_research_report_run1.pdf'
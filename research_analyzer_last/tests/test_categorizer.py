@@ -0,0 +1,37 @@
+from src.utils.categorizer import Categorizer, default_categorizer, term_pattern
+from src.utils.report_generator import categorize_paper
+
+
+def test_terms_match_whole_words_only():
+    categorizer = default_categorizer()
+    assert categorizer.categorize('Phaseolus vulgaris yields', 'Bean crops.') == ['Other Research']
+    assert categorizer.categorize('A phase 3 study', '') == ['Clinical Trials']
+    assert categorizer.categorize('Therapeutic devices', 'New drugs and\nclinical   trials') == [
+        'Treatment & Therapeutics', 'Medical Devices', 'Clinical Trials'
+    ]
+    assert categorize_paper('Population screening', '') == ['Diagnostics & Detection', 'Public Health']
+
+
+def test_prefix_terms():
+    assert term_pattern('therap*') == r'\btherap\w*\b'
+    categorizer = Categorizer({'Genomics': ['genom*', 'gene']}, default='None')
+    assert categorizer.categorize('Genomic screening', '') == ['Genomics']
+    assert categorizer.categorize('Generic findings', '') == ['None']
+
+
+def test_batch_matches_single_papers_and_caches():
+    categorizer = Categorizer()
+    papers = [
+        {'title': 'Imaging for diagnosis', 'abstract': 'device'},
+        {'title': 'Unrelated', 'abstract': 'Nothing here'},
+        {'title': 'Randomized', 'abstract': 'drug treatment'},
+    ] * 1000
+    papers = [dict(paper) for paper in papers]
+
+    results = categorizer.categorize_papers(papers)
+    assert results == [categorizer.categorize(p['title'], p['abstract']) for p in papers]
+    assert papers[1]['categories'] == ['Other Research']
+
+    # Cached on the record: a second call does not rescan
+    papers[0]['categories'] = ['Sentinel']
+    assert categorizer.categorize_papers(papers[:1]) == [['Sentinel']]
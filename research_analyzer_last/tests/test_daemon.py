@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from src.core.daemon import AnalysisDaemon
+from src.core.run_lock import RunLock
+from src.storage.paper_store import PaperStore
+
+
+class FakeSessions:
+    async def close(self):
+        pass
+
+
+class FakeAnalyzer:
+    def __init__(self, store, fail=False):
+        self.store = store
+        self.session_manager = FakeSessions()
+        self.models = {'bart': object()}
+        self.fail = fail
+        self.calls = 0
+
+    async def run_analysis(self):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise RuntimeError('source unavailable')
+        return [{'title': 'A'}]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PaperStore(str(tmp_path / 'papers.db'), str(tmp_path / 'backups'))
+    yield store
+    store.close()
+
+
+def test_run_lock_is_exclusive(tmp_path):
+    first = RunLock(str(tmp_path / 'run.lock'))
+    second = RunLock(str(tmp_path / 'run.lock'))
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+@pytest.mark.asyncio
+async def test_triggers_during_a_run_coalesce(store, tmp_path):
+    analyzer = FakeAnalyzer(store)
+    daemon = AnalysisDaemon(analyzer, lock=RunLock(str(tmp_path / 'run.lock')))
+    assert len(daemon.scheduler.jobs) == 2
+    assert daemon.trigger()
+    assert not daemon.trigger()
+    assert not daemon.trigger()
+    await daemon.current
+    assert analyzer.calls == 2
+    assert daemon.last_run['status'] == 'ok'
+    assert daemon.last_run['papers'] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_skipped_while_another_process_holds_the_lock(store, tmp_path):
+    analyzer = FakeAnalyzer(store)
+    daemon = AnalysisDaemon(analyzer, lock=RunLock(str(tmp_path / 'run.lock')))
+    other = RunLock(str(tmp_path / 'run.lock'))
+    assert other.acquire()
+    assert await daemon.run_once() is None
+    other.release()
+    assert analyzer.calls == 0
+    assert daemon.last_run['status'] == 'skipped'
+
+
+def test_health_reports_failed_run(store, tmp_path):
+    analyzer = FakeAnalyzer(store, fail=True)
+    daemon = AnalysisDaemon(analyzer, lock=RunLock(str(tmp_path / 'run.lock')))
+    with TestClient(daemon.create_app(str(tmp_path))) as client:
+        healthy = client.get('/health')
+        assert healthy.status_code == 200
+        assert healthy.json()['models'] == ['bart']
+        asyncio.run(daemon.run_once())
+        failed = client.get('/health')
+        assert failed.status_code == 503
+        assert failed.json()['last_run']['error'] == 'source unavailable'
+        # The API routes are served alongside
+        assert client.get('/api/test').status_code == 200
+
+
+def test_missing_service_packages_name_the_extra(capsys):
+    import main
+    assert main.has_packages('--daemon', 'fastapi')
+    assert not main.has_packages('--daemon', 'fastapi', 'no_such_package')
+    out = capsys.readouterr().out
+    assert '(no_such_package)' in out and 'pip install -e .[service]' in out
@@ -0,0 +1,67 @@
+import random
+from src.utils.dedup import DedupIndex, deduplicate, exact_ids, shingles
+
+ABSTRACT = ('We evaluated a wearable sensor for continuous glucose monitoring in 120 adults '
+            'with type 2 diabetes over six months and compared readings against laboratory '
+            'measurements, finding a mean absolute relative difference of nine percent.')
+
+
+def paper(**fields):
+    record = {'title': 'Wearable glucose sensor accuracy in type 2 diabetes', 'abstract': ABSTRACT}
+    record.update(fields)
+    return record
+
+
+def random_paper(rng, n):
+    words = [f'term{rng.randrange(5000)}' for _ in range(60)]
+    return {'pmid': str(n), 'title': ' '.join(words[:10]), 'abstract': ' '.join(words[10:])}
+
+
+def test_exact_ids_are_normalized():
+    assert exact_ids({'pmid': ' 123 ', 'doi': 'https://doi.org/10.1101/ABC', 'nct_id': 'nct0001'}) == {
+        'pmid:123', 'doi:10.1101/abc', 'nct:NCT0001'
+    }
+    assert shingles('A, b c!', size=3) == {'a b c'}
+
+
+def test_same_doi_across_sources_is_one_paper():
+    pubmed = paper(pmid='1', doi='10.1101/2024.01.01', source='PubMed', title='Different title entirely')
+    medrxiv = paper(doi='doi:10.1101/2024.01.01', source='medRxiv', abstract='Unrelated preprint text.')
+    assert deduplicate([pubmed, medrxiv]) == [pubmed]
+
+
+def test_near_identical_text_without_shared_ids_is_caught():
+    original = paper(pmid='1', source='PubMed')
+    reformatted = paper(doi='10.1101/x', source='medRxiv',
+                        title='Wearable Glucose Sensor Accuracy in Type 2 Diabetes.',
+                        abstract=ABSTRACT.replace('nine percent', '9 percent'))
+    different = paper(pmid='2', title='Robotic surgery outcomes',
+                      abstract='A registry study of robotic prostatectomy complications in 800 patients.')
+    assert deduplicate([original, reformatted, different]) == [original, different]
+
+
+def test_duplicate_ids_point_at_the_kept_paper():
+    index = DedupIndex()
+    kept, is_new = index.add(paper(pmid='1'))
+    assert is_new
+    # Matched on text, so its DOI is now known to belong to the kept paper
+    assert index.add(paper(doi='10.1/a'))[1] is False
+    assert index.find({'doi': '10.1/A', 'title': 'x', 'abstract': 'y'}) is kept
+    assert len(index) == 1
+
+
+def test_lookups_only_compare_against_band_candidates():
+    rng = random.Random(7)
+    index = DedupIndex()
+    for n in range(5000):
+        index.add(random_paper(rng, n))
+    assert len(index) == 5000
+
+    probe = dict(index.papers[1234], pmid=None)
+    signature = index.signature(probe)
+    candidates = set()
+    for band, key in index._band_keys(signature):
+        candidates.update(index._buckets[band].get(key, ()))
+    assert 1234 in candidates
+    assert len(candidates) < 10
+    assert index.find(probe) is index.papers[1234]
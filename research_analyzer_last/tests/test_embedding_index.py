@@ -0,0 +1,85 @@
+import time
+import numpy as np
+import pytest
+from config.config import EMBEDDING_CONFIG
+from src.storage.embedding_index import EmbeddingIndex, normalize
+
+DIM = 32
+
+
+def clustered_vectors(n, clusters=50, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIM))
+    labels = rng.integers(clusters, size=n)
+    return normalize(centers[labels] + 0.3 * rng.normal(size=(n, DIM)))
+
+
+def test_exact_search_and_incremental_adds(tmp_path):
+    index = EmbeddingIndex(str(tmp_path), dimension=DIM)
+    vectors = clustered_vectors(300)
+    assert index.add([f'k{i}' for i in range(200)], vectors[:200]) == 200
+    # Known keys are skipped; the file grows past its first capacity without losing rows
+    assert index.add([f'k{i}' for i in range(150, 300)], vectors[150:300]) == 100
+    assert len(index) == 300
+
+    top = index.search(vectors[42], k=5)
+    assert top[0][0] == 'k42' and top[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert [score for _, score in top] == sorted((score for _, score in top), reverse=True)
+    assert 'k42' not in [key for key, _ in index.similar('k42', k=5)]
+    index.close()
+
+    reopened = EmbeddingIndex(str(tmp_path))
+    assert len(reopened) == 300 and 'k299' in reopened
+    assert reopened.search(vectors[299], k=1)[0][0] == 'k299'
+    with pytest.raises(ValueError):
+        EmbeddingIndex(str(tmp_path), dimension=DIM + 1)
+
+
+def test_uncommitted_keys_from_an_interrupted_add_are_dropped(tmp_path):
+    vectors = clustered_vectors(3)
+    index = EmbeddingIndex(str(tmp_path), dimension=DIM)
+    index.add(['a', 'b'], vectors[:2])
+    index.close()
+    # An add() that wrote its key but died before committing the count
+    with open(tmp_path / 'keys.txt', 'a', encoding='utf-8') as f:
+        f.write('ghost\n')
+
+    index = EmbeddingIndex(str(tmp_path))
+    assert index.keys == ['a', 'b']
+    index.add(['c'], vectors[2:])
+    index.close()
+
+    reopened = EmbeddingIndex(str(tmp_path))
+    assert reopened.keys == ['a', 'b', 'c']
+    assert reopened.search(vectors[2], k=1)[0][0] == 'c'
+    assert (tmp_path / 'keys.txt').read_text(encoding='utf-8') == 'a\nb\nc\n'
+
+
+def test_ivf_recall_against_exact_search(tmp_path, monkeypatch):
+    monkeypatch.setitem(EMBEDDING_CONFIG, 'train_threshold', 5000)
+    monkeypatch.setitem(EMBEDDING_CONFIG, 'nprobe', 8)
+    vectors = clustered_vectors(20000)
+    keys = [f'k{i}' for i in range(len(vectors))]
+
+    index = EmbeddingIndex(str(tmp_path), dimension=DIM)
+    for start in range(0, 10000, 2500):
+        index.add(keys[start:start + 2500], vectors[start:start + 2500])
+    assert index.centroids is not None and index.trained_count == 5000
+    # Added after training: routed to their nearest list, then refit at 4x growth
+    index.add(keys[10000:], vectors[10000:])
+    assert index.trained_count == 20000
+
+    queries = clustered_vectors(50, seed=1)
+    exact = vectors @ queries.T
+    hits = 0
+    started = time.perf_counter()
+    for q in range(len(queries)):
+        truth = {keys[i] for i in np.argsort(-exact[:, q])[:10]}
+        hits += len(truth & {key for key, _ in index.search(queries[q], k=10)})
+    per_query = (time.perf_counter() - started) / len(queries)
+    assert hits / (10 * len(queries)) > 0.9
+    assert per_query < 0.05
+
+    reopened = EmbeddingIndex(str(tmp_path))
+    assert reopened.centroids is not None
+    assert reopened.search(vectors[12345], k=1)[0][0] == 'k12345'
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+transformers = pytest.importorskip('transformers')
+from tokenizers import Tokenizer, models, pre_tokenizers
+from src.models.embeddings import SentenceEncoder
+
+WORDS = 'cancer screening trial drug therapy heart device imaging'.split()
+
+
+@pytest.fixture
+def tiny_encoder(monkeypatch):
+    vocab = {'[PAD]': 0, '[UNK]': 1}
+    vocab.update({word: i + 2 for i, word in enumerate(WORDS)})
+    backend = Tokenizer(models.WordLevel(vocab, unk_token='[UNK]'))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = transformers.PreTrainedTokenizerFast(tokenizer_object=backend, pad_token='[PAD]', unk_token='[UNK]')
+    config = transformers.BertConfig(vocab_size=len(vocab), hidden_size=16, num_hidden_layers=1,
+                                     num_attention_heads=2, intermediate_size=32, max_position_embeddings=64)
+    torch.manual_seed(0)
+    model = transformers.BertModel(config).eval()
+    monkeypatch.setattr(transformers.AutoTokenizer, 'from_pretrained', lambda name: tokenizer)
+    monkeypatch.setattr(transformers.AutoModel, 'from_pretrained', lambda name: model)
+    monkeypatch.setattr(SentenceEncoder, '_loaded', {})
+    return SentenceEncoder('tiny-bert', batch_size=2, max_input_tokens=32)
+
+
+def test_vectors_are_normalized_and_independent_of_batching(tiny_encoder):
+    texts = ['cancer screening trial', 'drug', 'heart device imaging therapy drug', 'trial']
+    vectors = tiny_encoder.encode(texts)
+
+    assert vectors.shape == (4, 16) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+    # Padding inside a batch must not change a text's embedding
+    for text, vector in zip(texts, vectors):
+        assert np.allclose(tiny_encoder.encode([text])[0], vector, atol=1e-5)
+    assert tiny_encoder.dimension == 16
@@ -0,0 +1,37 @@
+import sys
+import subprocess
+from benchmarks.bench_import_time import ROOT, IMPORT_BUDGETS_MS, import_time_ms, over_budget
+
+HEAVY = ['pandas', 'matplotlib', 'fpdf', 'pyarrow', 'tqdm', 'bs4', 'fake_useragent', 'aiohttp', 'requests', 'scipy']
+
+
+def loaded_after_import(module, candidates):
+    code = f"import sys, {module}; print(' '.join(m for m in {candidates!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return output.stdout.split()
+
+
+def test_heavy_modules_load_on_first_use():
+    assert loaded_after_import('src.core.paper_analyzer', HEAVY) == []
+    assert loaded_after_import('main', HEAVY + ['sqlalchemy', 'numpy']) == []
+
+
+def test_cold_imports_within_budget():
+    assert import_time_ms('main', repeats=1) > 0
+    assert over_budget(IMPORT_BUDGETS_MS) == {}
+
+
+def test_user_agent_provider_is_shared(monkeypatch):
+    from config.config import HTTP_CONFIG
+    from src.utils import user_agent
+    from src.scrapers.medical_scrapers import PubMedScraper, MedRxivScraper
+    loads = []
+    monkeypatch.setattr(user_agent, '_provider', None)
+    original = user_agent._load_provider
+    monkeypatch.setattr(user_agent, '_load_provider', lambda: loads.append(1) or original())
+    scrapers = [PubMedScraper(), MedRxivScraper(), PubMedScraper()]
+    assert len(loads) == 1
+    assert all(scraper.headers['User-Agent'] for scraper in scrapers)
+
+    monkeypatch.setitem(HTTP_CONFIG, 'user_agent', 'research-analyzer/1.0')
+    assert PubMedScraper().headers['User-Agent'] == 'research-analyzer/1.0'
@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from src.models.llm_modules import HuggingFaceInferenceLLM
+
+
+class RecordingLLM(HuggingFaceInferenceLLM):
+    """Replaces the HTTP call with a summary of fixed length and records each input"""
+    def __init__(self, model_key, summary_chars=400):
+        super().__init__(model_key)
+        self.api_key = 'test-key'
+        self.summary_chars = summary_chars
+        self.inputs = []
+        self.in_flight = 0
+        self.peak = 0
+
+    def _summarize_chunk(self, text):
+        self.inputs.append(text)
+        return ('s' * self.summary_chars)[:max(1, len(text) // 3)]
+
+    async def _asummarize_chunk(self, session, text):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self._summarize_chunk(text)
+
+
+def long_text(words=2000):
+    return ' '.join(f'word{i:04d}' for i in range(words))
+
+
+def test_chunk_overlap_repeats_trailing_words():
+    llm = HuggingFaceInferenceLLM('bart_cnn')
+    chunks = llm.chunk_text(long_text(30), chunk_size=60, overlap=20)
+    assert len(chunks) > 1
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[0] == previous.split()[-2]
+    assert llm.chunk_text(long_text(30), chunk_size=60) == llm.chunk_text(long_text(30), chunk_size=60, overlap=0)
+
+
+def test_short_text_is_a_single_request():
+    llm = RecordingLLM('bart_cnn')
+    llm.summarize('A short abstract.')
+    assert llm.inputs == ['A short abstract.']
+
+
+def test_partials_that_are_still_too_long_are_reduced_again():
+    llm = RecordingLLM('bart_cnn', summary_chars=400)
+    summary = llm.summarize(long_text(2000))
+    first_level = len(llm.chunk_text(long_text(2000), 1500, 200))
+    # 400 chars per chunk joined is over 2048, so a second map level runs over the partials
+    assert len(llm.inputs) > first_level
+    assert len(summary) <= llm.max_input_chars
+
+
+def test_partials_that_start_with_the_word_error_are_kept():
+    partials = ['Error rates in diagnostic imaging fell.', 'Readers agreed more often.']
+    combined, _ = HuggingFaceInferenceLLM._reduce('x' * 1000, partials, 0)
+    assert combined == ' '.join(partials)
+    assert HuggingFaceInferenceLLM._reduce('x' * 1000, ['fine', 'Error: HTTP 503'], 0) == ('Error: HTTP 503', False)
+
+
+def test_long_input_models_get_the_whole_text():
+    llm = RecordingLLM('led_base')
+    text = long_text(2000)
+    llm.summarize(text)
+    assert llm.inputs == [text]
+    assert llm._build_payload(text)['inputs'] == text
+
+
+@pytest.mark.asyncio
+async def test_async_chunks_are_dispatched_concurrently():
+    llm = RecordingLLM('bart_cnn', summary_chars=100)
+    await llm.asummarize(long_text(1000), session=object())
+    assert llm.peak == len(llm.chunk_text(long_text(1000), 1500, 200))
+    assert llm.peak > 1
@@ -0,0 +1,73 @@
+import pytest
+
+torch = pytest.importorskip('torch')
+transformers = pytest.importorskip('transformers')
+from tokenizers import Tokenizer, models, pre_tokenizers
+from src.models.llm_modules import LocalTransformersLLM
+
+WORDS = 'the a trial drug therapy patients improved outcomes study results cancer screening'.split()
+
+
+def tiny_model_and_tokenizer():
+    """Randomly initialised BART small enough to build offline in milliseconds"""
+    vocab = {'<pad>': 0, '<s>': 1, '</s>': 2, '<unk>': 3}
+    vocab.update({word: i + 4 for i, word in enumerate(WORDS)})
+    backend = Tokenizer(models.WordLevel(vocab, unk_token='<unk>'))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=backend, pad_token='<pad>', bos_token='<s>', eos_token='</s>', unk_token='<unk>'
+    )
+    config = transformers.BartConfig(
+        vocab_size=len(vocab), d_model=16, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=32, decoder_ffn_dim=32,
+        max_position_embeddings=64, pad_token_id=0, bos_token_id=1, eos_token_id=2, decoder_start_token_id=2
+    )
+    torch.manual_seed(0)
+    return tokenizer, transformers.BartForConditionalGeneration(config).eval()
+
+
+@pytest.fixture
+def tiny_llm(monkeypatch):
+    tokenizer, model = tiny_model_and_tokenizer()
+    monkeypatch.setattr(transformers.AutoTokenizer, 'from_pretrained', lambda name: tokenizer)
+    monkeypatch.setattr(transformers.AutoModelForSeq2SeqLM, 'from_pretrained', lambda name: model)
+    monkeypatch.setattr(LocalTransformersLLM, '_loaded', {})
+
+    def build(**kwargs):
+        llm = LocalTransformersLLM('tiny-bart', max_input_tokens=32, **kwargs)
+        llm.parameters = {'max_length': 6, 'min_length': 2, 'num_beams': 1}
+        return llm
+    return build
+
+
+def test_batches_are_length_sorted_and_padded_dynamically(tiny_llm):
+    llm = tiny_llm(batch_size=2)
+    tokenizer, model = llm._load()
+    shapes = []
+    generate = model.generate
+
+    def recording_generate(**kwargs):
+        shapes.append(tuple(kwargs['input_ids'].shape))
+        return generate(**kwargs)
+    model.generate = recording_generate
+
+    texts = ['the trial ' * 8, 'drug', 'patients improved ' * 3, 'cancer screening study']
+    summaries = llm.summarize_batch(texts)
+
+    assert len(summaries) == 4 and all(isinstance(s, str) for s in summaries)
+    # Shortest pair first, each padded only to its own longest member
+    assert [rows for rows, _ in shapes] == [2, 2]
+    assert shapes[0][1] < shapes[1][1] < 32
+    # Batching does not change the per-text result or its position
+    assert summaries[1] == llm.summarize(texts[1])
+
+
+def test_weights_load_once_and_can_be_quantized(tiny_llm):
+    first = tiny_llm(quantize=True, num_threads=2)
+    second = tiny_llm(quantize=True)
+    assert first._load() is second._load()
+    assert torch.get_num_threads() == 2
+    _, model = first._load()
+    assert any('quantized' in type(module).__module__ for module in model.modules())
+    assert first.summarize('the drug therapy improved outcomes')
+    assert first.cache_identity() != tiny_llm().cache_identity()
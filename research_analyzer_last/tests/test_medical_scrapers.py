@@ -0,0 +1,172 @@
+import pytest
+from src.scrapers.medical_scrapers import (
+    SessionManager, PubMedScraper, ClinicalTrialsScraper, MedRxivScraper
+)
+from tests.standin_server import StandInServer
+
+QUERIES = ['medical technology innovations', 'healthcare innovations', 'clinical research breakthroughs']
+
+
+async def run_searches(server, session_manager=None):
+    results = []
+    for query in QUERIES:
+        for scraper_cls in (PubMedScraper, ClinicalTrialsScraper, MedRxivScraper):
+            scraper = server.point_scraper(scraper_cls(session_manager))
+            results.extend(await scraper.search(query, limit=2))
+    return results
+
+
+@pytest.mark.asyncio
+async def test_shared_session_reuses_connections():
+    server = await StandInServer().start()
+    try:
+        async with SessionManager() as session_manager:
+            results = await run_searches(server, session_manager)
+        assert len(results) == len(QUERIES) * 3 * 2
+        # Sequential requests through one pool ride a single keep-alive connection
+        assert server.connections == 1
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_unshared_searches_open_a_connection_each():
+    server = await StandInServer().start()
+    try:
+        results = await run_searches(server)
+        assert len(results) == len(QUERIES) * 3 * 2
+        assert server.connections == len(QUERIES) * 3
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_session_manager_recreates_closed_session():
+    session_manager = SessionManager(limit_per_host=2)
+    first = await session_manager.get_session()
+    assert first.connector.limit_per_host == 2
+    await session_manager.close()
+    second = await session_manager.get_session()
+    assert second is not first and not second.closed
+    await session_manager.close()
+
+
+@pytest.mark.asyncio
+async def test_pubmed_batch_dedupes_pmids_and_pages_efetch():
+    server = await StandInServer(pubmed_results={
+        'topic a': ['1', '2', '3', '4'],
+        'topic b': ['3', '4', '5', '6'],
+        'topic c': ['6', '7']
+    }).start()
+    try:
+        async with SessionManager() as session_manager:
+            scraper = server.point_scraper(PubMedScraper(session_manager))
+            scraper.batch_size = 2
+            results = await scraper.search_batch(['topic a', 'topic b', 'topic c'], limit=4,
+                                                 exclude_pmids={'7'})
+
+        assert [a['pmid'] for a in results['topic a']] == ['1', '2', '3', '4']
+        assert [a['pmid'] for a in results['topic b']] == ['5', '6']
+        assert results['topic c'] == []
+        assert results['topic b'][0]['url'] == 'https://pubmed.ncbi.nlm.nih.gov/5/'
+
+        paths = [path for path, _ in server.requests]
+        assert paths.count('/entrez/eutils/esearch.fcgi') == 3
+        assert paths.count('/entrez/eutils/epost.fcgi') == 1
+        # Six unique PMIDs in pages of two, all read from the posted history set
+        efetches = [params for path, params in server.requests if path.endswith('efetch.fcgi')]
+        assert sorted(int(p['retstart']) for p in efetches) == [0, 2, 4]
+        assert all(p['WebEnv'] == 'STANDIN_WEBENV' for p in efetches)
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_pubmed_search_pages_through_history():
+    server = await StandInServer(pubmed_results={'q': [str(n) for n in range(10)]}).start()
+    try:
+        async with SessionManager() as session_manager:
+            scraper = server.point_scraper(PubMedScraper(session_manager))
+            scraper.batch_size = 3
+            articles = await scraper.search('q', limit=7)
+        assert [a['pmid'] for a in articles] == [str(n) for n in range(7)]
+        esearch = server.requests[0][1]
+        assert esearch['usehistory'] == 'y'
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_date_windows_reach_each_api():
+    from datetime import datetime
+
+    server = await StandInServer().start()
+    since, until = datetime(2024, 3, 1), datetime(2024, 3, 8)
+    try:
+        async with SessionManager() as session_manager:
+            for scraper_cls in (PubMedScraper, ClinicalTrialsScraper, MedRxivScraper):
+                scraper = server.point_scraper(scraper_cls(session_manager))
+                assert await scraper.search('q', limit=1, since=since, until=until)
+                assert not scraper.failed_queries
+
+        requests = dict(server.requests)
+        esearch = requests['/entrez/eutils/esearch.fcgi']
+        assert (esearch['datetype'], esearch['mindate'], esearch['maxdate']) == ('edat', '2024/03/01', '2024/03/08')
+        assert requests['/api/query/study_fields']['expr'] == (
+            'q AND AREA[LastUpdatePostDate]RANGE[03/01/2024, 03/08/2024]'
+        )
+        assert '/details/medrxiv/2024-03-01/2024-03-08/0' in requests
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_medrxiv_lists_an_interval_once_and_filters_by_query():
+    from datetime import datetime
+
+    preprints = [{
+        'doi': f'10.1101/2024.03.{i:03d}',
+        'title': f'Preprint {i}',
+        'abstract': 'Statin therapy after stroke.' if i % 50 == 0 else 'Vaccine uptake survey.',
+        'authors': 'Doe, J.; Roe, R.',
+        'date': f'2024-03-{1 + i % 7:02d}'
+    } for i in range(250)]
+    server = await StandInServer(medrxiv_preprints=preprints).start()
+    try:
+        async with SessionManager() as session_manager:
+            scraper = server.point_scraper(MedRxivScraper(session_manager))
+            window = {'since': datetime(2024, 3, 1), 'until': datetime(2024, 3, 8)}
+            statins = await scraper.search('statin therapy', limit=10, **window)
+            vaccines = await scraper.search('vaccine', limit=3, **window)
+
+        # Three pages of 100, fetched for the first topic and reused by the second
+        assert sorted(path for path, _ in server.requests) == [
+            f'/details/medrxiv/2024-03-01/2024-03-08/{cursor}' for cursor in (0, 100, 200)
+        ]
+        assert sorted(paper['doi'][-3:] for paper in statins) == ['000', '050', '100', '150', '200']
+        assert statins[0]['authors'] == 'Doe, J.; Roe, R.'
+        assert len(vaccines) == 3
+        assert [paper['year'] for paper in vaccines] == ['2024'] * 3
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_searches_cut_off_by_the_limit_are_marked_truncated():
+    server = await StandInServer(pubmed_results={'busy': ['1', '2', '3'], 'quiet': ['4']}).start()
+    try:
+        async with SessionManager() as session_manager:
+            scraper = server.point_scraper(PubMedScraper(session_manager))
+            assert len(await scraper.search('busy', limit=2)) == 2
+            await scraper.search('quiet', limit=2)
+            assert scraper.truncated_queries == {'busy'}
+
+            scraper.reset()
+            await scraper.search_batch(['busy', 'quiet'], limit=2)
+            assert scraper.truncated_queries == {'busy'}
+
+            medrxiv = server.point_scraper(MedRxivScraper(session_manager))
+            assert len(await medrxiv.search('healthcare innovations', limit=2)) == 2
+            assert medrxiv.truncated_queries == {'healthcare innovations'}
+    finally:
+        await server.stop()
@@ -0,0 +1,91 @@
+import os
+from datetime import date
+import pyarrow as pa
+import pyarrow.parquet as pq
+from config.config import EXPORT_CONFIG
+from src.storage.paper_export import CsvExporter, ParquetExporter, load_history
+
+COLUMNS = ['source', 'pmid', 'title', 'abstract', 'year', 'relevance_score', 'summary_bart']
+
+
+def paper(i, source='PubMed'):
+    return {'source': source, 'pmid': str(i), 'title': f'Drug trial {i}', 'abstract': 'Randomized treatment study.',
+            'year': '2024', 'relevance_score': i / 10, 'summary_bart': f'Summary {i}'}
+
+
+def export(directory, run_id, papers, run_date):
+    exporter = ParquetExporter(run_id, COLUMNS, str(directory), run_date)
+    for p in papers:
+        exporter.write(p)
+    exporter.close()
+    return exporter
+
+
+def test_partitions_row_groups_and_types(tmp_path, monkeypatch):
+    monkeypatch.setitem(EXPORT_CONFIG, 'row_group_size', 2)
+    papers = [paper(i) for i in range(5)] + [paper(9, source='ClinicalTrials.gov')]
+    export(tmp_path, 'run1', papers, date(2024, 3, 1))
+
+    part = tmp_path / 'date=2024-03-01' / 'source=PubMed' / 'part-run1.parquet'
+    metadata = pq.ParquetFile(part).metadata
+    assert metadata.num_row_groups == 3
+    assert metadata.row_group(0).column(0).compression == 'ZSTD'
+    assert (tmp_path / 'date=2024-03-01' / 'source=ClinicalTrials.gov' / 'part-run1.parquet').exists()
+
+    table = load_history(directory=str(tmp_path), as_pandas=False)
+    assert table.num_rows == 6
+    assert table.schema.field('category').type == pa.dictionary(pa.int32(), pa.string())
+    assert table.schema.field('relevance_score').type == pa.float64()
+    frame = table.to_pandas()
+    row = frame[frame['pmid'] == '9'].iloc[0]
+    assert row['source'] == 'ClinicalTrials.gov'
+    assert row['category'] == 'Treatment & Therapeutics'
+    assert list(row['categories']) == ['Treatment & Therapeutics', 'Clinical Trials']
+
+
+def test_history_filters_across_runs(tmp_path):
+    export(tmp_path, 'run1', [paper(1), paper(2, source='medRxiv')], date(2024, 3, 1))
+    export(tmp_path, 'run2', [paper(3), paper(4)], date(2024, 4, 1))
+
+    recent = load_history([('date', '>=', date(2024, 4, 1))], columns=['pmid', 'run_id'], directory=str(tmp_path))
+    assert sorted(recent['pmid']) == ['3', '4']
+    assert list(recent.columns) == ['pmid', 'run_id']
+    pubmed = load_history([('source', '=', 'PubMed'), ('relevance_score', '<', 0.35)], directory=str(tmp_path))
+    assert sorted(pubmed['pmid']) == ['1', '3']
+    assert load_history(directory=str(tmp_path / 'missing')).empty
+
+
+def test_rerun_replaces_its_own_parts(tmp_path):
+    export(tmp_path, 'run1', [paper(1), paper(2, source='medRxiv')], date(2024, 3, 1))
+    export(tmp_path, 'run2', [paper(3)], date(2024, 3, 1))
+    # A resumed run may finish on a later day; its earlier parts must not be kept alongside
+    export(tmp_path, 'run1', [paper(1)], date(2024, 3, 2))
+
+    history = load_history(directory=str(tmp_path))
+    assert sorted(zip(history['run_id'], history['pmid'])) == [('run1', '1'), ('run2', '3')]
+
+
+def test_history_skips_parts_still_being_written(tmp_path, monkeypatch):
+    monkeypatch.setitem(EXPORT_CONFIG, 'row_group_size', 2)
+    export(tmp_path, 'run1', [paper(1)], date(2024, 3, 1))
+    running = ParquetExporter('run2', COLUMNS, str(tmp_path), date(2024, 3, 1))
+    for i in range(2, 6):
+        running.write(paper(i))
+
+    # run2 has flushed row groups but no footer yet
+    assert sorted(load_history(directory=str(tmp_path))['pmid']) == ['1']
+    running.close()
+    assert sorted(load_history(directory=str(tmp_path))['pmid']) == ['1', '2', '3', '4', '5']
+    assert sorted(os.listdir(tmp_path / 'date=2024-03-01' / 'source=PubMed')) == ['part-run1.parquet', 'part-run2.parquet']
+
+
+def test_csv_exporter_appends_rows(tmp_path):
+    exporter = CsvExporter('run1', COLUMNS, str(tmp_path))
+    exporter.write(paper(1))
+    exporter.write(dict(paper(2), extra='ignored'))
+    exporter.close()
+    with open(exporter.path) as f:
+        lines = f.readlines()
+    assert lines[0].strip() == ','.join(COLUMNS)
+    assert len(lines) == 3
+    assert os.path.basename(exporter.path) == 'medical_research_data_run1.csv'
@@ -0,0 +1,144 @@
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from config.config import DATABASE_CONFIG
+from src.storage.paper_store import PaperStore, paper_key
+
+
+def make_store(tmp_path):
+    return PaperStore(str(tmp_path / 'papers.db'), str(tmp_path / 'backups'))
+
+
+def sample_papers():
+    return [
+        {'pmid': '123', 'title': 'A', 'abstract': 'a', 'source': 'PubMed', 'year': '2024'},
+        {'nct_id': 'NCT0001', 'title': 'B', 'abstract': 'b', 'source': 'ClinicalTrials.gov'},
+        {'doi': '10.1101/x', 'title': 'C', 'abstract': 'c', 'source': 'medRxiv'}
+    ]
+
+
+def test_paper_key_prefers_source_ids():
+    assert [paper_key(p) for p in sample_papers()] == ['pmid:123', 'nct:nct0001', 'doi:10.1101/x']
+    assert paper_key({'title': 'No  IDs'}) == paper_key({'title': 'no ids'})
+
+
+def test_upserts_are_idempotent_and_use_wal(tmp_path):
+    store = make_store(tmp_path)
+    assert store.upsert_papers(sample_papers()) == 3
+    updated = dict(sample_papers()[0], title='A (revised)')
+    store.upsert_papers([updated])
+
+    with store.engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert conn.execute(text('SELECT COUNT(*) FROM papers')).scalar() == 3
+        assert conn.execute(text("SELECT title FROM papers WHERE source_id = '123'")).scalar() == 'A (revised)'
+    store.close()
+
+
+def test_summaries_round_trip_and_skip_errors(tmp_path):
+    store = make_store(tmp_path)
+    papers = sample_papers()
+    store.upsert_papers(papers)
+    papers[0].update({'summary_bart': 'Short summary', 'summary_t5': 'Error: 503'})
+    papers[1].update({'summary_bart': 'Trial summary', 'summary_t5': 'Error rates fell in the treated arm.'})
+    assert store.upsert_summaries(papers) == 3
+
+    stored = store.stored_summaries(paper_key(p) for p in papers)
+    assert stored['pmid:123'] == {'summary_bart': 'Short summary'}
+    assert store.summarized_source_ids('PubMed', ['bart']) == {'123'}
+    assert store.summarized_source_ids('PubMed', ['bart', 't5']) == set()
+    assert store.summarized_source_ids('ClinicalTrials.gov', ['bart', 't5']) == {'NCT0001'}
+    store.close()
+
+
+def test_backups_honour_interval_and_rotation(tmp_path, monkeypatch):
+    monkeypatch.setitem(DATABASE_CONFIG, 'max_backups', 2)
+    store = make_store(tmp_path)
+    store.upsert_papers(sample_papers())
+
+    backup_dir = tmp_path / 'backups'
+    backup_dir.mkdir()
+    for day, stamp in enumerate(('20200101_000000', '20200102_000000')):
+        old = backup_dir / f'papers_{stamp}.db'
+        old.write_bytes(b'')
+        os.utime(old, (1577836800 + day * 86400,) * 2)
+
+    created = store.backup()
+    assert created is not None
+    assert sorted(os.listdir(backup_dir)) == ['papers_20200102_000000.db', os.path.basename(created)]
+    # The new snapshot is fresh, so the interval has not elapsed yet
+    assert store.backup() is None
+    store.close()
+
+
+def test_analyzer_reuses_stored_summaries(tmp_path):
+    from src.core.paper_analyzer import ResearchPaperAnalyzer
+
+    store = make_store(tmp_path)
+    analyzer = ResearchPaperAnalyzer(model_names=['huggingface_flan_t5', 'huggingface_bart_cnn'], store=store)
+    done, partial, new = sample_papers()
+    done.update({'summary_huggingface_flan_t5': 'x', 'summary_huggingface_bart_cnn': 'y'})
+    partial.update({'summary_huggingface_flan_t5': 'z'})
+    store.upsert_papers([done, partial, new])
+    store.upsert_summaries([done, partial])
+
+    fresh = [{k: v for k, v in p.items() if not k.startswith('summary_')} for p in (done, partial, new)]
+    pending = analyzer._apply_stored_summaries(fresh)
+
+    assert [p['title'] for p in pending] == ['B', 'C']
+    assert pending[0]['summary_huggingface_flan_t5'] == 'z'
+    assert store.summarized_source_ids('PubMed', analyzer.models) == {'123'}
+    store.close()
+
+
+def test_watermarks_only_move_forward(tmp_path):
+    from datetime import datetime
+
+    store = make_store(tmp_path)
+    assert store.watermarks('pubmed') == {}
+    store.set_watermarks({('pubmed', 'q1'): datetime(2024, 3, 2), ('medrxiv', 'q1'): datetime(2024, 3, 1)})
+    store.set_watermarks({('pubmed', 'q1'): datetime(2024, 2, 1), ('pubmed', 'q2'): datetime(2024, 3, 5)})
+    assert store.watermarks('pubmed') == {'q1': datetime(2024, 3, 2), 'q2': datetime(2024, 3, 5)}
+    assert store.watermarks('medrxiv') == {'q1': datetime(2024, 3, 1)}
+    store.close()
+
+
+def test_search_ranks_and_updates_incrementally(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert_papers([
+        {'pmid': '1', 'title': 'Statin therapy in heart failure', 'abstract': 'Randomized trials of statins.',
+         'source': 'PubMed'},
+        {'pmid': '2', 'title': 'Sleep and memory', 'abstract': 'Statin use was a covariate in COVID-19 cohorts.',
+         'source': 'PubMed'},
+        {'doi': '10.1101/x', 'title': 'Vaccine uptake', 'abstract': 'Survey of clinics.', 'source': 'medRxiv'}
+    ])
+
+    # Title matches outrank abstract matches; word endings are folded
+    assert [r['paper_key'] for r in store.search('statins')] == ['pmid:1', 'pmid:2']
+    assert store.search('covid-19')[0]['snippet'] == 'Statin use was a covariate in [COVID-19] cohorts.'
+    assert store.search('statin', source='medRxiv') == []
+    assert store.search('"heart failure" OR vaccine', raw=True)[0]['score'] > 0
+    assert len(store.search('heart OR vaccine', raw=True)) == 2
+    assert store.search('   ') == []
+
+    # Summaries and revised metadata replace the paper's indexed text
+    store.upsert_summaries([{'doi': '10.1101/x', 'summary_bart': 'Hesitancy fell after outreach.'}])
+    assert [r['paper_key'] for r in store.search('hesitancy')] == ['doi:10.1101/x']
+    store.upsert_papers([{'pmid': '2', 'title': 'Sleep and memory', 'abstract': 'No drugs.', 'source': 'PubMed'}])
+    assert [r['paper_key'] for r in store.search('statin')] == ['pmid:1']
+    store.optimize_search_index()
+    assert store.search('heart', since=datetime.now() + timedelta(days=1)) == []
+    assert store.search('heart')[0]['fetched_at'] <= datetime.now()
+    store.close()
+
+
+def test_existing_database_is_indexed_on_open(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert_papers(sample_papers())
+    with store.engine.begin() as conn:
+        conn.execute(text('DROP TABLE paper_search'))
+    store.close()
+
+    reopened = make_store(tmp_path)
+    assert [r['paper_key'] for r in reopened.search('b')] == ['nct:nct0001']
+    reopened.close()
@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from src.core.pipeline import stage, batches
+from src.core.paper_analyzer import ResearchPaperAnalyzer
+from src.models.llm_modules import BaseLLM
+
+
+async def numbers(count, produced=None, delay=0):
+    for n in range(count):
+        if produced is not None:
+            produced.append(n)
+        await asyncio.sleep(delay)
+        yield n
+
+
+@pytest.mark.asyncio
+async def test_stage_runs_workers_concurrently():
+    in_flight = peak = 0
+
+    async def double(n):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return n * 2
+
+    results = [r async for r in stage(numbers(12), double, concurrency=3, maxsize=2)]
+    assert sorted(results) == [n * 2 for n in range(12)]
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_holds_back_the_source():
+    produced = []
+
+    async def identity(n):
+        return n
+
+    async for n in stage(numbers(100, produced), identity, concurrency=1, maxsize=2):
+        await asyncio.sleep(0.001)
+        if n == 5:
+            break
+    # Only the bounded queues' worth of items ran ahead of the consumer
+    assert len(produced) <= 5 + 1 + 2 + 1 + 2 + 1
+
+
+@pytest.mark.asyncio
+async def test_worker_errors_reach_the_consumer():
+    async def fail(n):
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        async for _ in stage(numbers(3), fail, concurrency=2):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_batches_take_what_is_ready():
+    sizes = [len(batch) async for batch in batches(numbers(10), size=4, maxsize=10)]
+    assert sum(sizes) == 10
+    assert max(sizes) <= 4
+
+    # With a slow source nothing waits for a full batch
+    slow = [batch async for batch in batches(numbers(3, delay=0.01), size=4, maxsize=10)]
+    assert slow == [[0], [1], [2]]
+
+
+class EchoLLM(BaseLLM):
+    def summarize(self, text):
+        raise AssertionError('the async path should be used')
+
+    async def asummarize(self, text, session=None):
+        await asyncio.sleep(0.01)
+        return 'summary'
+
+
+@pytest.mark.asyncio
+async def test_summaries_start_before_the_search_finishes():
+    analyzer = ResearchPaperAnalyzer(model_names=['huggingface_flan_t5'], summary_cache=False)
+    analyzer.models = {'echo': EchoLLM()}
+    events = []
+
+    async def papers():
+        for n in range(6):
+            events.append(('found', n))
+            await asyncio.sleep(0.02)
+            yield {'title': f'paper {n}', 'abstract': 'Therapeutic advances in care.',
+                   'authors': 'J Doe', 'year': '2024'}
+
+    async for paper in analyzer.stream_summaries(papers()):
+        events.append(('summarized', paper['title']))
+
+    assert [e for e in events if e[0] == 'summarized'] == [('summarized', f'paper {n}') for n in range(6)]
+    assert events.index(('summarized', 'paper 0')) < events.index(('found', 5))
@@ -0,0 +1,59 @@
+import tracemalloc
+from src.scrapers.pubmed_parser import PubMedStreamParser
+
+STRUCTURED_ARTICLE = """<PubmedArticle><MedlineCitation><PMID>111</PMID><Article>
+<Journal><JournalIssue><PubDate><MedlineDate>2023 Nov-Dec</MedlineDate></PubDate></JournalIssue></Journal>
+<ArticleTitle>Effect of <i>drug X</i> on outcomes</ArticleTitle>
+<Abstract>
+<AbstractText Label="BACKGROUND">Why it matters.</AbstractText>
+<AbstractText Label="RESULTS">What we found.</AbstractText>
+</Abstract>
+<AuthorList><Author><LastName>Doe</LastName><ForeName>Jane</ForeName></Author>
+<Author><CollectiveName>Study Group</CollectiveName></Author></AuthorList>
+</Article></MedlineCitation>
+<PubmedData><ArticleIdList><ArticleId IdType="pubmed">111</ArticleId>
+<ArticleId IdType="doi">10.1000/xyz</ArticleId></ArticleIdList></PubmedData></PubmedArticle>"""
+
+PLAIN_ARTICLE = """<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>
+<Journal><JournalIssue><PubDate><Year>2024</Year></PubDate></JournalIssue></Journal>
+<ArticleTitle>Article {pmid}</ArticleTitle>
+<Abstract><AbstractText>Abstract {pmid} with some filler text to give it weight.</AbstractText></Abstract>
+</Article></MedlineCitation></PubmedArticle>"""
+
+
+def test_extracts_all_abstract_sections_and_own_pmid():
+    xml = f"<PubmedArticleSet>{STRUCTURED_ARTICLE}{PLAIN_ARTICLE.format(pmid=222)}</PubmedArticleSet>"
+    parser = PubMedStreamParser()
+    records = []
+    # Feed in small odd-sized chunks so tags straddle chunk boundaries
+    for i in range(0, len(xml), 37):
+        records.extend(parser.feed(xml[i:i + 37]))
+    records.extend(parser.close())
+
+    first, second = records
+    assert first['pmid'] == '111'
+    assert first['title'] == 'Effect of drug X on outcomes'
+    assert first['abstract'] == 'BACKGROUND: Why it matters. RESULTS: What we found.'
+    assert first['authors'] == 'Jane Doe'
+    assert first['year'] == '2023'
+    assert first['doi'] == '10.1000/xyz'
+    assert second['url'] == 'https://pubmed.ncbi.nlm.nih.gov/222/'
+
+
+def test_memory_stays_flat_on_large_responses():
+    count = 10000
+    chunks = ['<PubmedArticleSet>'] + [PLAIN_ARTICLE.format(pmid=n) for n in range(count)] + ['</PubmedArticleSet>']
+    total_bytes = sum(len(chunk) for chunk in chunks)
+
+    parser = PubMedStreamParser()
+    seen = 0
+    tracemalloc.start()
+    for chunk in chunks:
+        seen += len(parser.feed(chunk))
+    seen += len(parser.close())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert seen == count
+    # Parsed articles are released as they close, so the peak is a small fraction of the document
+    assert peak < total_bytes / 20
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import pytest
+from src.scrapers.medical_scrapers import MedRxivScraper, SessionManager
+from src.utils.rate_limiter import RateLimiter, parse_retry_after, get_rate_limiter
+from tests.standin_server import StandInServer, FlakyEndpoint
+
+
+def test_parse_retry_after_seconds_and_http_date():
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    in_ten = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+    assert 8 <= parse_retry_after(in_ten) <= 10
+
+
+@pytest.mark.asyncio
+async def test_burst_is_served_immediately_then_refilled_at_rate():
+    limiter = RateLimiter(requests_per_second=20, burst=5)
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.acquire() for _ in range(5)))
+    assert time.monotonic() - start < 0.02
+    await asyncio.gather(*(limiter.acquire() for _ in range(4)))
+    assert time.monotonic() - start >= 4 / 20 - 0.01
+
+
+def test_backoff_prefers_retry_after_and_caps_jitter():
+    limiter = RateLimiter(requests_per_second=100, backoff_base=0.5, backoff_max=2.0)
+    assert limiter.backoff(0, retry_after='0.05') == 0.05
+    assert all(0 <= limiter.backoff(attempt) <= 2.0 for attempt in range(10))
+
+
+@pytest.mark.asyncio
+async def test_callers_queued_behind_retry_after_are_released_at_rate():
+    limiter = RateLimiter(requests_per_second=20, burst=2)
+    start = time.monotonic()
+    limiter.backoff(0, retry_after='0.2')
+    released = []
+
+    async def request():
+        await limiter.acquire()
+        released.append(time.monotonic() - start)
+
+    await asyncio.gather(*(request() for _ in range(6)))
+    assert released[0] >= 0.2 - 0.01
+    gaps = [later - earlier for earlier, later in zip(released, released[1:])]
+    assert all(gap >= 1 / 20 - 0.01 for gap in gaps)
+
+
+def test_limiters_are_shared_per_host():
+    assert get_rate_limiter('https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi') is \
+        get_rate_limiter('https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi')
+    assert get_rate_limiter('https://eutils.ncbi.nlm.nih.gov/x').rate == 3
+
+
+@pytest.mark.asyncio
+async def test_scraper_retries_throttled_requests():
+    server = StandInServer()
+    flaky = FlakyEndpoint(failures=2, retry_after='0.05')
+    server.app.router.add_get('/flaky/medrxiv/{start}/{end}/{cursor}', flaky.handle)
+    await server.start()
+    try:
+        async with SessionManager() as session_manager:
+            scraper = MedRxivScraper(session_manager)
+            scraper.base_url = server.base_url + '/flaky/medrxiv'
+            papers = await scraper.search('recovered')
+        assert flaky.calls == 3
+        assert papers[0]['title'] == 'Recovered'
+    finally:
+        await server.stop()
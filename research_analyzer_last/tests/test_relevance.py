@@ -0,0 +1,192 @@
+from config.config import ANALYSIS_SETTINGS
+from src.utils.relevance import (
+    RelevanceScorer, has_required_fields, terms, build_idf_table, save_idf_table, load_idf_table
+)
+
+TOPICS = ['medical device innovations', 'infectious disease research']
+
+# (query that retrieved it, title, abstract) in the shape of PubMed esearch/efetch results
+RELEVANT = [
+    ('new medical treatments',
+     'Pembrolizumab plus chemotherapy in metastatic non-small-cell lung cancer',
+     'Background: First-line therapy for advanced non-small-cell lung cancer (NSCLC) without targetable '
+     'mutations has relied on platinum-based chemotherapy. Methods: In this double-blind phase 3 trial, '
+     'patients with untreated metastatic nonsquamous NSCLC were randomly assigned to pembrolizumab or '
+     'placebo, each combined with pemetrexed and a platinum drug. Results: Overall survival at 12 months '
+     'was 69.2% with pembrolizumab and 49.4% with placebo. Treatment-related adverse events of grade 3 or '
+     'higher occurred in 67.2% and 65.8% of patients. Conclusions: Adding pembrolizumab to standard '
+     'chemotherapy resulted in significantly longer overall survival than chemotherapy alone.'),
+    ('therapeutic advances',
+     'CAR-T cell therapy for relapsed or refractory large B-cell lymphoma',
+     'Chimeric antigen receptor (CAR) T-cell therapy has changed the therapeutic landscape for patients '
+     'with relapsed or refractory large B-cell lymphoma. We followed 101 patients treated with axicabtagene '
+     'ciloleucel after at least two prior lines of therapy. The objective response rate was 83% and 58% '
+     'had a complete response; cytokine release syndrome and neurologic events were mostly reversible. '
+     'These advances support earlier use of cellular therapy in this population.'),
+    ('digital health innovations',
+     'Digital health interventions for type 2 diabetes: a systematic review and meta-analysis',
+     'Digital health tools, including smartphone applications, text messaging and telemonitoring, are '
+     'increasingly used to support self-management of type 2 diabetes. We searched five databases for '
+     'randomized trials of digital interventions reporting HbA1c. Across 43 trials with 6,712 participants, '
+     'digital interventions reduced HbA1c by 0.3 percentage points compared with usual care. Effects were '
+     'larger for interventions combining app-based coaching with clinician feedback.'),
+    ('healthcare policy updates',
+     'Effects of school-entry vaccination mandates on childhood immunization coverage',
+     'Vaccination requirements for school entry are a common public health policy, but the effect of '
+     'removing non-medical exemptions is debated. Using state immunization registry data from 2010 to 2019, '
+     'we estimated changes in measles-mumps-rubella coverage after a policy that eliminated non-medical '
+     'exemptions. Coverage among kindergarten students increased by 2.4 percentage points, with the largest '
+     'gains in schools with previously low coverage. Health care providers reported more requests for '
+     'catch-up vaccination after the policy took effect.'),
+    ('medical device innovations',
+     'A wearable cardioverter-defibrillator after myocardial infarction',
+     'Patients with a reduced ejection fraction after myocardial infarction are at high risk of sudden '
+     'death in the first weeks. We randomly assigned 2302 patients to a wearable cardioverter-defibrillator '
+     'device plus guideline-directed therapy or therapy alone. The device did not significantly reduce '
+     'arrhythmic death at 90 days, although adherence to wearing the device was lower than expected.'),
+    ('infectious disease research',
+     'Genomic surveillance of carbapenem-resistant Klebsiella pneumoniae across hospital networks',
+     'Carbapenem-resistant Klebsiella pneumoniae is an urgent infectious disease threat. We sequenced 1,717 '
+     'isolates collected from 244 hospitals in 32 countries. Hospital-associated transmission accounted for '
+     'most spread, and high-risk clones carrying carbapenemase genes were shared between neighbouring '
+     'hospitals. Genomic surveillance can guide infection control at a regional level.'),
+    ('chronic disease management',
+     'Nurse-led management of chronic kidney disease in primary care: a cluster randomized trial',
+     'Chronic kidney disease is common and often poorly controlled in primary care. We randomized 68 '
+     'practices to a nurse-led management program or usual care. After two years, blood pressure targets '
+     'were met by 62% of patients in the intervention group and 48% under usual care, and the rate of '
+     'eGFR decline was slower. Structured nurse-led care improved disease control.'),
+    ('disease prevention studies',
+     'Semaglutide and cardiovascular outcomes in obesity without diabetes',
+     'In a randomized, double-blind trial, 17,604 adults with preexisting cardiovascular disease and '
+     'overweight or obesity but without diabetes received weekly subcutaneous semaglutide or placebo. '
+     'Over a mean follow-up of 39.8 months, the primary cardiovascular end point occurred in 6.5% and 8.0% '
+     'of patients. Semaglutide was superior to placebo in reducing the incidence of cardiovascular death, '
+     'myocardial infarction or stroke, supporting its use in secondary prevention.'),
+]
+
+# Retrieved by the same queries through loose concept mapping, but not about them
+OFF_TOPIC = [
+    ('healthcare innovations',
+     'Erratum: Author correction to "Soil microbiome diversity in temperate forests"',
+     'This article has been corrected. The affiliation of the second author was listed incorrectly in the '
+     'original version. The error has been fixed in the HTML and PDF versions of the article.'),
+    ('population health research',
+     'Thermal tolerance of coral reef fishes under ocean warming',
+     'Ocean warming threatens coral reef ecosystems. We measured critical thermal maxima of 28 reef fish '
+     'species and found that tolerance declined with body size, suggesting larger species will be more '
+     'vulnerable to marine heatwaves.'),
+    ('medical research developments',
+     'Crystal structure of a bacterial ABC transporter in the outward-facing state',
+     'ATP-binding cassette transporters move substrates across membranes. We report a 2.4 angstrom crystal '
+     'structure of a bacterial exporter in an outward-facing conformation, revealing the gating residues '
+     'that close the periplasmic gate after substrate release.'),
+]
+
+# Full-length abstracts on other subjects that mention one word of their query in passing
+INCIDENTAL = [
+    ('infectious disease research',
+     'Dental caries and fluoride varnish coverage among adolescents: a national cross-sectional survey',
+     'Background: Dental caries is the most prevalent chronic condition of adolescence, yet school-based '
+     'prevention programmes vary widely in reach. Methods: We examined 4,120 adolescents aged 12 to 15 years '
+     'sampled from 212 schools in a national oral health survey. Calibrated examiners recorded decayed, missing '
+     'and filled teeth, and questionnaires captured tooth brushing, sugar-sweetened beverage intake and '
+     'receipt of fluoride varnish. Results: Caries prevalence was 41%, with a mean of 1.6 affected teeth. '
+     'Prevalence was higher in rural schools and among adolescents drinking sugar-sweetened beverages daily. '
+     'Fluoride varnish programmes reached fewer than a third of eligible schools, and coverage was lowest '
+     'where caries was most common. Conclusions: Oral disease remains common in this age group, and varnish '
+     'programmes should be redirected towards rural schools with high beverage consumption.'),
+    ('digital health innovations',
+     'Occupational noise exposure and high-frequency hearing loss among shipyard workers',
+     'Background: Shipbuilding exposes workers to impulsive and continuous noise well above regulatory limits. '
+     'Methods: We measured personal noise dosimetry over full shifts and performed pure-tone audiometry in 812 '
+     'shipyard workers at three yards, adjusting for age, smoking and recreational noise. Results: Exposure '
+     'above 85 dB was recorded for 64% of workers. Workers in the highest exposure band had a threefold higher '
+     'prevalence of high-frequency hearing loss than those in the lowest band, and the notch at 4 kHz appeared '
+     'after fewer than five years of employment. Hearing protection was worn consistently by only 38% of '
+     'workers, mostly because it interfered with communication. Conclusions: Hearing loss is a preventable '
+     'occupational health hazard in shipyards; engineering noise controls and protectors compatible with '
+     'radio communication should be prioritised.'),
+]
+
+
+def record(title, abstract, **fields):
+    paper = {'title': title, 'abstract': abstract, 'authors': 'J Doe', 'year': '2024'}
+    paper.update(fields)
+    return paper
+
+
+def pubmed_records(records):
+    return [record(title, abstract, search_query=query) for query, title, abstract in records]
+
+
+def test_terms_stem_and_drop_stop_words():
+    assert terms('New Studies of the Devices, glasses') == ['study', 'devic', 'glass']
+    assert terms('treatment treated treating') == ['treat'] * 3
+    assert terms('Healthcare and health care') == ['health', 'car'] * 2
+
+
+def test_required_fields_accept_aliases():
+    fields = ['title', 'abstract', 'authors', 'publication_date']
+    assert has_required_fields(record('t', 'a'), fields)
+    assert not has_required_fields(record('t', 'a', authors=''), fields)
+    assert not has_required_fields(record('t', 'a', year=''), fields)
+
+
+def test_configured_threshold_keeps_on_topic_pubmed_records():
+    scorer = RelevanceScorer(idf_table={})
+    papers = pubmed_records(RELEVANT + OFF_TOPIC + INCIDENTAL)
+    kept = scorer.filter(papers)
+    assert [paper['title'] for paper in kept] == [title for _, title, _ in RELEVANT]
+    assert all(paper['relevance_score'] == 0.0 for paper in papers[len(RELEVANT):-len(INCIDENTAL)])
+
+
+def test_threshold_separates_on_topic_from_passing_mentions():
+    relevant = pubmed_records(RELEVANT)
+    incidental = pubmed_records(INCIDENTAL)
+    corpus = build_idf_table(f"{p['title']} {p['abstract']}" for p in relevant + pubmed_records(OFF_TOPIC) + incidental)
+    threshold = ANALYSIS_SETTINGS['min_relevance_score']
+    for table in ({}, corpus):
+        scorer = RelevanceScorer(idf_table=table)
+        # The weakest on-topic paper shares a single term ('treat') with its query
+        assert min(scorer.score(relevant)) >= threshold
+        assert max(scorer.score(incidental)) < threshold
+
+
+def test_old_scale_threshold_warns(capsys):
+    RelevanceScorer(min_score=0.7, idf_table={})
+    assert 'old keyword-share scale' in capsys.readouterr().out
+    RelevanceScorer(idf_table={})
+    assert capsys.readouterr().out == ''
+
+
+def test_papers_are_scored_against_their_own_query():
+    scorer = RelevanceScorer(TOPICS, idf_table={})
+    device = record('A wearable medical device', 'Innovations in home monitoring.')
+    found_by_device = dict(device, search_query='medical device innovations')
+    found_by_disease = dict(device, search_query='infectious disease research')
+    scores = scorer.score([found_by_device, found_by_disease, device])
+    assert scores[0] > 0.5
+    assert scores[1] == 0.0
+    # Without a query, the best-matching topic counts
+    assert scores[2] == scores[0]
+
+
+def test_scores_do_not_depend_on_the_batch(tmp_path):
+    papers = pubmed_records(RELEVANT + OFF_TOPIC)
+    path = str(tmp_path / 'idf.json')
+    save_idf_table(build_idf_table(f"{p['title']} {p['abstract']}" for p in papers), path)
+    table = load_idf_table(path)
+    assert table['documents'] == len(papers)
+
+    scorer = RelevanceScorer(idf_table=table)
+    together = scorer.score(papers)
+    one_by_one = [scorer.score([paper])[0] for paper in reversed(papers)][::-1]
+    assert list(together) == one_by_one
+    assert list(RelevanceScorer(idf_table=table).score(papers)) == list(together)
+
+
+def test_batch_scoring_handles_thousands_of_papers():
+    scorer = RelevanceScorer(TOPICS, min_score=0.3, idf_table={})
+    papers = [record(f'Paper {n}', f'Infectious disease research cohort {n}.') for n in range(5000)]
+    assert len(scorer.filter(papers)) == 5000
@@ -0,0 +1,39 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.report_generator import generate_report, statistics_chart
+from src.utils.report_layout import LayoutCache
+
+
+def make_papers(n):
+    return [
+        {
+            'title': f'Drug therapy trial {i}',
+            'abstract': 'Randomized screening study.',
+            'source': 'PubMed' if i % 2 else 'medRxiv',
+            'authors': 'A. Author',
+            'year': '2024'
+        }
+        for i in range(n)
+    ]
+
+
+def test_chart_is_png_and_cached_on_counts():
+    statistics_chart.cache_clear()
+    chart = statistics_chart((('PubMed', 3),), (('Clinical Trials', 2), ('Other Research', 1)))
+    assert chart.startswith(b'\x89PNG')
+    assert statistics_chart((('PubMed', 3),), (('Clinical Trials', 2), ('Other Research', 1))) is chart
+    assert statistics_chart.cache_info().hits == 1
+
+
+def test_reports_render_concurrently_without_temp_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = LayoutCache(str(tmp_path / 'layouts.db'))
+    outputs = [str(tmp_path / f'report_{i}.pdf') for i in range(4)]
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda i: generate_report(make_papers(i + 3), outputs[i], layout_cache=cache), range(4)))
+    cache.close()
+
+    assert all(os.path.getsize(path) > 0 for path in outputs)
+    assert 'temp_plot.png' not in os.listdir(tmp_path)
+    assert 'matplotlib.pyplot' not in sys.modules
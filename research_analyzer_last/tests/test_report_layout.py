@@ -0,0 +1,103 @@
+import os
+from fpdf import FPDF
+from config.config import REPORT_CONFIG
+from src.utils import report_layout
+from src.utils.report_layout import LayoutCache, layout_key, layout_paper, layout_papers, render_section
+from src.utils.report_generator import generate_report
+
+
+def make_paper(i, **fields):
+    paper = {
+        'title': f'Drug therapy trial {i}',
+        'abstract': f'Randomized phase {i} study of a new treatment. ' * 30,
+        'source': 'PubMed',
+        'authors': 'A. Author',
+        'year': '2024',
+        'summary_bart': 'The treatment worked. ' * 20
+    }
+    paper.update(fields)
+    return paper
+
+
+def test_layout_wraps_and_truncates_like_multi_cell():
+    ops = layout_paper(make_paper(1, title='Café trial'))
+    assert ops[1] == ['title', 'Caf? trial']
+
+    abstract_lines = ops[6][2]
+    assert len(abstract_lines) > 1
+    assert ' '.join(abstract_lines).endswith('...')
+
+    pdf = FPDF()
+    pdf.add_page()
+    for line in abstract_lines:
+        pdf.set_font('Helvetica', 'I', 10)
+        assert pdf.get_string_width(line) <= pdf.epw
+
+
+def test_key_follows_rendered_content():
+    paper = make_paper(1)
+    assert layout_key(paper) == layout_key(dict(paper, url='http://elsewhere', relevance_score=0.4))
+    assert layout_key(paper) != layout_key(dict(paper, summary_bart='Different'))
+
+
+def test_cache_hit_skips_layout(tmp_path, monkeypatch):
+    cache = LayoutCache(str(tmp_path / 'layouts.db'))
+    papers = [make_paper(i) for i in range(3)]
+    first = layout_papers(papers, cache)
+    assert cache.stats == {'hits': 0, 'misses': 3}
+
+    def fail(papers):
+        raise AssertionError('laid out a cached paper')
+    monkeypatch.setattr(report_layout, '_layout_chunk', fail)
+    second = layout_papers(papers, LayoutCache(cache.path))
+    assert second == first
+    cache.close()
+
+
+def test_parallel_layout_matches_serial(monkeypatch):
+    papers = [make_paper(i) for i in range(6)]
+    serial = layout_papers(papers)
+    monkeypatch.setitem(REPORT_CONFIG, 'parallel_min_papers', 2)
+    assert layout_papers(papers, workers=2) == serial
+
+
+def test_cache_is_trimmed_to_most_recently_used(tmp_path):
+    cache = LayoutCache(str(tmp_path / 'layouts.db'), max_entries=2)
+    cache.set_many({'a': [], 'b': []})
+    cache.get_many(['a'])
+    cache.set_many({'c': []})
+    assert set(cache.get_many(['a', 'b', 'c'])) == {'a', 'c'}
+    cache.close()
+
+
+def test_render_numbers_entries_per_section():
+    pdf = FPDF()
+    pdf.add_page()
+    entries = layout_papers([make_paper(i) for i in range(40)])
+    render_section(pdf, 'Clinical Trials', entries)
+    assert pdf.page > 5
+
+
+def test_generate_report_uses_layout_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    papers = [make_paper(i) for i in range(5)]
+    cache = LayoutCache(str(tmp_path / 'layouts.db'))
+    generate_report(papers, str(tmp_path / 'first.pdf'), layout_cache=cache)
+    generate_report(papers, str(tmp_path / 'second.pdf'), layout_cache=cache)
+    assert cache.stats['hits'] == 5
+    assert os.path.getsize(tmp_path / 'second.pdf') > 0
+    cache.close()
+
+
+def test_layout_pool_does_not_fork(monkeypatch):
+    contexts = []
+    real = report_layout.ProcessPoolExecutor
+
+    def recording(*args, **kwargs):
+        contexts.append(kwargs['mp_context'].get_start_method())
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(report_layout, 'ProcessPoolExecutor', recording)
+    monkeypatch.setitem(REPORT_CONFIG, 'parallel_min_papers', 2)
+    layout_papers([make_paper(i) for i in range(4)], workers=2)
+    assert contexts and contexts[0] in ('forkserver', 'spawn')
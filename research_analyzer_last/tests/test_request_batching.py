@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from aiohttp import ClientSession, web
+from src.models.llm_modules import HuggingFaceInferenceLLM
+from src.utils.rate_limiter import get_rate_limiter
+from tests.standin_server import StandInServer
+
+
+async def start_inference(handler, monkeypatch):
+    monkeypatch.setenv('HF_API_KEY', 'test-key')
+    server = StandInServer()
+    server.app.router.add_post('/models/test', handler)
+    await server.start()
+    llm = HuggingFaceInferenceLLM('bart_cnn')
+    llm.api_url = f'{server.base_url}/models/test'
+    llm.rate_limiter = get_rate_limiter(llm.api_url)
+    return server, llm
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_request(monkeypatch):
+    payloads = []
+
+    async def inference(request):
+        payload = await request.json()
+        payloads.append(payload)
+        return web.json_response([[{'summary_text': f'summary of {text}'}] for text in payload['inputs']])
+
+    server, llm = await start_inference(inference, monkeypatch)
+    try:
+        async with ClientSession() as session:
+            results = await asyncio.gather(*(llm.asummarize(f'abstract {n}', session=session) for n in range(5)))
+        assert results == [f'summary of abstract {n}' for n in range(5)]
+        assert len(payloads) == 1
+        assert payloads[0]['inputs'] == [f'abstract {n}' for n in range(5)]
+        assert payloads[0]['parameters']['num_beams'] == 4
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_batches_are_capped_at_max_size(monkeypatch):
+    sizes = []
+
+    async def inference(request):
+        payload = await request.json()
+        inputs = payload['inputs'] if isinstance(payload['inputs'], list) else [payload['inputs']]
+        sizes.append(len(inputs))
+        results = [{'summary_text': 'ok'} for _ in inputs]
+        return web.json_response(results if isinstance(payload['inputs'], list) else results[:1])
+
+    server, llm = await start_inference(inference, monkeypatch)
+    llm.request_batcher.max_batch_size = 4
+    try:
+        async with ClientSession() as session:
+            results = await asyncio.gather(*(llm.asummarize(f'abstract {n}', session=session) for n in range(9)))
+        assert results == ['ok'] * 9
+        assert sorted(sizes) == [1, 4, 4]
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_per_item_errors_stay_with_their_caller(monkeypatch):
+    async def inference(request):
+        payload = await request.json()
+        return web.json_response([
+            {'error': 'input too long'} if 'bad' in text else {'summary_text': 'fine'}
+            for text in payload['inputs']
+        ])
+
+    server, llm = await start_inference(inference, monkeypatch)
+    try:
+        async with ClientSession() as session:
+            results = await asyncio.gather(
+                llm.asummarize('good one', session=session),
+                llm.asummarize('bad one', session=session),
+                llm.asummarize('good two', session=session)
+            )
+        assert results == ['fine', 'Error: input too long', 'fine']
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_rejected_batch_falls_back_to_single_requests(monkeypatch):
+    payloads = []
+
+    async def inference(request):
+        payload = await request.json()
+        payloads.append(payload)
+        if isinstance(payload['inputs'], list):
+            return web.json_response({'error': 'batched inputs not supported'}, status=400)
+        if 'bad' in payload['inputs']:
+            return web.json_response({'error': 'bad input'}, status=400)
+        return web.json_response([{'summary_text': f"single {payload['inputs']}"}])
+
+    server, llm = await start_inference(inference, monkeypatch)
+    try:
+        async with ClientSession() as session:
+            results = await asyncio.gather(
+                llm.asummarize('a', session=session),
+                llm.asummarize('bad', session=session),
+                llm.asummarize('c', session=session)
+            )
+        assert results[0] == 'single a'
+        assert results[1].startswith('Error: HTTP 400')
+        assert results[2] == 'single c'
+        assert len(payloads) == 4
+    finally:
+        await server.stop()
@@ -0,0 +1,82 @@
+import pytest
+from config.config import JOURNAL_CONFIG, EXPORT_CONFIG
+from src.core import paper_analyzer
+from src.core.paper_analyzer import ResearchPaperAnalyzer
+from src.models.llm_modules import BaseLLM
+from src.storage.paper_store import PaperStore
+from src.storage.run_journal import RunJournal
+from src.storage.paper_export import load_history
+
+
+def paper(pmid):
+    return {'pmid': pmid, 'title': f'Paper {pmid}', 'abstract': f'Treatment protocols, part {pmid}',
+            'authors': 'J Doe', 'year': '2024', 'source': 'PubMed'}
+
+
+def test_replay_restores_papers_and_summaries(tmp_path):
+    journal = RunJournal('run1', str(tmp_path))
+    journal.record_paper(dict(paper('1'), summary_a='stale field is not journaled'))
+    journal.record_paper(paper('2'))
+    journal.record_summary(paper('1'), 'a', 'Summary A')
+    journal.record_summary(paper('2'), 'a', 'Error: 503')
+    journal.close()
+    # A crash mid-write leaves a partial line; appends after resuming must still replay
+    with open(journal.path, 'a') as f:
+        f.write('{"type": "summ')
+    resumed = RunJournal.resume('run1', str(tmp_path))
+    resumed.record_summary(paper('2'), 'a', 'Summary B')
+    resumed.close()
+
+    papers, marks = RunJournal.resume('run1', str(tmp_path)).replay()
+    assert [(p['pmid'], p.get('summary_a')) for p in papers] == [('1', 'Summary A'), ('2', 'Summary B')]
+    assert marks is None
+    with pytest.raises(FileNotFoundError):
+        RunJournal.resume('missing', str(tmp_path))
+
+
+class CountingLLM(BaseLLM):
+    def __init__(self):
+        self.calls = []
+
+    def summarize(self, text):
+        raise AssertionError('the async path should be used')
+
+    async def asummarize(self, text, session=None):
+        self.calls.append(text.split('Title: ')[1].split('\n')[0])
+        return 'fresh summary'
+
+
+@pytest.mark.asyncio
+async def test_resume_redoes_only_missing_work(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(JOURNAL_CONFIG, 'directory', str(tmp_path / 'journals'))
+    monkeypatch.setitem(EXPORT_CONFIG, 'directory', str(tmp_path / 'results' / 'papers'))
+    monkeypatch.setattr(paper_analyzer, 'generate_report', lambda results, path: path)
+
+    # An interrupted run: three papers fetched, two of them summarized, search not finished
+    crashed = RunJournal('20240101_000000')
+    for pmid in ('1', '2', '3'):
+        crashed.record_paper(paper(pmid))
+    crashed.record_summary(paper('1'), 'counting', 'old summary 1')
+    crashed.record_summary(paper('2'), 'counting', 'old summary 2')
+    crashed.close()
+
+    store = PaperStore(str(tmp_path / 'papers.db'), str(tmp_path / 'backups'))
+    analyzer = ResearchPaperAnalyzer(model_names=['huggingface_flan_t5'], store=store, summary_cache=False)
+    model = CountingLLM()
+    analyzer.models = {'counting': model}
+
+    async def remaining_search(days_back=None):
+        for pmid in ('1', '4'):
+            yield paper(pmid)
+
+    monkeypatch.setattr(analyzer, 'stream_papers', remaining_search)
+    results = await analyzer.run_analysis(resume='20240101_000000')
+
+    assert sorted(model.calls) == ['Paper 3', 'Paper 4']
+    assert {p['pmid']: p['summary_counting'] for p in results} == {
+        '1': 'old summary 1', '2': 'old summary 2', '3': 'fresh summary', '4': 'fresh summary'
+    }
+    exported = load_history(directory=str(tmp_path / 'results' / 'papers'))
+    assert sorted(exported['pmid']) == ['1', '2', '3', '4']
+    store.close()
@@ -0,0 +1,121 @@
+import asyncio
+import time
+import pytest
+from config.config import ANALYSIS_SETTINGS
+from src.core.paper_analyzer import ResearchPaperAnalyzer
+from src.utils.rate_limiter import RateLimiter
+
+
+class FakeScraper:
+    in_flight = 0
+    peak = 0
+
+    def __init__(self, source_key):
+        self.source_key = source_key
+
+    async def search(self, query, limit=5):
+        FakeScraper.in_flight += 1
+        FakeScraper.peak = max(FakeScraper.peak, FakeScraper.in_flight)
+        await asyncio.sleep(0.02)
+        FakeScraper.in_flight -= 1
+        if query == 'broken':
+            raise RuntimeError('source unavailable')
+        return [{'title': f'{query} from {self.source_key}', 'abstract': 'x', 'source': self.source_key}]
+
+
+@pytest.mark.asyncio
+async def test_topic_source_pairs_run_concurrently_and_in_order():
+    analyzer = ResearchPaperAnalyzer(model_names=['huggingface_flan_t5'])
+    analyzer.search_topics = [f'topic {i}' for i in range(10)] + ['broken']
+    scrapers = [FakeScraper('pubmed'), FakeScraper('medrxiv')]
+
+    results = {(topic, scraper.source_key): papers
+               async for topic, scraper, papers in analyzer._stream_searches(scrapers)}
+
+    assert FakeScraper.peak == ANALYSIS_SETTINGS['max_concurrent_searches']
+    assert len(results) == 20
+    assert results[('topic 0', 'pubmed')][0]['title'] == 'topic 0 from pubmed'
+    assert results[('topic 0', 'medrxiv')][0]['title'] == 'topic 0 from medrxiv'
+    # A failing search yields no papers instead of aborting the run
+    assert ('broken', 'pubmed') not in results
+    assert analyzer.failed_searches == {('pubmed', 'broken'), ('medrxiv', 'broken')}
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(requests_per_second=50)
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.acquire() for _ in range(6)))
+    # The first request goes straight through, the other five wait one interval each
+    assert time.monotonic() - start >= 5 * 0.02 - 0.005
+
+
+class FakeBatchScraper(FakeScraper):
+    def __init__(self):
+        super().__init__('pubmed')
+        self.batch_calls = 0
+
+    async def search_batch(self, queries, limit=5, exclude_pmids=()):
+        self.batch_calls += 1
+        return {query: [{'title': f'{query} batched', 'abstract': 'x', 'source': 'pubmed'}]
+                for query in queries}
+
+
+@pytest.mark.asyncio
+async def test_batch_capable_scrapers_get_all_topics_in_one_job():
+    analyzer = ResearchPaperAnalyzer(model_names=['huggingface_flan_t5'])
+    analyzer.search_topics = ['a', 'b']
+    batch_scraper = FakeBatchScraper()
+
+    results = [papers[0]['title'] async for _, _, papers in
+               analyzer._stream_searches([batch_scraper, FakeScraper('medrxiv')])]
+
+    assert batch_scraper.batch_calls == 1
+    assert sorted(results) == ['a batched', 'a from medrxiv', 'b batched', 'b from medrxiv']
+
+
+class WindowScraper(FakeScraper):
+    def __init__(self, source_key, failing=(), truncating=()):
+        super().__init__(source_key)
+        self.failed_queries = set()
+        self.truncated_queries = set()
+        self.failing = set(failing)
+        self.truncating = set(truncating)
+        self.windows = {}
+
+    async def search(self, query, limit=5, since=None, until=None):
+        self.windows[query] = (since, until)
+        if query in self.failing:
+            self.failed_queries.add(query)
+            return []
+        if query in self.truncating:
+            self.truncated_queries.add(query)
+        return [{'title': f'{query} from {self.source_key}', 'abstract': 'x', 'source': self.source_key}]
+
+
+@pytest.mark.asyncio
+async def test_searches_start_from_stored_watermarks(tmp_path, monkeypatch):
+    from datetime import datetime, timedelta
+    from src.core import paper_analyzer
+    from src.storage.paper_store import PaperStore
+
+    store = PaperStore(str(tmp_path / 'papers.db'), str(tmp_path / 'backups'))
+    mark_a = datetime.now() - timedelta(days=5)
+    store.set_watermarks({('medrxiv', 'a'): mark_a, ('medrxiv', 'c'): datetime(2024, 5, 1)})
+    analyzer = ResearchPaperAnalyzer(model_names=['huggingface_flan_t5'], store=store, summary_cache=False)
+    analyzer.search_topics = ['a', 'b', 'c']
+    scraper = WindowScraper('medrxiv', failing=['b'], truncating=['c'])
+    monkeypatch.setattr(paper_analyzer, 'create_scrapers', lambda session_manager: [scraper])
+
+    await analyzer.search_recent_papers(days_back=2)
+
+    since_a, until = scraper.windows['a']
+    since_b, _ = scraper.windows['b']
+    since_c, _ = scraper.windows['c']
+    assert since_a == mark_a
+    assert abs((until - since_b).total_seconds() - 2 * 86400) < 1
+    # A watermark left far behind is searched from max_days_to_look_back only
+    assert abs((until - since_c).total_seconds() - ANALYSIS_SETTINGS['max_days_to_look_back'] * 86400) < 1
+    # The failed and the truncated search keep their old windows for the next run
+    assert analyzer.harvest_marks == {('medrxiv', 'a'): until}
+    store.close()
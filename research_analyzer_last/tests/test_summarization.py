@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from aiohttp import web
+from config.config import ANALYSIS_SETTINGS
+from src.core.paper_analyzer import ResearchPaperAnalyzer
+from src.models.llm_modules import BaseLLM, HuggingFaceInferenceLLM
+from src.utils.rate_limiter import get_rate_limiter
+from tests.standin_server import StandInServer
+
+
+class SlowLLM(BaseLLM):
+    def __init__(self, name, tracker):
+        self.name = name
+        self.tracker = tracker
+
+    def summarize(self, text):
+        raise AssertionError('the async path should be used')
+
+    async def asummarize(self, text, session=None):
+        self.tracker['global'] += 1
+        self.tracker[self.name] = self.tracker.get(self.name, 0) + 1
+        self.tracker['peak_global'] = max(self.tracker['peak_global'], self.tracker['global'])
+        peak_key = f'peak_{self.name}'
+        self.tracker[peak_key] = max(self.tracker.get(peak_key, 0), self.tracker[self.name])
+        await asyncio.sleep(0.01)
+        self.tracker['global'] -= 1
+        self.tracker[self.name] -= 1
+        return f"{self.name}: {text.split('Title: ')[1].splitlines()[0]}"
+
+
+@pytest.mark.asyncio
+async def test_paper_model_jobs_respect_caps_and_keep_order(monkeypatch):
+    monkeypatch.setitem(ANALYSIS_SETTINGS, 'max_concurrent_summaries', 5)
+    monkeypatch.setitem(ANALYSIS_SETTINGS, 'max_concurrent_per_model', 3)
+    monkeypatch.setitem(ANALYSIS_SETTINGS, 'model_concurrency', {'slow_b': 1})
+    analyzer = ResearchPaperAnalyzer(model_names=['huggingface_flan_t5'], summary_cache=False)
+    tracker = {'global': 0, 'peak_global': 0}
+    analyzer.models = {name: SlowLLM(name, tracker) for name in ('slow_a', 'slow_b')}
+
+    papers = [{'title': f'Paper {i}', 'abstract': 'x'} for i in range(12)]
+    papers[3]['summary_slow_a'] = 'kept from an earlier run'
+    results = await analyzer.summarize_papers(papers)
+
+    assert [p['title'] for p in results] == [f'Paper {i}' for i in range(12)]
+    assert results[5]['summary_slow_b'] == 'slow_b: Paper 5'
+    assert results[3]['summary_slow_a'] == 'kept from an earlier run'
+    assert tracker['peak_global'] <= 5
+    assert tracker['peak_slow_a'] == 3
+    assert tracker['peak_slow_b'] == 1
+
+
+@pytest.mark.asyncio
+async def test_hf_asummarize_retries_while_model_loads(monkeypatch):
+    monkeypatch.setenv('HF_API_KEY', 'test-key')
+    calls = []
+
+    async def inference(request):
+        calls.append(await request.json())
+        if len(calls) == 1:
+            return web.json_response({'error': 'loading', 'estimated_time': 0.05}, status=503)
+        return web.json_response([{'summary_text': 'Concise summary.'}])
+
+    server = StandInServer()
+    server.app.router.add_post('/models/test', inference)
+    await server.start()
+    try:
+        llm = HuggingFaceInferenceLLM('bart_cnn')
+        llm.api_url = f'{server.base_url}/models/test'
+        llm.rate_limiter = get_rate_limiter(llm.api_url)
+        assert await llm.asummarize('Some abstract text') == 'Concise summary.'
+        assert len(calls) == 2
+        assert calls[0]['parameters']['num_beams'] == 4
+    finally:
+        await server.stop()
+
+
+class BatchingLLM(BaseLLM):
+    supports_batching = True
+
+    def __init__(self):
+        self.batches = []
+
+    def summarize(self, text):
+        raise AssertionError('batching models should get one summarize_batch call')
+
+    def summarize_batch(self, texts):
+        self.batches.append(len(texts))
+        return [f"batched: {text.split('Title: ')[1].splitlines()[0]}" for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_batching_models_get_every_pending_paper_in_one_call():
+    analyzer = ResearchPaperAnalyzer(model_names=['huggingface_flan_t5'], summary_cache=False)
+    tracker = {'global': 0, 'peak_global': 0}
+    local = BatchingLLM()
+    analyzer.models = {'local': local, 'slow_a': SlowLLM('slow_a', tracker)}
+
+    papers = [{'title': f'Paper {i}', 'abstract': 'x'} for i in range(5)]
+    papers[0]['summary_local'] = 'stored'
+    results = await analyzer.summarize_papers(papers)
+
+    assert local.batches == [4]
+    assert [p['summary_local'] for p in results] == ['stored'] + [f'batched: Paper {i}' for i in range(1, 5)]
+    assert results[2]['summary_slow_a'] == 'slow_a: Paper 2'
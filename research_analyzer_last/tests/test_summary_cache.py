@@ -0,0 +1,129 @@
+import asyncio
+import sqlite3
+import time
+from src.models.llm_modules import BaseLLM
+from src.models.summary_cache import SummaryCache, CachedLLM, cache_key
+
+
+class CountingLLM(BaseLLM):
+    def __init__(self, model='test/model', reply='A summary.'):
+        self.model = model
+        self.parameters = {'max_length': 250}
+        self.reply = reply
+        self.calls = 0
+
+    def summarize(self, text):
+        self.calls += 1
+        return self.reply
+
+
+def test_cache_key_normalizes_whitespace_and_tracks_parameters():
+    base = cache_key('m', 'Title:  A\n   Abstract: B', {'num_beams': 4})
+    assert base == cache_key('m', 'Title: A Abstract: B', {'num_beams': 4})
+    assert base != cache_key('m', 'Title: A Abstract: B', {'num_beams': 2})
+    assert base != cache_key('other', 'Title: A Abstract: B', {'num_beams': 4})
+
+
+def test_identical_inputs_are_summarized_once(tmp_path):
+    cache = SummaryCache(str(tmp_path / 'cache.db'))
+    llm = CountingLLM()
+    cached = CachedLLM(llm, cache)
+
+    assert cached.summarize('same text') == 'A summary.'
+    assert cached.summarize('same   text') == 'A summary.'
+    assert llm.calls == 1
+    assert cache.stats['memory_hits'] == 1 and cache.stats['misses'] == 1
+    assert cached.model == 'test/model'
+    cache.close()
+
+    # A new process starts with an empty memory tier but finds the entry on disk
+    reopened = SummaryCache(str(tmp_path / 'cache.db'))
+    assert CachedLLM(CountingLLM(), reopened).summarize('same text') == 'A summary.'
+    assert reopened.stats['disk_hits'] == 1
+    reopened.close()
+
+
+def test_errors_are_not_cached(tmp_path):
+    cache = SummaryCache(str(tmp_path / 'cache.db'))
+    llm = CountingLLM(reply='Error: 503 Service Unavailable')
+    cached = CachedLLM(llm, cache)
+    cached.summarize('text')
+    cached.summarize('text')
+    assert llm.calls == 2
+    cache.close()
+
+
+def test_summaries_starting_with_the_word_error_are_cached(tmp_path):
+    cache = SummaryCache(str(tmp_path / 'cache.db'))
+    llm = CountingLLM(reply='Error rates in diagnostic imaging fell by a third.')
+    cached = CachedLLM(llm, cache)
+    cached.summarize('text')
+    cached.summarize('text')
+    assert llm.calls == 1
+    cache.close()
+
+
+def test_disk_hits_defer_access_time_writes_and_still_evict_lru(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SummaryCache(path, disk_entries=2)
+    cache.set('k0', 'summary 0')
+    cache.set('k1', 'summary 1')
+    cache.close()
+
+    reopened = SummaryCache(path, disk_entries=2)
+    assert reopened.get('k0') == 'summary 0'
+    assert list(reopened._touched) == ['k0']
+    reopened.set('k2', 'summary 2')
+    reopened.close()
+
+    # k0 was read after k1 was written, so k1 is the least recently used
+    keys = {row[0] for row in sqlite3.connect(path).execute('SELECT key FROM summaries')}
+    assert keys == {'k0', 'k2'}
+
+
+def test_async_lookups_are_cached(tmp_path):
+    cache = SummaryCache(str(tmp_path / 'cache.db'))
+    llm = CountingLLM()
+    cached = CachedLLM(llm, cache)
+
+    async def run():
+        return [await cached.asummarize('same text') for _ in range(2)]
+
+    assert asyncio.run(run()) == ['A summary.', 'A summary.']
+    assert llm.calls == 1
+    cache.close()
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    cache = SummaryCache(str(tmp_path / 'cache.db'), memory_entries=2, disk_entries=3, ttl_seconds=60)
+    for i in range(5):
+        cache.set(f'k{i}', f'summary {i}')
+    assert list(cache._memory) == ['k3', 'k4']
+
+    cache.close()
+    assert cache.get('k0') is None
+    assert cache.get('k4') == 'summary 4'
+    assert cache.stats['evictions'] == 2
+
+    cache.ttl_seconds = 0.01
+    time.sleep(0.02)
+    assert cache.get('k4') is None
+    cache.close()
+
+
+def test_batch_sends_only_misses_to_the_model(tmp_path):
+    class BatchLLM(CountingLLM):
+        supports_batching = True
+        batches = []
+
+        def summarize_batch(self, texts):
+            self.batches.append(list(texts))
+            return [f'summary of {text}' for text in texts]
+
+    cache = SummaryCache(str(tmp_path / 'cache.db'))
+    cached = CachedLLM(BatchLLM(), cache)
+    cached.summarize_batch(['a', 'b'])
+    assert cached.supports_batching
+    assert cached.summarize_batch(['a', 'c', 'b']) == ['summary of a', 'summary of c', 'summary of b']
+    assert BatchLLM.batches == [['a', 'b'], ['c']]
+    cache.close()